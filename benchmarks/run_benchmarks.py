@@ -0,0 +1,375 @@
+"""Mesures de performance de NetCDF Lab (sans affichage).
+
+Génère des fichiers de test de plusieurs tailles puis mesure, pour chacun :
+le chargement (``DataPanel.load_netcdf``), la construction de l'arbre
+(``add_file_to_tree``), le tracé (``VisualizationPanel.update_plot``) pour
+chaque nombre de dimensions, la série au point cliqué
+(``show_point_series``), les multi-panneaux (``plot_small_multiples``),
+une édition (``handle_item_edit``), les statistiques d'une variable
+(``compute_statistics``), l'export en tableau CSV (``export_variable``),
+la conversion en store Zarr (``write_zarr``, si zarr est installé) et la
+série au point lue depuis ce store, une copie compactée en int16
+(``write_dataset`` avec un encodage ``pack``), la sauvegarde
+(``save_file`` / ``save_file_as``), la comparaison du fichier avec sa
+copie (``diff_files``), la validation (``validate_file``) et l'ajout
+d'enregistrements à un fichier ouvert (``append_records``). Chaque
+mesure enregistre le temps écoulé et le pic de mémoire résidente (RSS).
+
+Utilisation::
+
+    python benchmarks/run_benchmarks.py --sizes small medium --output bench.json
+    python benchmarks/run_benchmarks.py --compare before.json after.json --threshold 0.2
+
+La comparaison retourne un code de sortie non nul si une mesure est plus
+lente que ``threshold`` (20 % par défaut).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+# Qt sans affichage : doit être défini avant l'import de PyQt6
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Tailles des fichiers générés : (nx, ny, pas de temps)
+SIZES = {
+    'small': (100, 100, 24),
+    'medium': (500, 500, 96),
+    'large': (1000, 1000, 168),
+}
+
+
+def _read_status(field):
+    """Lire une valeur (en octets) de /proc/self/status"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def reset_peak_rss():
+    """Remettre à zéro le pic RSS du processus (Linux uniquement)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """Pic de mémoire résidente du processus, en octets"""
+    try:
+        return _read_status('VmHWM')
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est en octets sous macOS, en Ko ailleurs
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure(func, repeat=1, setup=None):
+    """Exécuter ``func`` ``repeat`` fois ; retourne les temps et le pic RSS"""
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        reset_peak_rss()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        peak = max(peak, peak_rss() or 0)
+    return {
+        'seconds': min(times),
+        'median_seconds': statistics.median(times),
+        'repeat': repeat,
+        'peak_rss_bytes': peak,
+    }
+
+
+def generate_file(path, nx, ny, nb_temps):
+    """Fichier de test avec des variables de 0 à 4 dimensions"""
+    import numpy as np
+    import netCDF4
+    from netcdflab.utils.create_test_netcdf import create_test_netcdf
+
+    create_test_netcdf(path, nx=nx, ny=ny, nb_temps=nb_temps, seed=0)
+    with netCDF4.Dataset(path, 'a') as ds:
+        scalar = ds.createVariable('scale', 'f4', ())
+        scalar[...] = 1.5
+        surface = ds.createVariable('surface', 'f4', ('lat', 'lon'))
+        surface[:] = np.random.default_rng(0).random((ny, nx), dtype='f4')
+        total = ds.createVariable('total', 'f4', ('time', 'lat', 'lon'))
+        for t in range(nb_temps):
+            total[t] = ds['concentration'][:, t].sum(axis=0)
+
+
+def _silence_dialogs():
+    """Remplacer les boîtes de dialogue bloquantes"""
+    from PyQt6.QtWidgets import QMessageBox
+    for name in ('information', 'warning', 'critical'):
+        setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: None))
+    QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.StandardButton.Yes)
+
+
+def _find_item(root_item, *labels):
+    """Descendre dans l'arbre en suivant les libellés (préfixe accepté pour le dernier)"""
+    item = root_item
+    for depth, label in enumerate(labels):
+        last = depth == len(labels) - 1
+        for i in range(item.childCount()):
+            child = item.child(i)
+            if child.text(0) == label or (last and child.text(0).startswith(label)):
+                item = child
+                break
+        else:
+            raise LookupError(f"Élément introuvable: {label}")
+    return item
+
+
+def run_size(size_name, work_dir, repeat):
+    """Mesures pour une taille de fichier"""
+    from PyQt6.QtWidgets import QFileDialog
+    from netcdflab.gui.data_panel import DataPanel
+    from netcdflab.gui.visualization_panel import VisualizationPanel
+
+    nx, ny, nb_temps = SIZES[size_name]
+    path = os.path.join(work_dir, f'{size_name}.nc')
+    start = time.perf_counter()
+    generate_file(path, nx, ny, nb_temps)
+    results = {'generate': {'seconds': time.perf_counter() - start,
+                            'file_bytes': os.path.getsize(path)}}
+
+    # Chargement complet (lecture + copie + arbre + signaux)
+    panel = DataPanel()
+
+    def unload():
+        if path in panel.open_files:
+            panel.close_file(path)
+
+    results['load_netcdf'] = measure(lambda: panel.load_netcdf(path), repeat, setup=unload)
+    dataset = panel.open_files[path]
+
+    # Construction de l'arbre seule
+    def clear_tree():
+        panel.tree.clear()
+
+    results['add_file_to_tree'] = measure(lambda: panel.add_file_to_tree(path, dataset),
+                                          repeat, setup=clear_tree)
+
+    # Tracé, pour chaque nombre de dimensions
+    viz = VisualizationPanel()
+    viz.resize(1000, 800)
+    viz.update_dataset(dataset, path)
+    for var_name in ('scale', 'latitude', 'surface', 'total', 'concentration'):
+        ndim = dataset[var_name].ndim
+        viz.var_selector.setCurrentText(var_name)
+        results[f'update_plot_{ndim}d'] = measure(viz.update_plot, repeat)
+        results[f'update_plot_{ndim}d']['variable'] = var_name
+    
+    # Série au point cliqué sur la carte (dernière variable affichée)
+    results['point_series'] = measure(lambda: viz.show_point_series(ny // 2, nx // 2), repeat)
+    results['point_series']['variable'] = viz.current_var
+
+    # Multi-panneaux : une carte par pas de temps, échelle de couleurs commune
+    viz.panels_selector.setCurrentText('time')
+    results['small_multiples'] = measure(viz.update_plot, repeat)
+    results['small_multiples']['variable'] = viz.current_var
+    viz.panels_selector.setCurrentIndex(0)
+
+    # Édition d'un attribut global
+    root_item = panel.tree.invisibleRootItem().child(0)
+    attr_item = _find_item(root_item, 'Attributs globaux', 'source')
+
+    def edit():
+        panel.tree.blockSignals(True)
+        attr_item.setText(0, f"source: benchmark {time.perf_counter()}")
+        panel.tree.blockSignals(False)
+        panel.handle_item_edit(attr_item, 0)
+
+    results['handle_item_edit'] = measure(edit, repeat)
+
+    # Statistiques complètes d'une variable (une passe par blocs)
+    results['compute_statistics'] = measure(
+        lambda: panel.compute_statistics(path, 'concentration'), repeat)
+
+    # Export de la variable 4-D en tableau long (CSV, bloc par bloc)
+    from netcdflab.utils import export
+    csv_path = os.path.join(work_dir, f'{size_name}_concentration.csv')
+    results['export_csv'] = measure(
+        lambda: export.export_variable(dataset['concentration'], csv_path), repeat)
+    results['export_csv']['file_bytes'] = os.path.getsize(csv_path)
+
+    # Conversion en store Zarr puis série au point lue depuis le store (zarr optionnel)
+    from netcdflab.utils import zarr_io, netcdf_io
+    if zarr_io.zarr_available():
+        store = os.path.join(work_dir, f'{size_name}.zarr')
+        results['zarr_write'] = measure(lambda: zarr_io.write_zarr(dataset, store), repeat)
+        results['zarr_write']['file_bytes'] = zarr_io.store_size(store)
+        viz.update_dataset(netcdf_io.open_dataset(store), store)
+        viz.var_selector.setCurrentText('concentration')
+        results['zarr_point_series'] = measure(lambda: viz.show_point_series(ny // 2, nx // 2),
+                                               repeat)
+
+    # Copie avec la variable 4-D compactée en int16, relue pour mesurer l'erreur
+    from netcdflab.utils import operations
+    packed_path = os.path.join(work_dir, f'{size_name}_packed.nc')
+
+    def save_packed():
+        encoding = {}
+        operations.pack(dataset, encoding, ['concentration'])
+        netcdf_io.write_dataset(dataset, packed_path, encoding=encoding, report={})
+
+    results['save_packed'] = measure(save_packed, repeat)
+    results['save_packed']['file_bytes'] = os.path.getsize(packed_path)
+    # Une sauvegarde ordinaire du fichier rechargé doit garder le compactage
+    netcdf_io.write_dataset(netcdf_io.load_dataset(packed_path), packed_path)
+    import netCDF4
+    with netCDF4.Dataset(packed_path) as nc:
+        resaved = str(nc.variables['concentration'].dtype)
+    if resaved != 'int16':
+        raise RuntimeError(f"Compactage perdu à la sauvegarde suivante : {resaved}")
+
+    # Sauvegarde sur place et sous un autre nom
+    results['save_file'] = measure(lambda: panel.save_file(path, show_success_message=False),
+                                   repeat)
+    save_as_path = os.path.join(work_dir, f'{size_name}_copy.nc')
+    original_dialog = QFileDialog.getSaveFileName
+    QFileDialog.getSaveFileName = staticmethod(lambda *args, **kwargs: (save_as_path, ''))
+    try:
+        results['save_file_as'] = measure(lambda: panel.save_file_as(path), repeat)
+    finally:
+        QFileDialog.getSaveFileName = original_dialog
+
+    # Différences entre le fichier et sa copie (empreintes des chunks)
+    from netcdflab.utils import diff
+    results['file_diff'] = measure(lambda: diff.diff_files(path, save_as_path), repeat)
+
+    # Validation CF et passe sur les données
+    from netcdflab.utils import validation
+    results['validate_file'] = measure(lambda: validation.validate_file(path), repeat)
+
+    # Ajout d'enregistrements à un fichier ouvert (dimension time illimitée)
+    from netcdflab.utils.create_test_netcdf import create_test_netcdf
+    records_path = os.path.join(work_dir, f'{size_name}_records.nc')
+    source_path = os.path.join(work_dir, f'{size_name}_source.nc')
+    create_test_netcdf(records_path, nx=nx, ny=ny, nb_temps=nb_temps, unlimited_time=True, seed=0)
+    create_test_netcdf(source_path, nx=nx, ny=ny, nb_temps=1, unlimited_time=True, seed=1)
+    panel.load_netcdf(records_path)
+    panel.finish_loading(records_path)
+    # Lecture différée : le fichier reste ouvert par xarray pendant l'ajout
+    panel.open_files[records_path]['concentration'].values
+    original_dialog = QFileDialog.getOpenFileName
+    QFileDialog.getOpenFileName = staticmethod(lambda *args, **kwargs: (source_path, ''))
+    try:
+        results['append_records'] = measure(lambda: panel.append_records(records_path), repeat)
+    finally:
+        QFileDialog.getOpenFileName = original_dialog
+    records = panel.open_files[records_path].sizes['time']
+    if records != nb_temps + repeat:
+        raise RuntimeError(f"Ajout d'enregistrements incomplet : {records} pas de temps")
+
+    panel.close_all_files()
+    return results
+
+
+def git_revision():
+    """Commit courant (si le dépôt est disponible)"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat, output, keep_files=False):
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    _silence_dialogs()
+
+    report = {
+        'commit': git_revision(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+    work_dir = tempfile.mkdtemp(prefix='netcdflab_bench_')
+    try:
+        for size_name in sizes:
+            print(f"== {size_name} {SIZES[size_name]}", flush=True)
+            report['results'][size_name] = run_size(size_name, work_dir, repeat)
+            for name, result in report['results'][size_name].items():
+                line = f"  {name:<20} {result['seconds'] * 1000:10.2f} ms"
+                if result.get('peak_rss_bytes'):
+                    line += f"  RSS {result['peak_rss_bytes'] / 2**20:8.1f} Mo"
+                print(line, flush=True)
+    finally:
+        if keep_files:
+            print(f"Fichiers conservés dans {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats enregistrés dans {output}")
+    return report
+
+
+def compare(before_path, after_path, threshold):
+    """Comparer deux rapports ; retourne le nombre de régressions"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    regressions = 0
+    for size_name, results in after['results'].items():
+        for name, result in results.items():
+            old = before['results'].get(size_name, {}).get(name)
+            if not old or name == 'generate' or not old['seconds']:
+                continue
+            ratio = result['seconds'] / old['seconds']
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  <-- RÉGRESSION'
+                regressions += 1
+            print(f"{size_name:<8} {name:<20} {old['seconds'] * 1000:10.1f} ms -> "
+                  f"{result['seconds'] * 1000:10.1f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance de NetCDF Lab")
+    parser.add_argument('--sizes', nargs='+', choices=sorted(SIZES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=3, help="Répétitions par mesure (le minimum est retenu)")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--keep-files', action='store_true')
+    parser.add_argument('--compare', nargs=2, metavar=('AVANT', 'APRES'),
+                        help="Comparer deux rapports au lieu de lancer les mesures")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Ralentissement toléré lors de la comparaison (0.2 = 20 %%)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+
+    run(args.sizes, args.repeat, args.output, args.keep_files)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,38 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTreeWidget, 
                            QTreeWidgetItem, QPushButton, QMenu,
                            QInputDialog, QMessageBox, QFileDialog,
-                           QScrollArea, QSizePolicy)
-from PyQt6.QtCore import Qt, pyqtSignal
+                           QScrollArea, QSizePolicy, QApplication, QStyle)
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QFileSystemWatcher
 from PyQt6.QtGui import QIcon, QPixmap, QPainter, QColor
 
-import xarray as xr
 import numpy as np
-import pandas as pd
 from datetime import datetime
 import re
-import cftime
 import sys
 import os
-import tempfile
-import shutil
 
 from ..utils.translations import Translator
+from ..utils import netcdf_io
+from ..utils import operations
+from ..utils import tracing
+from ..utils import memory
+from ..utils.journal import OperationJournal
+from ..utils.metadata_cache import CachedDataset, describe
+from ..utils.thumbnails import preview_variables
+from ..utils import aggregate
+from ..utils import tail
+from ..utils import reload
+from ..utils import chunks
+from ..utils import chunk_reader
+from ..utils import compare
+from ..utils import statistics
+from ..utils import diff
+from ..utils import validation
+from ..utils import export
+from ..utils import zarr_io
+from ..utils import packing
+from ..utils.metadata_cache import file_key
+from .diff_window import DiffWindow
 
 class EditableTreeWidget(QTreeWidget):
     def __init__(self):
@@ -33,10 +49,26 @@ class EditableTreeWidget(QTreeWidget):
 
 
 class DataPanel(QWidget):
+    # Rôle des données de l'arbre contenant le texte des statistiques d'une variable
+    STATS_ROLE = Qt.ItemDataRole.UserRole + 1
+    # Rôle marquant l'item des statistiques complètes d'une variable
+    FULL_STATS_ROLE = Qt.ItemDataRole.UserRole + 2
+    # Rôle marquant les items ajoutés par la validation d'un fichier
+    VALIDATION_ROLE = Qt.ItemDataRole.UserRole + 3
+    # Niveaux de l'histogramme affiché dans l'arbre
+    HISTOGRAM_BLOCKS = " ▁▂▃▄▅▆▇█"
+    # Intervalle de vérification des fichiers suivis en mode direct (ms)
+    FOLLOW_INTERVAL = 1000
+    # Délai avant de traiter une modification externe (écriture en plusieurs fois) (ms)
+    CHANGE_DELAY = 500
+    
     dataset_loaded = pyqtSignal(object, str)  # dataset, filename
     file_loaded = pyqtSignal(str) #filename
     dataset_modified = pyqtSignal(str)  # filename
+    file_closed = pyqtSignal(str)  # filename
+    dataset_extended = pyqtSignal(str, str, int)  # filename, dimension, ancienne longueur
     visualization_requested = pyqtSignal(str, str, str, int)  # filename, var_name, dim_name, index
+    comparison_requested = pyqtSignal(str, str, str, object)  # fichier A, fichier B, variable, {dimension: indice}
     
     def __init__(self):
         super().__init__()
@@ -56,6 +88,26 @@ class DataPanel(QWidget):
         self.open_files = {}  # filename: dataset
         self.is_modified = {}  # filename: bool
         self.date_formats = {}  # (filename, var_name, index): format
+        self.journal = OperationJournal()  # Modifications rejouables (export macro)
+        self.memory = memory.manager  # Budget mémoire des fichiers ouverts
+        self.metadata_cache = None  # MetadataCache, défini par la fenêtre principale
+        self.pending_files = set()  # Fichiers affichés depuis le cache, pas encore ouverts
+        self.thumbnails = None  # ThumbnailGenerator, défini par la fenêtre principale
+        self.aggregates = {}  # nom affiché: (fichiers, dimension) des agrégats ouverts
+        self.diff_windows = []  # Fenêtres de comparaison de fichiers ouvertes
+        
+        # Mode direct : fichiers suivis pendant leur écriture
+        self.followed = {}  # filename: (dimension illimitée, (taille, date de modification))
+        self.follow_timer = QTimer(self)
+        self.follow_timer.timeout.connect(self.check_followed_files)
+        
+        # Détection des modifications faites par d'autres programmes
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._file_changed)
+        self.known_keys = {}  # filename: (taille, date) de la version chargée ou sauvegardée
+        self.value_digests = {}  # filename: {variable: empreinte des valeurs affichées}
+        self.conflicts = set()  # Fichiers modifiés à la fois localement et sur disque
+        self._changed_files = set()
         self._is_updating_tree = False
 
         # Activer le glisser-déposer
@@ -64,6 +116,7 @@ class DataPanel(QWidget):
         # Créer les icônes pour les états modifié/non-modifié
         self.modified_icon = self._create_dot_icon(QColor(74, 144, 226))  # Bleu
         self.unmodified_icon = self._create_dot_icon(QColor(255, 255, 255, 0))  # Transparent
+        self.conflict_icon = self._create_dot_icon(QColor(220, 50, 47))  # Rouge
 
         # Ajouter un flag pour éviter la récursion
         self._is_updating_icon = False
@@ -84,29 +137,45 @@ class DataPanel(QWidget):
 
     def load_netcdf(self, filename):
         """Charger un nouveau fichier NetCDF"""
-        if filename in self.open_files:
+        if filename in self.open_files or filename in self.pending_files:
             QMessageBox.warning(
                 self, 
                 self.translator.get_text("warning"),  # "Attention"
                 self.translator.get_text("file_already_open", filename)
             )
             return
+        
+        # Métadonnées en cache : afficher l'arbre tout de suite et ouvrir le
+        # fichier au prochain tour de la boucle d'événements
+        metadata = None
+        if self.metadata_cache and not netcdf_io.is_zarr(filename):
+            metadata = self.metadata_cache.get(filename)
+        if metadata is not None:
+            self.add_file_to_tree(filename, CachedDataset(metadata))
+            self.pending_files.add(filename)
+            QTimer.singleShot(0, lambda: self.finish_loading(filename))
+            return
             
         try:
-            # Ouvrir le dataset
-            original_dataset = xr.open_dataset(filename)
-            # Faire une copie et fermer l'original
-            dataset = original_dataset.copy(deep=True)
-            original_dataset.close()
+            # Ouvrir le dataset (xarray n'est importé qu'au premier chargement)
+            dataset = netcdf_io.load_dataset(filename)
                           
             self.open_files[filename] = dataset
             self.is_modified[filename] = False
+            self.memory.touch(filename)
             
             # Ajouter au même arbre
-            self.add_file_to_tree(filename, dataset)
+            if self.metadata_cache:
+                metadata = describe(dataset)
+                self.metadata_cache.put(filename, metadata)
+                self.add_file_to_tree(filename, CachedDataset(metadata))
+            else:
+                self.add_file_to_tree(filename, dataset)
             
             self.dataset_loaded.emit(dataset, filename)
             self.file_loaded.emit(filename)
+            self.request_thumbnails(filename, dataset)
+            self.watch_file(filename)
             
         except Exception as e:
             QMessageBox.critical(
@@ -115,6 +184,450 @@ class DataPanel(QWidget):
                 self.translator.get_text("error_loading_file", str(e))
             )
 
+    def load_aggregate(self, files, dim):
+        """Ouvrir plusieurs fichiers comme un seul dataset différé le long de ``dim``"""
+        name = aggregate.aggregate_name(files, dim)
+        if name in self.open_files:
+            QMessageBox.warning(
+                self,
+                self.translator.get_text("warning"),
+                self.translator.get_text("file_already_open", name)
+            )
+            return
+        
+        try:
+            with tracing.span("aggregate", files=len(files), dim=dim):
+                dataset = aggregate.open_aggregate(files, dim)
+        except Exception as e:
+            QMessageBox.critical(
+                self,
+                self.translator.get_text("error"),
+                self.translator.get_text("error_loading_file", str(e))
+            )
+            return
+        
+        self.open_files[name] = dataset
+        self.is_modified[name] = False
+        self.aggregates[name] = (list(files), dim)
+        self.memory.touch(name)
+        self.add_file_to_tree(name, dataset)
+        self.dataset_loaded.emit(dataset, name)
+
+    def finish_loading(self, filename=None):
+        """Ouvrir les fichiers dont l'arbre a été affiché depuis le cache"""
+        filenames = [filename] if filename else list(self.pending_files)
+        for filename in filenames:
+            if filename not in self.pending_files:
+                continue
+            self.pending_files.discard(filename)
+            try:
+                dataset = netcdf_io.load_dataset(filename)
+            except Exception as e:
+                self.remove_file_from_tree(filename)
+                QMessageBox.critical(
+                    self,
+                    self.translator.get_text("error"),
+                    self.translator.get_text("error_loading_file", str(e))
+                )
+                continue
+            
+            self.open_files[filename] = dataset
+            self.is_modified[filename] = False
+            self.memory.touch(filename)
+            
+            self.dataset_loaded.emit(dataset, filename)
+            self.file_loaded.emit(filename)
+            self.request_thumbnails(filename, dataset)
+            self.watch_file(filename)
+
+    def request_thumbnails(self, filename, dataset):
+        """Lancer la génération des vignettes des variables 2-D"""
+        if self.thumbnails:
+            self.thumbnails.request(filename, preview_variables(dataset))
+
+    def set_variable_preview(self, item, thumbnail=None):
+        """Info-bulle d'une variable : vignette et statistiques"""
+        stats = item.data(0, self.STATS_ROLE) or ""
+        if thumbnail:
+            item.setIcon(0, QIcon(thumbnail))
+            item.setToolTip(0, f'<img src="{thumbnail}"><br>{stats}')
+        elif stats:
+            item.setToolTip(0, stats)
+
+    def find_variable_item(self, filename, var_name):
+        """Item d'une variable dans l'arbre (None si absent)"""
+        root = self.tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            if root.child(i).data(0, Qt.ItemDataRole.UserRole) != filename:
+                continue
+            variables_item = self.find_variables_item(root.child(i))
+            if variables_item is None:
+                return None
+            for j in range(variables_item.childCount()):
+                item = variables_item.child(j)
+                if item.data(0, Qt.ItemDataRole.UserRole) == var_name:
+                    return item
+        return None
+
+    def set_thumbnail(self, filename, var_name, thumbnail):
+        """Afficher une vignette générée dans l'arbre"""
+        item = self.find_variable_item(filename, var_name)
+        if item is not None:
+            self._is_updating_icon = True
+            try:
+                self.set_variable_preview(item, thumbnail)
+            finally:
+                self._is_updating_icon = False
+
+    def set_following(self, filename, enabled):
+        """Activer/désactiver le mode direct (suivi des ajouts) pour un fichier"""
+        if not enabled:
+            self.followed.pop(filename, None)
+            if not self.followed:
+                self.follow_timer.stop()
+            return
+        try:
+            dim, _ = tail.unlimited_dimension(filename)
+            key = file_key(filename)
+        except Exception as e:
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("error_loading_file", str(e)))
+            return
+        if dim is None or dim not in self.open_files[filename].dims:
+            QMessageBox.warning(self, self.translator.get_text("warning"),
+                                self.translator.get_text("no_unlimited_dimension", filename))
+            return
+        self.followed[filename] = (dim, key)
+        if not self.follow_timer.isActive():
+            self.follow_timer.start(self.FOLLOW_INTERVAL)
+        # Rattraper les ajouts faits depuis l'ouverture
+        self.extend_file(filename, dim)
+
+    def check_followed_files(self):
+        """Étendre les fichiers suivis dont la taille ou la date de modification a changé"""
+        for filename, (dim, key) in list(self.followed.items()):
+            try:
+                new_key = file_key(filename)
+            except OSError:
+                continue
+            if new_key == key:
+                continue
+            self.followed[filename] = (dim, new_key)
+            self.extend_file(filename, dim)
+
+    def extend_file(self, filename, dim):
+        """Lire les nouveaux enregistrements d'un fichier suivi et compléter l'arbre"""
+        if self.memory.changed.get(filename, set()) is memory.ALL_VARIABLES:
+            # Indices supprimés localement : les enregistrements ne correspondent plus
+            return
+        try:
+            with tracing.span("tail", file=filename, dim=dim):
+                dataset, start = tail.extend_dataset(self.open_files[filename], filename, dim)
+        except Exception as e:
+            # Fichier en cours d'écriture : nouvel essai à la prochaine vérification
+            print(f"Mode direct : lecture de {filename} impossible ({e})")
+            return
+        if dataset.sizes[dim] == start:
+            return
+        self.open_files[filename] = dataset
+        self.extend_tree(filename, dataset, dim, start)
+        self.dataset_extended.emit(filename, dim, start)
+
+    def append_records(self, filename):
+        """Ajouter à la fin du fichier les enregistrements d'un autre fichier (sans réécriture)"""
+        if self.is_modified.get(filename):
+            # Le dataset modifié ne suivrait pas les enregistrements ajoutés sur disque
+            QMessageBox.warning(self, self.translator.get_text("warning"),
+                                self.translator.get_text("append_save_first", filename))
+            return
+        source, _ = QFileDialog.getOpenFileName(
+            self,
+            self.translator.get_text("append_records"),
+            os.path.dirname(filename),
+            "Fichiers NetCDF (*.nc);;Tous les fichiers (*.*)"
+        )
+        if not source:
+            return
+        try:
+            if self.thumbnails:
+                self.thumbnails.cancel(filename)
+            # Les lectures différées du dataset rouvriront le fichier complété
+            self.open_files[filename].close()
+            dim, _, count = netcdf_io.append_records(filename, source)
+        except Exception as e:
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("append_error", str(e)))
+            return
+        # Notre propre écriture : ni rechargement ni conflit
+        self.watch_file(filename)
+        if filename in self.followed:
+            self.followed[filename] = (dim, self.known_keys[filename])
+        if count and dim in self.open_files[filename].dims:
+            self.extend_file(filename, dim)
+        else:
+            self.reload_file(filename)
+
+    def rechunk_variable(self, filename, var_name):
+        """Réécrire le fichier avec un nouveau découpage (chunks) pour une variable"""
+        if self.is_modified.get(filename):
+            QMessageBox.warning(self, self.translator.get_text("warning"),
+                                self.translator.get_text("append_save_first", filename))
+            return
+        var = self.open_files[filename][var_name]
+        current = chunks.layout(self.open_files[filename])[var_name]['chunks'] or var.shape
+        text, ok = QInputDialog.getText(
+            self,
+            self.translator.get_text("rechunk"),
+            self.translator.get_text("rechunk_prompt", ", ".join(var.dims)),
+            text=", ".join(str(c) for c in current)
+        )
+        if not ok:
+            return
+        try:
+            new_chunks = chunks.parse_chunks(text, var.shape)
+            if self.thumbnails:
+                self.thumbnails.cancel(filename)
+            # Les lectures différées du dataset pointent vers le fichier remplacé
+            self.open_files[filename].close()
+            chunks.rechunk_variable(filename, var_name, new_chunks)
+        except Exception as e:
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("rechunk_error", str(e)))
+            return
+        self.watch_file(filename)
+        self.reload_file(filename, rebuild=True)
+
+    def diff_with_file(self, filename):
+        """Comparer le fichier (version sur disque) avec un autre fichier ou un manifeste"""
+        other, _ = QFileDialog.getOpenFileName(
+            self,
+            self.translator.get_text("diff_with"),
+            os.path.dirname(filename),
+            "Fichiers NetCDF (*.nc);;Manifestes (*.json);;Tous les fichiers (*.*)"
+        )
+        if not other:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            result = diff.diff_files(filename, other)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("diff_error", str(e)))
+            return
+        QApplication.restoreOverrideCursor()
+        window = DiffWindow(result, filename, other, self)
+        window.region_selected.connect(self.show_diff_region)
+        window.destroyed.connect(lambda: self.diff_windows.remove(window))
+        window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.diff_windows.append(window)
+        window.show()
+
+    def show_diff_region(self, file_a, file_b, var_path, starts):
+        """Afficher la différence des deux fichiers sur une région modifiée"""
+        var_name = var_path.lstrip('/')
+        for filename in (file_a, file_b):
+            if filename.endswith('.json') or not os.path.exists(filename):
+                return
+            if filename not in self.open_files:
+                if filename not in self.pending_files:
+                    self.load_netcdf(filename)
+                self.finish_loading(filename)
+        if file_a in self.open_files and file_b in self.open_files:
+            self.comparison_requested.emit(file_a, file_b, var_name, starts)
+
+    def extend_tree(self, filename, dataset, dim, start):
+        """Mettre à jour les dimensions et ajouter les nouvelles valeurs des variables 1-D"""
+        root = self.tree.invisibleRootItem()
+        root_item = None
+        for i in range(root.childCount()):
+            if root.child(i).data(0, Qt.ItemDataRole.UserRole) == filename:
+                root_item = root.child(i)
+                break
+        if root_item is None:
+            return
+        
+        self._is_updating_tree = True
+        try:
+            dims_info = ", ".join(f"{k}: {v}" for k, v in dataset.sizes.items())
+            root_item.child(0).setText(0, f"{self.translator.get_text('dimensions')}: {dims_info}")
+            
+            variables_item = self.find_variables_item(root_item)
+            for j in range(variables_item.childCount() if variables_item else 0):
+                var_child = variables_item.child(j)
+                var_name = var_child.data(0, Qt.ItemDataRole.UserRole)
+                var = dataset.variables.get(var_name)
+                if var is None or var.dims != (dim,):
+                    continue
+                for k in range(var_child.childCount()):
+                    values_child = var_child.child(k)
+                    if values_child.text(0) in ("Valeurs", self.translator.get_text("values")):
+                        self.add_value_items(values_child, filename, var_name,
+                                             var.values[start:], var.dtype, start)
+                        self.value_digests.setdefault(filename, {})[var_name] = \
+                            reload.digest(var.values)
+                        break
+        finally:
+            self._is_updating_tree = False
+
+    def watch_file(self, filename):
+        """Surveiller les modifications du fichier par d'autres programmes"""
+        if netcdf_io.is_zarr(filename):
+            return
+        try:
+            self.known_keys[filename] = file_key(filename)
+        except OSError:
+            return
+        # Le fichier est remplacé lors des sauvegardes : le surveiller de nouveau
+        if filename not in self.watcher.files():
+            self.watcher.addPath(filename)
+
+    def _file_changed(self, filename):
+        """Regrouper les notifications reçues pendant l'écriture du fichier"""
+        if not self._changed_files:
+            QTimer.singleShot(self.CHANGE_DELAY, self.check_external_changes)
+        self._changed_files.add(filename)
+
+    def check_external_changes(self):
+        """Traiter les fichiers modifiés sur disque par un autre programme"""
+        filenames, self._changed_files = self._changed_files, set()
+        for filename in filenames:
+            if filename not in self.open_files or filename in self.followed:
+                continue
+            try:
+                key = file_key(filename)
+            except OSError:
+                # Fichier supprimé ou en cours de remplacement
+                continue
+            # Le fichier a pu être remplacé (nouvel inode) : le surveiller de nouveau
+            if filename not in self.watcher.files():
+                self.watcher.addPath(filename)
+            if key == self.known_keys.get(filename):
+                continue
+            self.known_keys[filename] = key
+            
+            if self.is_modified.get(filename):
+                self.flag_conflict(filename)
+            else:
+                self.reload_file(filename)
+
+    def flag_conflict(self, filename):
+        """Le fichier a changé sur disque alors qu'il a des modifications non sauvegardées"""
+        self.conflicts.add(filename)
+        self.mark_modified(filename, modified=True, emit_signal=False)
+        reply = QMessageBox.question(
+            self,
+            self.translator.get_text("external_change"),
+            self.translator.get_text("external_change_conflict", filename),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            # Abandonner les modifications locales
+            self.journal.clear(filename)
+            self.reload_file(filename)
+
+    def reload_file(self, filename, rebuild=False):
+        """Rouvrir un fichier modifié sur disque ; l'arbre n'est reconstruit que si l'en-tête a changé ou si ``rebuild``"""
+        if self.thumbnails:
+            self.thumbnails.cancel(filename)
+        try:
+            with tracing.span("reload", file=filename):
+                dataset, diff = reload.reload_dataset(self.open_files[filename], filename,
+                                                      self.value_digests.get(filename))
+        except Exception as e:
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("error_loading_file", str(e)))
+            return
+        
+        self.open_files[filename] = dataset
+        self.conflicts.discard(filename)
+        self.memory.mark_clean(filename)
+        if rebuild or reload.structure_changed(diff):
+            self.remove_file_from_tree(filename)
+            self.add_file_to_tree(filename, dataset)
+        else:
+            self.update_tree(filename, dataset, diff)
+        self.mark_modified(filename, modified=False, emit_signal=True)
+        self.request_thumbnails(filename, dataset)
+
+    def update_tree(self, filename, dataset, diff):
+        """Mettre à jour dans l'arbre les seuls attributs et valeurs qui ont changé (voir ``reload``)"""
+        root = self.tree.invisibleRootItem()
+        root_item = next((root.child(i) for i in range(root.childCount())
+                          if root.child(i).data(0, Qt.ItemDataRole.UserRole) == filename), None)
+        if root_item is None:
+            return
+        self._is_updating_tree = True
+        try:
+            if diff['attrs']:
+                for i in range(root_item.childCount()):
+                    attrs_item = root_item.child(i)
+                    if attrs_item.text(0) == self.translator.get_text("global_attributes"):
+                        attrs_item.takeChildren()
+                        self.add_attribute_items(attrs_item, dataset.attrs)
+                        break
+            for var_name in set(diff['attrs_changed']) | set(diff['data_changed']) | set(diff['unchecked']):
+                var_child = self.find_variable_item(filename, var_name)
+                if var_child is None:
+                    continue
+                var = dataset.variables[var_name]
+                for i in reversed(range(var_child.childCount())):
+                    child = var_child.child(i)
+                    if var_name in diff['attrs_changed'] and child.text(0) == "Attributs":
+                        child.takeChildren()
+                        self.add_attribute_items(child, var.attrs)
+                    elif var_name in diff['data_changed'] and child.text(0) == "Valeurs":
+                        child.takeChildren()
+                        values = np.atleast_1d(var.values)
+                        self.add_value_items(child, filename, var_name, values, var.dtype)
+                        self.value_digests.setdefault(filename, {})[var_name] = reload.digest(values)
+                    elif var_name in diff['unchecked'] and child.data(0, self.FULL_STATS_ROLE):
+                        # Valeurs relues à la demande : statistiques peut-être périmées
+                        var_child.takeChild(i)
+        finally:
+            self._is_updating_tree = False
+
+    def add_attribute_items(self, parent, attrs):
+        """Ajouter un item modifiable par attribut sous ``parent``"""
+        for attr_name, attr_value in attrs.items():
+            attr_item = QTreeWidgetItem(parent)
+            attr_item.setText(0, f"{attr_name}: {self.format_value(attr_value)}")
+            attr_item.setFlags(attr_item.flags() | Qt.ItemFlag.ItemIsEditable)
+
+    def remove_file_from_tree(self, filename):
+        """Retirer l'item racine d'un fichier de l'arbre"""
+        root = self.tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            item = root.child(i)
+            if item.data(0, Qt.ItemDataRole.UserRole) == filename:
+                root.removeChild(item)
+                break
+
+    def apply_operation(self, filename, operation):
+        """Appliquer une opération d'édition au dataset et l'enregistrer dans le journal"""
+        dataset = operations.apply_operation(self.open_files[filename], operation, {})
+        self.open_files[filename] = dataset
+        self.journal.record(filename, operation)
+        self.memory.mark_changed(filename, operation)
+        return dataset
+
+    def export_macro(self, file_name):
+        """Exporter le journal des modifications (script Python ou pipeline JSON)"""
+        if not len(self.journal):
+            QMessageBox.information(self, self.translator.get_text("export_macro"),
+                                    self.translator.get_text("no_recorded_operations"))
+            return False
+        try:
+            if file_name.lower().endswith('.json'):
+                self.journal.export_json(file_name)
+            else:
+                self.journal.export_script(file_name)
+            return True
+        except Exception as e:
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("export_error", str(e)))
+            return False
+
     def decode_bytes(self, value):
         """Décoder une valeur bytes en string"""
         if isinstance(value, bytes):
@@ -129,6 +642,7 @@ class DataPanel(QWidget):
             if isinstance(value[0], bytes):
                 return [v.decode('utf-8') for v in value]
         elif isinstance(value, np.datetime64):
+            import pandas as pd
             dt = pd.Timestamp(value).to_pydatetime()
             return dt.strftime('%Y-%m-%d %H:%M:%S')
         return str(value).strip()
@@ -178,77 +692,379 @@ class DataPanel(QWidget):
 
     def add_file_to_tree(self, filename, dataset):
         """Ajouter un fichier à l'arbre"""
-        self._is_updating_tree = True
+        with tracing.span("tree_build", file=filename, variables=len(dataset.variables)):
+            self._is_updating_tree = True
         
-        # Créer l'item racine pour ce fichier
-        root_item = QTreeWidgetItem(self.tree)
-        base_name = os.path.basename(filename)
-        root_item.setText(0, base_name)
-        root_item.setFlags(root_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        root_item.setData(0, Qt.ItemDataRole.UserRole, filename)
-        
-        # Informations sur le fichier
-        info_item = QTreeWidgetItem(root_item)
-        dims_info = ", ".join([f"{k}: {v}" for k, v in dataset.dims.items()])
-        info_item.setText(0, f"{self.translator.get_text('dimensions')}: {dims_info}")
-        info_item.setFlags(info_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        
-        # Variables
-        vars_item = QTreeWidgetItem(root_item)
-        vars_item.setText(0, self.translator.get_text("variables"))
-        vars_item.setFlags(vars_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        
-        for var_name, var in dataset.variables.items():
-            var_child = QTreeWidgetItem(vars_item)
-            var_child.setText(0, var_name)
-            var_child.setFlags(var_child.flags() | Qt.ItemFlag.ItemIsEditable)
-            # Stocker le nom original de la variable
-            var_child.setData(0, Qt.ItemDataRole.UserRole, var_name)
+            # Créer l'item racine pour ce fichier
+            root_item = QTreeWidgetItem(self.tree)
+            base_name = os.path.basename(filename)
+            root_item.setText(0, base_name)
+            root_item.setFlags(root_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            root_item.setData(0, Qt.ItemDataRole.UserRole, filename)
+        
+            # Informations sur le fichier
+            info_item = QTreeWidgetItem(root_item)
+            dims_info = ", ".join([f"{k}: {v}" for k, v in dataset.dims.items()])
+            info_item.setText(0, f"{self.translator.get_text('dimensions')}: {dims_info}")
+            info_item.setFlags(info_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+        
+            # Variables
+            vars_item = QTreeWidgetItem(root_item)
+            vars_item.setText(0, self.translator.get_text("variables"))
+            vars_item.setFlags(vars_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+        
+            thumbnail_identity = self.thumbnails.cache.identity(filename) if self.thumbnails else None
+            storage = chunks.layout(dataset, filename)
+            saved_statistics = self.metadata_cache.get_statistics(filename) if self.metadata_cache else {}
+            digests = self.value_digests[filename] = {}
+            for var_name, var in dataset.variables.items():
+                var_child = QTreeWidgetItem(vars_item)
+                var_child.setText(0, var_name)
+                var_child.setFlags(var_child.flags() | Qt.ItemFlag.ItemIsEditable)
+                # Stocker le nom original de la variable
+                var_child.setData(0, Qt.ItemDataRole.UserRole, var_name)
+                
+                # Statistiques (métadonnées du cache) et vignette déjà calculée
+                stats = getattr(var, 'stats', None)
+                if stats:
+                    var_child.setData(0, self.STATS_ROLE, ", ".join(
+                        f"{key}: {value:.6g}" if isinstance(value, float) else f"{key}: {value}"
+                        for key, value in stats.items()))
+                thumbnail = None
+                if thumbnail_identity and len(var.dims) >= 2:
+                    thumbnail = self.thumbnails.cache.get(thumbnail_identity, var_name)
+                self.set_variable_preview(var_child, thumbnail)
             
-            # Info sur la variable
-            info_child = QTreeWidgetItem(var_child)
-            info_text = f"Dims: {var.dims}, Type: {var.dtype}"
-            info_child.setText(0, info_text)
-            info_child.setFlags(info_child.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                # Info sur la variable
+                info_child = QTreeWidgetItem(var_child)
+                info_text = f"Dims: {var.dims}, Type: {var.dtype}"
+                info_child.setText(0, info_text)
+                info_child.setFlags(info_child.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                if var.dims:
+                    self.add_storage_items(info_child, storage[var_name])
+                if var_name in saved_statistics:
+                    self.add_statistics_items(var_child, saved_statistics[var_name])
             
-            # Valeurs de la variable
-            if var.size < 100 or var_name in dataset.dims:
-                values_child = QTreeWidgetItem(var_child)
-                values_child.setText(0, "Valeurs")
-                values_child.setFlags(values_child.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                # Valeurs de la variable
+                if reload.displayed(dataset, var_name):
+                    values_child = QTreeWidgetItem(var_child)
+                    values_child.setText(0, "Valeurs")
+                    values_child.setFlags(values_child.flags() & ~Qt.ItemFlag.ItemIsEditable)
                 
-                for i, val in enumerate(var.values):
-                    val_item = QTreeWidgetItem(values_child)
-                    formatted_val = self.format_value(val)
-                    val_item.setText(0, f"[{i}]: {formatted_val}")
-                    val_item.setFlags(val_item.flags() | Qt.ItemFlag.ItemIsEditable)
-                    if var.dtype.kind == 'M':
-                        fmt = self.detect_date_format(formatted_val)
-                        self.date_formats[(filename, var_name, i)] = fmt
-                    val_item.setData(0, Qt.ItemDataRole.UserRole, (i, var.dtype))
+                    # atleast_1d : les variables scalaires ont une seule valeur
+                    values = np.atleast_1d(var.values)
+                    self.add_value_items(values_child, filename, var_name, values, var.dtype)
+                    # Comparée au rechargement après une modification externe
+                    digests[var_name] = reload.digest(values)
             
-            # Attributs de la variable
-            attrs_child = QTreeWidgetItem(var_child)
-            attrs_child.setText(0, "Attributs")
-            attrs_child.setFlags(attrs_child.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            
-            for attr_name, attr_value in var.attrs.items():
-                attr_item = QTreeWidgetItem(attrs_child)
-                attr_item.setText(0, f"{attr_name}: {self.format_value(attr_value)}")
-                attr_item.setFlags(attr_item.flags() | Qt.ItemFlag.ItemIsEditable)
-        
-        # Attributs globaux
-        attrs_item = QTreeWidgetItem(root_item)
-        attrs_item.setText(0, self.translator.get_text("global_attributes"))
-        attrs_item.setFlags(attrs_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        
-        for attr_name, attr_value in dataset.attrs.items():
-            attr_child = QTreeWidgetItem(attrs_item)
-            attr_child.setText(0, f"{attr_name}: {self.format_value(attr_value)}")
-            attr_child.setFlags(attr_child.flags() | Qt.ItemFlag.ItemIsEditable)
-        
-        root_item.setExpanded(True)
-        self._is_updating_tree = False
+                # Attributs de la variable
+                attrs_child = QTreeWidgetItem(var_child)
+                attrs_child.setText(0, "Attributs")
+                attrs_child.setFlags(attrs_child.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                self.add_attribute_items(attrs_child, var.attrs)
+        
+            # Attributs globaux
+            attrs_item = QTreeWidgetItem(root_item)
+            attrs_item.setText(0, self.translator.get_text("global_attributes"))
+            attrs_item.setFlags(attrs_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            self.add_attribute_items(attrs_item, dataset.attrs)
+        
+            root_item.setExpanded(True)
+            self._is_updating_tree = False
+                        
+    def add_storage_items(self, info_child, storage):
+        """Détailler le stockage sur disque d'une variable sous son item d'information"""
+        if storage['chunks']:
+            layout_text = " × ".join(str(c) for c in storage['chunks'])
+        else:
+            layout_text = self.translator.get_text("storage_contiguous")
+        lines = [self.translator.get_text("storage_chunks", layout_text)]
+        if storage['filters']:
+            ratio = storage['ratio']
+            ratio_text = "?" if ratio is None else \
+                f"{'≈ ' if storage['estimated'] else ''}{ratio:.2f}"
+            lines.append(self.translator.get_text(
+                "storage_compression", ", ".join(storage['filters']), ratio_text))
+        reads = storage['reads']
+        if reads:
+            lines.append(self.translator.get_text(
+                "storage_reads", reads['map'], reads.get('series', "-")))
+        for line in lines:
+            item = QTreeWidgetItem(info_child)
+            item.setText(0, line)
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+
+    def add_statistics_items(self, var_child, stats):
+        """Afficher (ou remplacer) les statistiques complètes sous l'item d'une variable"""
+        for i in range(var_child.childCount()):
+            if var_child.child(i).data(0, self.FULL_STATS_ROLE):
+                var_child.takeChild(i)
+                break
+        stats_item = QTreeWidgetItem()
+        # Juste après l'item d'information
+        var_child.insertChild(min(1, var_child.childCount()), stats_item)
+        stats_item.setText(0, self.translator.get_text("statistics"))
+        stats_item.setData(0, self.FULL_STATS_ROLE, True)
+        stats_item.setFlags(stats_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+
+        def number(value):
+            return "-" if value is None else f"{value:.6g}"
+
+        lines = [self.translator.get_text("statistics_count", stats['count'], stats['missing'])]
+        for key in ('min', 'max', 'mean', 'std'):
+            lines.append(self.translator.get_text(f"statistics_{key}", number(stats[key])))
+        for line in lines:
+            item = QTreeWidgetItem(stats_item)
+            item.setText(0, line)
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+
+        counts = stats['histogram']['counts']
+        edges = stats['histogram']['edges']
+        if counts:
+            highest = max(counts)
+            levels = len(self.HISTOGRAM_BLOCKS) - 1
+            bars = "".join(
+                self.HISTOGRAM_BLOCKS[max(1, round(count / highest * levels)) if count else 0]
+                for count in counts)
+            item = QTreeWidgetItem(stats_item)
+            item.setText(0, self.translator.get_text(
+                "statistics_histogram", bars, number(edges[0]), number(edges[-1])))
+            item.setToolTip(0, "\n".join(f"[{number(low)}, {number(high)}[ : {count}"
+                                          for low, high, count in zip(edges, edges[1:], counts)))
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+
+    def compute_statistics(self, filename, var_name):
+        """Calculer les statistiques complètes d'une variable (une passe sur ses valeurs)"""
+        var = self.open_files[filename][var_name]
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            stats = statistics.compute(var)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("statistics_error", str(e)))
+            return
+        QApplication.restoreOverrideCursor()
+        # Conservées avec la date de modification du fichier, sauf si les
+        # valeurs en mémoire diffèrent du fichier
+        if (self.metadata_cache and self.has_netcdf_file(filename)
+                and not self.is_modified.get(filename)):
+            self.metadata_cache.put_statistics(filename, var_name, stats)
+        item = self.find_variable_item(filename, var_name)
+        if item is not None:
+            self._is_updating_tree = True
+            try:
+                self.add_statistics_items(item, stats)
+                item.setExpanded(True)
+            finally:
+                self._is_updating_tree = False
+
+    def export_table(self, filename, var_name):
+        """Exporter une variable (ou un sous-ensemble) en tableau long CSV ou Parquet"""
+        var = self.open_files[filename][var_name]
+        filters = "CSV (*.csv)"
+        if export.parquet_available():
+            filters += ";;Parquet (*.parquet)"
+        output, selected = QFileDialog.getSaveFileName(
+            self,
+            self.translator.get_text("export_table"),
+            os.path.join(os.path.dirname(filename), f"{var_name}.csv"),
+            filters
+        )
+        if not output:
+            return
+        if selected.startswith("Parquet") and not output.lower().endswith(('.parquet', '.pq')):
+            output += ".parquet"
+        text, ok = QInputDialog.getText(
+            self,
+            self.translator.get_text("export_table"),
+            self.translator.get_text("export_table_subset", ", ".join(
+                f"{dim}: {size}" for dim, size in zip(var.dims, var.shape)))
+        )
+        if not ok:
+            return
+        dropna = QMessageBox.question(
+            self,
+            self.translator.get_text("export_table"),
+            self.translator.get_text("export_table_dropna"),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        ) == QMessageBox.StandardButton.Yes
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            result = export.export_variable(var, output, subset=export.parse_subset(text, var.dims),
+                                            dropna=dropna)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("export_table_error", str(e)))
+            return
+        QApplication.restoreOverrideCursor()
+        QMessageBox.information(
+            self,
+            self.translator.get_text("export_table"),
+            self.translator.get_text("export_table_done", var_name, output, result['rows'],
+                                     result['bytes'] / 2**20, result['seconds'],
+                                     result['rows_per_second'] or 0, result['dropped'])
+        )
+
+    def has_netcdf_file(self, filename):
+        """Le dataset correspond-il à un fichier NetCDF (ni agrégat, ni store Zarr) ?"""
+        return filename not in self.aggregates and not netcdf_io.is_zarr(filename)
+
+    def export_zarr(self, filename):
+        """Convertir le dataset en store Zarr local (chunks écrits en parallèle)"""
+        if not zarr_io.zarr_available():
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("zarr_missing"))
+            return
+        dataset = self.open_files[filename]
+        base = os.path.splitext(os.path.basename(filename.rstrip(os.sep)))[0]
+        output, _ = QFileDialog.getSaveFileName(
+            self,
+            self.translator.get_text("export_zarr"),
+            os.path.join(os.path.dirname(filename.rstrip(os.sep)), f"{base}.zarr"),
+            "Store Zarr (*.zarr);;Tous les fichiers (*.*)"
+        )
+        if not output:
+            return
+        if not output.lower().endswith('.zarr'):
+            output += '.zarr'
+        if os.path.abspath(output) == os.path.abspath(filename):
+            QMessageBox.warning(self, self.translator.get_text("warning"),
+                                self.translator.get_text("export_zarr_same_store"))
+            return
+        text, ok = QInputDialog.getText(
+            self,
+            self.translator.get_text("export_zarr"),
+            self.translator.get_text("export_zarr_chunks", ", ".join(
+                f"{dim}: {size}" for dim, size in dataset.sizes.items()))
+        )
+        if not ok:
+            return
+        compressor, ok = QInputDialog.getItem(
+            self,
+            self.translator.get_text("export_zarr"),
+            self.translator.get_text("export_zarr_compressor"),
+            list(zarr_io.COMPRESSORS), 0, True
+        )
+        if not ok:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            result = zarr_io.write_zarr(dataset, output, zarr_io.parse_chunks(text), compressor)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("export_zarr_error", str(e)))
+            return
+        QApplication.restoreOverrideCursor()
+        QMessageBox.information(
+            self,
+            self.translator.get_text("export_zarr"),
+            self.translator.get_text("export_zarr_done", output, result['variables'],
+                                     result['chunks'], result['bytes'] / 2**20,
+                                     result['store_bytes'] / 2**20, result['seconds'],
+                                     (result['bytes_per_second'] or 0) / 2**20)
+        )
+
+    def validate_file(self, filename):
+        """Vérifier les conventions CF et les données du fichier sur disque"""
+        if self.is_modified.get(filename):
+            QMessageBox.warning(self, self.translator.get_text("warning"),
+                                self.translator.get_text("append_save_first", filename))
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            result = validation.validate_file(filename)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if result['status'] == 'failed':
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("validation_failed", result['error']))
+            return
+        self.show_validation(filename, result)
+        if not result['issues']:
+            QMessageBox.information(self, self.translator.get_text("validation"),
+                                    self.translator.get_text("validation_ok",
+                                                             os.path.basename(filename)))
+
+    def show_validation(self, filename, result):
+        """Marquer dans l'arbre les problèmes trouvés par ``validation.validate_file``"""
+        root_item = None
+        root = self.tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            if root.child(i).data(0, Qt.ItemDataRole.UserRole) == filename:
+                root_item = root.child(i)
+        if root_item is None:
+            return
+        colors = {validation.ERROR: QColor(220, 50, 47), validation.WARNING: QColor(203, 75, 22)}
+        icons = {validation.ERROR: self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxCritical),
+                 validation.WARNING: self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxWarning)}
+
+        def severity(issues):
+            return validation.ERROR if any(i['severity'] == validation.ERROR for i in issues) \
+                else validation.WARNING
+
+        def replace_node(parent, issues, index):
+            """Remplacer le nœud de validation de ``parent`` ; colorer ``parent``"""
+            for i in range(parent.childCount()):
+                if parent.child(i).data(0, self.VALIDATION_ROLE):
+                    parent.takeChild(i)
+                    break
+            parent.setData(0, Qt.ItemDataRole.ForegroundRole, None)
+            if not issues:
+                return
+            parent.setForeground(0, colors[severity(issues)])
+            node = QTreeWidgetItem()
+            parent.insertChild(min(index, parent.childCount()), node)
+            node.setText(0, self.translator.get_text("validation"))
+            node.setIcon(0, icons[severity(issues)])
+            node.setData(0, self.VALIDATION_ROLE, True)
+            node.setFlags(node.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            for problem in issues:
+                item = QTreeWidgetItem(node)
+                item.setText(0, problem['message'])
+                item.setIcon(0, icons[problem['severity']])
+                item.setToolTip(0, problem['code'])
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            node.setExpanded(True)
+
+        # Variables du groupe racine : sous leur item ; le reste sous le fichier
+        by_variable = {}
+        general = []
+        variables_item = self.find_variables_item(root_item)
+        for problem in result['issues']:
+            name = (problem['variable'] or '').lstrip('/')
+            if name and self.find_variable_item(filename, name) is not None:
+                by_variable.setdefault(name, []).append(problem)
+            elif name:
+                general.append(dict(problem, message=f"{problem['variable']} : {problem['message']}"))
+            else:
+                general.append(problem)
+
+        self._is_updating_tree = True
+        try:
+            if variables_item is not None:
+                for i in range(variables_item.childCount()):
+                    var_child = variables_item.child(i)
+                    replace_node(var_child, by_variable.get(var_child.data(0, Qt.ItemDataRole.UserRole), []), 1)
+            replace_node(root_item, general, 1)
+            if result['issues']:
+                root_item.setForeground(0, colors[severity(result['issues'])])
+        finally:
+            self._is_updating_tree = False
+
+    def add_value_items(self, values_child, filename, var_name, values, dtype, start=0):
+        """Ajouter les valeurs d'une variable (à partir de l'indice ``start``) sous l'item 'Valeurs'"""
+        for i, val in enumerate(values, start):
+            val_item = QTreeWidgetItem(values_child)
+            formatted_val = self.format_value(val)
+            val_item.setText(0, f"[{i}]: {formatted_val}")
+            val_item.setFlags(val_item.flags() | Qt.ItemFlag.ItemIsEditable)
+            if dtype.kind == 'M':
+                fmt = self.detect_date_format(formatted_val)
+                self.date_formats[(filename, var_name, i)] = fmt
+            val_item.setData(0, Qt.ItemDataRole.UserRole, (i, dtype))
                         
     def dragEnterEvent(self, event):
         """Gérer l'entrée d'un glisser-déposer"""
@@ -266,7 +1082,7 @@ class DataPanel(QWidget):
         urls = event.mimeData().urls()
         if urls:
             file_path = urls[0].toLocalFile()
-            if file_path.lower().endswith('.nc') or file_path.lower().endswith('.netcdf'):
+            if file_path.lower().endswith(('.nc', '.netcdf', '.zarr')):
                 self.load_netcdf(file_path)
                 event.accept()
             else:
@@ -345,8 +1161,26 @@ class DataPanel(QWidget):
                          lambda: self.save_file(filename))
             menu.addAction(self.translator.get_text("save_as"), 
                          lambda: self.save_file_as(filename))
+            if self.has_netcdf_file(filename):
+                menu.addAction(self.translator.get_text("save_packed"),
+                             lambda: self.save_packed(filename))
             menu.addAction(self.translator.get_text("close"), 
                          lambda: self.close_file(filename))
+            menu.addAction(self.translator.get_text("export_zarr"),
+                         lambda: self.export_zarr(filename))
+            if self.has_netcdf_file(filename):
+                menu.addSeparator()
+                follow_action = menu.addAction(self.translator.get_text("follow_file"))
+                follow_action.setCheckable(True)
+                follow_action.setChecked(filename in self.followed)
+                follow_action.triggered.connect(
+                    lambda checked: self.set_following(filename, checked))
+                menu.addAction(self.translator.get_text("append_records"),
+                             lambda: self.append_records(filename))
+                menu.addAction(self.translator.get_text("diff_with"),
+                             lambda: self.diff_with_file(filename))
+                menu.addAction(self.translator.get_text("validate_file"),
+                             lambda: self.validate_file(filename))
         
         elif "Variables" in path:
             if len(path) == 2:  # C'est une variable
@@ -355,6 +1189,15 @@ class DataPanel(QWidget):
                              lambda: self.tree.editItem(item, 0))
                 menu.addAction(self.translator.get_text("delete"), 
                              lambda: self.delete_variable(filename, var_name))
+                if self.has_netcdf_file(filename) and dataset[var_name].dims:
+                    menu.addAction(self.translator.get_text("rechunk"),
+                                 lambda: self.rechunk_variable(filename, var_name))
+                if statistics.can_compute(dataset[var_name]):
+                    menu.addAction(self.translator.get_text("compute_statistics"),
+                                 lambda: self.compute_statistics(filename, var_name))
+                if dataset[var_name].dims:
+                    menu.addAction(self.translator.get_text("export_table"),
+                                 lambda: self.export_table(filename, var_name))
                 #menu.addAction(self.translator.get_text("duplicate"), 
                 #             lambda: self.duplicate_variable(filename, var_name))
                 
@@ -417,13 +1260,9 @@ class DataPanel(QWidget):
                     old_name = item.data(0, Qt.ItemDataRole.UserRole)
                     
                     if old_name != new_name:
-                        # Vérifier que le nouveau nom n'existe pas déjà
-                        if new_name in dataset.variables:
-                            raise ValueError(f"Une variable nommée '{new_name}' existe déjà")
-                        
-                        # Renommer la variable directement
-                        dataset[new_name] = dataset[old_name]
-                        del dataset[old_name]
+                        # Renommer la variable (erreur si le nom existe déjà)
+                        self.apply_operation(filename, {'op': 'rename_variable',
+                                                        'old': old_name, 'new': new_name})
                         
                         # Mettre à jour les données utilisateur de l'item
                         item.setData(0, Qt.ItemDataRole.UserRole, new_name)
@@ -450,21 +1289,22 @@ class DataPanel(QWidget):
                         value = self.parse_value(value_str, dtype)
                         
                     # Mettre à jour la valeur
-                    var_data = dataset[var_name].values.copy()
-                    var_data[index] = value
-                    dataset[var_name].values = var_data
+                    self.apply_operation(filename, {'op': 'set_value', 'variable': var_name,
+                                                    'index': index, 'value': value})
                     
                 elif "Attributs" in path:
                     # Édition d'un attribut de variable
                     attr_str = item.text(0)
                     name, value = self.parse_attribute(attr_str)
-                    dataset[var_name].attrs[name] = value
+                    self.apply_operation(filename, {'op': 'set_attribute', 'variable': var_name,
+                                                    'name': name, 'value': value})
                     
             elif "Attributs globaux" in path:
                 # Édition d'un attribut global
                 attr_str = item.text(0)
                 name, value = self.parse_attribute(attr_str)
-                dataset.attrs[name] = value
+                self.apply_operation(filename, {'op': 'set_attribute',
+                                                'name': name, 'value': value})
                 
             self.mark_modified(filename)
             
@@ -504,7 +1344,7 @@ class DataPanel(QWidget):
                     return
                 
                 # Supprimer la variable
-                del dataset[var_name]
+                self.apply_operation(filename, {'op': 'delete_variable', 'name': var_name})
                 
                 # Mettre à jour l'arbre
                 root = self.tree.invisibleRootItem()
@@ -551,20 +1391,13 @@ class DataPanel(QWidget):
             )
             
             if reply == QMessageBox.StandardButton.Yes:
-                # Vérifier si on doit utiliser l'index ou la valeur
-                if isinstance(dataset[dim_name].values[0], (np.integer, int)):
-                    # Dimension indexée (comme pour les polluants)
-                    new_dataset = dataset.drop_sel({dim_name: index})
-                else:
-                    # Dimension non indexée (comme pour le temps)
-                    new_dataset = dataset.drop_sel({dim_name: value_to_delete})
+                # Supprimer la position le long de la dimension
+                new_dataset = self.apply_operation(filename, {'op': 'drop_index',
+                                                              'dim': dim_name, 'index': index})
                 
                 # Fermer l'ancien dataset
                 dataset.close()
                 
-                # Stocker le nouveau dataset
-                self.open_files[filename] = new_dataset
-                
                 # Mettre à jour l'arbre
                 root = self.tree.invisibleRootItem()
                 for i in range(root.childCount()):
@@ -631,7 +1464,10 @@ class DataPanel(QWidget):
             for i in range(root.childCount()):
                 item = root.child(i)
                 if item.data(0, Qt.ItemDataRole.UserRole) == filename:
-                    item.setIcon(0, self.modified_icon if modified else self.unmodified_icon)
+                    if filename in self.conflicts:
+                        item.setIcon(0, self.conflict_icon)
+                    else:
+                        item.setIcon(0, self.modified_icon if modified else self.unmodified_icon)
                     break
             
             if emit_signal:
@@ -639,109 +1475,54 @@ class DataPanel(QWidget):
         finally:
             self._is_updating_icon = False
 
-    def save_file(self, filename, show_success_message=True):
-        """Sauvegarder le fichier NetCDF"""
+    def save_file(self, filename, show_success_message=True, encoding=None, report=None):
+        """Sauvegarder le fichier NetCDF (``encoding`` et ``report`` : voir ``netcdf_io.write_dataset``)"""
+        if not self.has_netcdf_file(filename):
+            # Un agrégat ou un store Zarr n'a pas de fichier NetCDF propre :
+            # l'enregistrer sous un nouveau nom
+            return self.save_file_as(filename)
+        if filename in self.conflicts:
+            # Ne pas écraser sans confirmation les modifications d'un autre programme
+            reply = QMessageBox.question(
+                self,
+                self.translator.get_text("external_change"),
+                self.translator.get_text("overwrite_external_change", filename),
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return False
         if filename in self.open_files:
             try:                
                 dataset = self.open_files[filename]
                 
-                # Créer un fichier temporaire
-                temp_dir = tempfile.gettempdir()
-                temp_fd, temp_path = tempfile.mkstemp(suffix='.nc', dir=temp_dir)
-                os.close(temp_fd)
+                # Même chemin d'écriture que les traitements par lots
+                if self.thumbnails:
+                    self.thumbnails.cancel(filename)
+                netcdf_io.write_dataset(dataset, filename, encoding=encoding, report=report)
                 
-                try:
-                    # Fermer explicitement le dataset xarray
-                    dataset.close()
-                    del self.open_files[filename]
-                    
-                    # Forcer le garbage collector
-                    import gc
-                    gc.collect()
-                    
-                    # Sauvegarder avec netCDF4 directement
-                    import netCDF4
-                    
-                    # Créer le fichier temporaire
-                    with netCDF4.Dataset(temp_path, 'w', format='NETCDF4') as dst:
-                        # Copier les dimensions
-                        for name, size in dataset.dims.items():
-                            dst.createDimension(name, size)
-                        
-                        # Copier les variables
-                        for name, var in dataset.variables.items():
-                            # Gérer les types spéciaux
-                            if var.dtype == 'datetime64[ns]':
-                                # Créer une variable de type double pour le temps
-                                var_out = dst.createVariable(name, 'f8', var.dims)
-                                # Convertir les dates en nombres
-                                if 'units' in var.attrs:
-                                    units = var.attrs['units']
-                                else:
-                                    units = 'seconds since 1970-01-01 00:00:00'
-                                # Convertir les valeurs en nombres
-                                dates = netCDF4.date2num(var.values.astype('datetime64[s]').astype(datetime),
-                                                       units=units)
-                                var_out[:] = dates
-                                # Ajouter l'attribut units
-                                var_out.units = units
-                            else:
-                                # Pour les autres types
-                                var_out = dst.createVariable(name, var.dtype, var.dims)
-                                var_out[:] = var.values
-                            
-                            # Copier les attributs
-                            for attr_name, attr_value in var.attrs.items():
-                                if attr_name != 'units' or var.dtype != 'datetime64[ns]':
-                                    setattr(var_out, attr_name, attr_value)
-                        
-                        # Copier les attributs globaux
-                        for attr_name, attr_value in dataset.attrs.items():
-                            setattr(dst, attr_name, attr_value)
-                    
-                    try:
-                        # Sous Windows, supprimer d'abord le fichier existant
-                        if os.path.exists(filename):
-                            os.remove(filename)
-                        
-                        # Copier le fichier temporaire vers la destination
-                        shutil.copy2(temp_path, filename)
-                        
-                    except Exception as e:
-                        # Si la copie échoue, essayer avec un appel système
-                        if os.name == 'nt':  # Windows
-                            import subprocess
-                            subprocess.run(['copy', temp_path, filename], shell=True, check=True)
-                        else:  # Unix
-                            subprocess.run(['cp', temp_path, filename], check=True)
-                    
-                    # Rouvrir le dataset
-                    self.open_files[filename] = xr.open_dataset(filename)
-                    
-                    # Forcer la mise à jour du marqueur de modification
-                    self.mark_modified(filename, modified=False, emit_signal=False)
-                    
-                    # Forcer la mise à jour visuelle
-                    self.tree.update()
-                    
-                    # Après une sauvegarde réussie
-                    self.is_modified[filename] = False
-                    self.mark_modified(filename, modified=False, emit_signal=False)
-                    
-                    # N'afficher le message que si demandé
-                    if show_success_message:
-                        QMessageBox.information(self, "Succès", 
-                                            "Fichier sauvegardé avec succès!")
-                    
-                    return True
-                    
-                finally:
-                    # Nettoyer le fichier temporaire
-                    if os.path.exists(temp_path):
-                        try:
-                            os.remove(temp_path)
-                        except:
-                            pass
+                # Rouvrir le dataset
+                self.open_files[filename] = netcdf_io.load_dataset(filename)
+                self.memory.mark_clean(filename)
+                self.conflicts.discard(filename)
+                self.watch_file(filename)
+                self.request_thumbnails(filename, self.open_files[filename])
+                
+                # Forcer la mise à jour du marqueur de modification
+                self.mark_modified(filename, modified=False, emit_signal=False)
+                
+                # Forcer la mise à jour visuelle
+                self.tree.update()
+                
+                # Après une sauvegarde réussie
+                self.is_modified[filename] = False
+                self.mark_modified(filename, modified=False, emit_signal=False)
+                
+                # N'afficher le message que si demandé
+                if show_success_message:
+                    QMessageBox.information(self, "Succès", 
+                                        "Fichier sauvegardé avec succès!")
+                
+                return True
                     
             except Exception as e:
                 if show_success_message:
@@ -749,6 +1530,77 @@ class DataPanel(QWidget):
                         f"Erreur lors de la sauvegarde: {str(e)}")
                 raise  # Propager l'erreur pour la gestion dans save_all_files
 
+    def save_packed(self, filename):
+        """Sauvegarder en stockant des variables flottantes en entiers compactés ou quantifiées"""
+        dataset = self.open_files[filename]
+        floats = [name for name, var in dataset.data_vars.items() if packing.can_pack(var)]
+        if not floats:
+            QMessageBox.information(self, self.translator.get_text("save_packed"),
+                                    self.translator.get_text("save_packed_none"))
+            return False
+        title = self.translator.get_text("save_packed")
+        modes = [self.translator.get_text(key) for key in
+                 ("pack_int16", "pack_uint8", "quantize_significant", "quantize_lsd")]
+        mode, ok = QInputDialog.getItem(self, title, self.translator.get_text("save_packed_mode"),
+                                        modes, 0, False)
+        if not ok:
+            return False
+        index = modes.index(mode)
+        # Champs (au moins deux dimensions) proposés par défaut
+        fields = [name for name in floats if dataset[name].ndim >= 2] or floats
+        text, ok = QInputDialog.getText(self, title,
+                                        self.translator.get_text("save_packed_variables"),
+                                        text=", ".join(fields))
+        names = [name.strip() for name in text.split(',') if name.strip()]
+        if not ok or not names:
+            return False
+        if index < 2:
+            operation = {'op': 'pack', 'variables': names, 'dtype': packing.PACKED_TYPES[index]}
+        else:
+            digits, ok = QInputDialog.getInt(self, title,
+                                             self.translator.get_text("save_packed_digits"),
+                                             3 if index == 2 else 2,
+                                             1 if index == 2 else -5, 15)
+            if not ok:
+                return False
+            key = 'significant_digits' if index == 2 else 'least_significant_digit'
+            operation = {'op': 'quantize', 'variables': names, key: digits}
+
+        before = os.path.getsize(filename) if os.path.exists(filename) else 0
+        report = {}
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            encoding = {}
+            operations.apply_operation(dataset, operation, encoding)
+            saved = self.save_file(filename, show_success_message=False,
+                                   encoding=encoding, report=report)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("save_packed_error", str(e)))
+            return False
+        QApplication.restoreOverrideCursor()
+        if not saved:
+            return False
+        # Rejouable dans les macros (le compactage est recalculé sur les données)
+        self.journal.record(filename, operation)
+
+        lines = []
+        for name, entry in report.items():
+            size = entry['stored_bytes'] if entry['stored_bytes'] is not None else entry['packed_bytes']
+            if size == entry['raw_bytes']:
+                # Quantification sans h5py : taille propre à la variable inconnue
+                lines.append(self.translator.get_text(
+                    "save_packed_line_error", name, entry['dtype'], entry['max_error']))
+                continue
+            lines.append(self.translator.get_text(
+                "save_packed_line", name, entry['dtype'], entry['raw_bytes'] / 2**20,
+                size / 2**20, entry['raw_bytes'] / size if size else 0, entry['max_error']))
+        QMessageBox.information(self, title, self.translator.get_text(
+            "save_packed_done", os.path.basename(filename), before / 2**20,
+            os.path.getsize(filename) / 2**20, "\n".join(lines)))
+        return True
+
     def save_file_as(self, filename):
         """Sauvegarder sous un nouveau nom"""
         try:
@@ -768,15 +1620,19 @@ class DataPanel(QWidget):
                 
                 try:
                     # Sauvegarder directement avec le nouveau nom
-                    xr.backends.file_manager.FILE_CACHE.clear()
-                    dataset.to_netcdf(new_filename)
+                    netcdf_io.write_dataset(dataset, new_filename)
                     
                     # Charger le nouveau fichier
-                    new_dataset = xr.open_dataset(new_filename)
+                    new_dataset = netcdf_io.load_dataset(new_filename)
                     
                     # Mettre à jour les références
                     self.open_files[new_filename] = new_dataset
                     self.is_modified[new_filename] = False
+                    # L'arbre du fichier est renommé, pas reconstruit
+                    self.value_digests[new_filename] = dict(self.value_digests.get(filename, {}))
+                    self.memory.mark_clean(new_filename)
+                    self.watch_file(new_filename)
+                    self.request_thumbnails(new_filename, new_dataset)
                     
                     # Mettre à jour l'arbre
                     root = self.tree.invisibleRootItem()
@@ -808,26 +1664,38 @@ class DataPanel(QWidget):
 
     def close_file(self, filename):
         """Fermer un fichier"""
+        if filename in self.pending_files:
+            # Affiché depuis le cache mais pas encore ouvert
+            self.pending_files.discard(filename)
+            self.remove_file_from_tree(filename)
+            return True
         if filename in self.open_files:
             # Fermer le dataset
             self.open_files[filename].close()
             del self.open_files[filename]
             del self.is_modified[filename]
+            self.aggregates.pop(filename, None)
+            self.set_following(filename, False)
+            self.memory.forget(filename)
+            self.watcher.removePath(filename)
+            chunk_reader.cache.discard(filename)
+            compare.discard(filename)
+            self.known_keys.pop(filename, None)
+            self.value_digests.pop(filename, None)
+            self.conflicts.discard(filename)
+            if self.thumbnails:
+                self.thumbnails.cancel(filename)
             
             # Retirer de l'arbre
-            root = self.tree.invisibleRootItem()
-            for i in range(root.childCount()):
-                item = root.child(i)
-                if item.data(0, Qt.ItemDataRole.UserRole) == filename:
-                    root.removeChild(item)
-                    break
+            self.remove_file_from_tree(filename)
                     
+            self.file_closed.emit(filename)
             return True
         return False
 
     def close_all_files(self):
         """Fermer tous les fichiers"""
-        filenames = list(self.open_files.keys())
+        filenames = list(self.open_files.keys()) + list(self.pending_files)
         for filename in filenames:
             if not self.close_file(filename):
                 break
@@ -0,0 +1,140 @@
+import json
+import os
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTreeWidget,
+                             QTreeWidgetItem, QPushButton, QLabel, QFileDialog,
+                             QMessageBox)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from netcdflab.utils.translations import Translator
+
+
+class DiffWindow(QWidget):
+    """Résultat de la comparaison de deux fichiers : structure, attributs et régions modifiées"""
+
+    # Fichier A, fichier B, variable, premiers indices de la région {dimension: indice}
+    region_selected = pyqtSignal(str, str, str, object)
+
+    def __init__(self, result, file_a, file_b, parent=None):
+        super().__init__(parent, Qt.WindowType.Window)
+        self.translator = Translator()
+        self.result = result
+        self.file_a, self.file_b = file_a, file_b
+        self.setWindowTitle(self.translator.get_text(
+            "diff_title", os.path.basename(self.file_a), os.path.basename(self.file_b)))
+        self.resize(700, 500)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels([self.translator.get_text("diff_element"),
+                                   self.translator.get_text("diff_details")])
+        self.tree.itemDoubleClicked.connect(self._item_double_clicked)
+        layout.addWidget(self.tree)
+
+        buttons = QHBoxLayout()
+        self.export_button = QPushButton(self.translator.get_text("diff_export"))
+        self.export_button.clicked.connect(self.export_report)
+        buttons.addWidget(self.export_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.populate()
+
+    def _section(self, key):
+        item = QTreeWidgetItem([self.translator.get_text(key)])
+        self.tree.addTopLevelItem(item)
+        item.setExpanded(True)
+        return item
+
+    @staticmethod
+    def _add(parent, text, details=""):
+        return QTreeWidgetItem(parent, [text, str(details)])
+
+    def _add_attributes(self, parent, name, attrs):
+        item = self._add(parent, name)
+        for key, value in attrs['added'].items():
+            self._add(item, f"+ {key}", value)
+        for key in attrs['removed']:
+            self._add(item, f"- {key}")
+        for key, (old, new) in attrs['changed'].items():
+            self._add(item, f"~ {key}", f"{old} → {new}")
+
+    def populate(self):
+        """Remplir l'arbre à partir du résultat de ``diff.diff_files``"""
+        self.tree.clear()
+        result = self.result
+        if result['identical']:
+            self.summary_label.setText(self.translator.get_text("diff_identical"))
+            return
+        self.summary_label.setText(self.translator.get_text(
+            "diff_summary", len(result['data'])))
+
+        groups, variables = result['groups'], result['variables']
+        if groups['added'] or groups['removed'] or result['dimensions'] \
+                or variables['added'] or variables['removed'] or variables['changed']:
+            structure = self._section("diff_structure")
+            for path in groups['added']:
+                self._add(structure, f"+ {path}")
+            for path in groups['removed']:
+                self._add(structure, f"- {path}")
+            for path, dims in result['dimensions'].items():
+                for name, value in dims['added'].items():
+                    self._add(structure, f"+ {path.rstrip('/')}/{name}", value[0])
+                for name in dims['removed']:
+                    self._add(structure, f"- {path.rstrip('/')}/{name}")
+                for name, (old, new) in dims['changed'].items():
+                    self._add(structure, f"~ {path.rstrip('/')}/{name}", f"{old[0]} → {new[0]}")
+            for path in variables['added']:
+                self._add(structure, f"+ {path}")
+            for path in variables['removed']:
+                self._add(structure, f"- {path}")
+            for path, change in variables['changed'].items():
+                self._add(structure, f"~ {path}",
+                          f"{change['dims'][0]} {change['dtype'][0]} → "
+                          f"{change['dims'][1]} {change['dtype'][1]}")
+
+        if result['attributes'] or variables['attributes']:
+            attributes = self._section("diff_attributes")
+            for path, attrs in result['attributes'].items():
+                self._add_attributes(attributes, path, attrs)
+            for path, attrs in variables['attributes'].items():
+                self._add_attributes(attributes, path, attrs)
+
+        if result['data']:
+            data = self._section("diff_data")
+            for path, entry in result['data'].items():
+                if entry['status'] == 'grid_mismatch':
+                    self._add(data, path, self.translator.get_text("diff_grid_mismatch"))
+                    continue
+                details = self.translator.get_text(
+                    "diff_regions", entry['regions_changed'], entry['regions_total'])
+                item = self._add(data, path, details)
+                for region in entry['regions']:
+                    text = ", ".join(f"{dim} {start}:{stop}"
+                                     for dim, (start, stop) in zip(entry['dims'], region))
+                    child = self._add(item, text)
+                    child.setData(0, Qt.ItemDataRole.UserRole,
+                                  (path, {dim: start for dim, (start, _) in zip(entry['dims'], region)}))
+                    child.setToolTip(0, self.translator.get_text("diff_show_region"))
+
+    def _item_double_clicked(self, item, column):
+        data = item.data(0, Qt.ItemDataRole.UserRole)
+        if data:
+            path, starts = data
+            self.region_selected.emit(self.file_a, self.file_b, path, starts)
+
+    def export_report(self):
+        """Enregistrer le rapport JSON (même format que ``--report``)"""
+        filename, _ = QFileDialog.getSaveFileName(
+            self, self.translator.get_text("diff_export"), "diff.json",
+            "JSON (*.json);;Tous les fichiers (*.*)")
+        if not filename:
+            return
+        try:
+            with open(filename, 'w') as f:
+                json.dump(self.result, f, indent=2)
+        except OSError as e:
+            QMessageBox.critical(self, self.translator.get_text("error"), str(e))
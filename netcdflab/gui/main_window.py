@@ -1,18 +1,30 @@
 import sys
 import os
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, 
-                                 QVBoxLayout, QSplitter, QFileDialog, QMessageBox)
-from PyQt6.QtCore import Qt
+                                 QVBoxLayout, QSplitter, QFileDialog, QMessageBox,
+                                 QLabel, QInputDialog)
+from PyQt6.QtCore import Qt, QEvent, QTimer, pyqtSignal
 from PyQt6.QtGui import QKeySequence, QShortcut, QDragEnterEvent, QDropEvent
 from .data_panel import DataPanel
 from .visualization_panel import VisualizationPanel
 from .menu_bar import MenuBar
+from .trace_panel import TracePanel
+from .thumbnail_generator import ThumbnailGenerator
 
 from netcdflab.utils.translations import Translator
+from netcdflab.utils import startup_timing
+from netcdflab.utils import tracing
+from netcdflab.utils import memory
 
 class MainWindow(QMainWindow):
+    first_painted = pyqtSignal()
+    # Intervalle de mise à jour de la mémoire dans la barre d'état (ms)
+    MEMORY_STATUS_INTERVAL = 2000
+    
     def __init__(self):
         super().__init__()
+        # Le premier paint de la fenêtre est mesuré dans event()
+        self._first_paint_done = False
         self.translator = Translator()
         
         # Créer d'abord la barre de menu
@@ -40,10 +52,6 @@ class MainWindow(QMainWindow):
         # Activer le glisser-déposer sur la fenêtre principale
         self.setAcceptDrops(True)
         
-        # Créer la barre de menu
-        self.menu_bar = MenuBar(self)
-        self.setMenuBar(self.menu_bar)
-        
         # Widget principal
         main_widget = QWidget()
         main_widget.setAcceptDrops(True)  # Activer sur le widget principal
@@ -59,6 +67,10 @@ class MainWindow(QMainWindow):
         # Panneau de données (gauche)
         self.data_panel = DataPanel()
         self.data_panel.setAcceptDrops(True)  # Activer sur le data_panel
+        self.data_panel.metadata_cache = self.menu_bar.metadata_cache
+        if self.menu_bar.thumbnail_cache:
+            self.data_panel.thumbnails = ThumbnailGenerator(self.menu_bar.thumbnail_cache, self)
+            self.data_panel.thumbnails.thumbnail_ready.connect(self.data_panel.set_thumbnail)
         splitter.addWidget(self.data_panel)
         
         # Panneau de visualisation (droite)
@@ -69,16 +81,34 @@ class MainWindow(QMainWindow):
         self.data_panel.dataset_loaded.connect(self.visualization_panel.update_dataset)
         self.data_panel.dataset_modified.connect(self.handle_dataset_modified)
         
-        # Connexion explicite avec fonction lambda pour debug
-        self.data_panel.visualization_requested.connect(
-            lambda f, v, d, i: self._debug_visualization_request(f, v, d, i)
-        )
+        self.data_panel.visualization_requested.connect(self.handle_visualization_request)
+        self.data_panel.comparison_requested.connect(self.visualization_panel.show_comparison)
+        self.data_panel.file_closed.connect(self.visualization_panel.remove_dataset)
+        self.data_panel.dataset_extended.connect(self.handle_dataset_extended)
+        
+        # Budget mémoire : libérer si nécessaire après chaque chargement ou tracé
+        self.data_panel.file_loaded.connect(self.check_memory)
+        self.visualization_panel.plot_updated.connect(self.check_memory)
         
         # Définir les tailles relatives des panneaux
         splitter.setSizes([400, 800])
         
         layout.addWidget(splitter)
         
+        # Panneau des traces de performance (visible si les traces sont actives)
+        self.trace_panel = TracePanel(self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.trace_panel)
+        self.trace_panel.setVisible(tracing.is_enabled())
+        self.trace_panel.visibilityChanged.connect(self.menu_bar.trace_action.setChecked)
+        
+        # Mémoire utilisée dans la barre d'état
+        self.memory_label = QLabel()
+        self.statusBar().addPermanentWidget(self.memory_label)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.update_memory_status)
+        self.memory_timer.start(self.MEMORY_STATUS_INTERVAL)
+        self.update_memory_status()
+        
         # Raccourcis clavier
         self.setup_shortcuts()
         
@@ -94,12 +124,69 @@ class MainWindow(QMainWindow):
         # Connecter l'événement closeEvent
         self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
         
+    def event(self, event):
+        """Détecter le premier affichage de la fenêtre pour les mesures de démarrage"""
+        if not self._first_paint_done and event.type() == QEvent.Type.Paint:
+            self._first_paint_done = True
+            startup_timing.mark("first_paint")
+            startup_timing.save_report(self.menu_bar.get_app_data_path())
+            # Émettre après la fin du paint pour ne pas le retarder
+            QTimer.singleShot(0, self.first_painted.emit)
+        return super().event(event)
+        
     def retranslate_ui(self):
         """Met à jour les textes de l'interface après un changement de langue"""
         self.setWindowTitle(self.translator.get_text("app_title"))
         self.menu_bar.retranslate_ui()
         self.data_panel.retranslate_ui()
         self.visualization_panel.retranslate_ui()
+        self.trace_panel.retranslate_ui()
+        self.update_memory_status()
+
+    def toggle_tracing(self, enabled):
+        """Activer/désactiver les traces de performance et leur panneau"""
+        tracing.set_enabled(enabled)
+        self.trace_panel.setVisible(enabled)
+
+    def check_memory(self, filename):
+        """Appliquer le budget mémoire en gardant en dernier le fichier utilisé"""
+        manager = self.data_panel.memory
+        manager.touch(filename)
+        if manager.enforce(self.data_panel.open_files, keep=filename):
+            self.update_memory_status()
+
+    def update_memory_status(self):
+        """Afficher la mémoire utilisée et son détail par fichier et par cache"""
+        manager = self.data_panel.memory
+        usage = manager.usage(self.data_panel.open_files)
+        self.memory_label.setText(self.translator.get_text(
+            "memory_status", memory.format_bytes(usage['total']),
+            memory.format_bytes(usage['budget'])))
+        
+        lines = []
+        for filename, entry in usage['files'].items():
+            lines.append(f"{os.path.basename(filename)}: {memory.format_bytes(entry['total'])}")
+            for name, size in sorted(entry['variables'].items(), key=lambda item: -item[1]):
+                lines.append(f"    {name}: {memory.format_bytes(size)}")
+        for name, size in usage['caches'].items():
+            lines.append(f"{self.translator.get_text('memory_cache')} {name}: "
+                         f"{memory.format_bytes(size)}")
+        self.memory_label.setToolTip("\n".join(lines))
+
+    def set_memory_budget(self):
+        """Modifier le budget mémoire (en Mo)"""
+        manager = self.data_panel.memory
+        value, ok = QInputDialog.getInt(
+            self,
+            self.translator.get_text("memory_budget"),
+            self.translator.get_text("memory_budget_prompt"),
+            manager.budget // 2**20, 64, 2**30
+        )
+        if ok:
+            manager.budget = value * 2**20
+            manager.enforce(self.data_panel.open_files,
+                            keep=self.visualization_panel.file_selector.currentText())
+            self.update_memory_status()
 
     def setup_shortcuts(self):
         """Configurer les raccourcis clavier"""
@@ -121,6 +208,46 @@ class MainWindow(QMainWindow):
             self.data_panel.load_netcdf(file_name)
             self.menu_bar.add_recent_file(file_name)
             
+    def open_zarr(self):
+        """Ouvrir un store Zarr local (répertoire) comme un fichier"""
+        store = QFileDialog.getExistingDirectory(self, self.translator.get_text("open_zarr"), "")
+        if store:
+            self.data_panel.load_netcdf(store)
+            self.menu_bar.add_recent_file(store)
+
+    def open_aggregate(self):
+        """Ouvrir plusieurs fichiers comme un seul dataset le long d'une dimension"""
+        file_names, _ = QFileDialog.getOpenFileNames(
+            self,
+            self.translator.get_text("open_aggregate"),
+            "",
+            "NetCDF Files (*.nc);;All Files (*)"
+        )
+        if len(file_names) < 2:
+            if file_names:
+                self.data_panel.load_netcdf(file_names[0])
+            return
+        
+        # Dimensions du premier fichier (dimension illimitée ou 'time' proposée en premier)
+        import netCDF4
+        try:
+            with netCDF4.Dataset(file_names[0]) as nc:
+                dims = sorted(nc.dimensions, key=lambda d: (not nc.dimensions[d].isunlimited(),
+                                                             d != 'time'))
+        except Exception as e:
+            QMessageBox.critical(self, self.translator.get_text("error"),
+                                 self.translator.get_text("error_loading_file", str(e)))
+            return
+        
+        dim, ok = QInputDialog.getItem(
+            self,
+            self.translator.get_text("open_aggregate"),
+            self.translator.get_text("aggregate_dimension"),
+            dims, 0, False
+        )
+        if ok and dim:
+            self.data_panel.load_aggregate(file_names, dim)
+            
     def save_file(self):
         """Sauvegarder avec Ctrl+S"""
         if self.current_file:
@@ -145,11 +272,74 @@ class MainWindow(QMainWindow):
             self,
             "Exporter la macro Python",
             "",
-            "Python Files (*.py);;All Files (*)"
+            "Python Files (*.py);;JSON Pipeline (*.json);;All Files (*)"
         )
         if file_name:
             self.data_panel.export_macro(file_name)
             
+    def validate_folder(self):
+        """Valider tous les fichiers NetCDF d'un dossier (pool de processus) et enregistrer le rapport"""
+        import json
+        from PyQt6.QtWidgets import QProgressDialog, QApplication
+        from netcdflab.utils import validation
+        from netcdflab.utils.batch import find_files
+
+        folder = QFileDialog.getExistingDirectory(self, self.translator.get_text("validate_folder"))
+        if not folder:
+            return
+        files = find_files(os.path.join(folder, '**', '*.nc'))
+        if not files:
+            QMessageBox.information(self, self.translator.get_text("validation"),
+                                    self.translator.get_text("validation_no_files", folder))
+            return
+
+        progress = QProgressDialog(self.translator.get_text("validation_progress"), None,
+                                   0, len(files), self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        def update(done, total, result):
+            progress.setValue(done)
+            QApplication.processEvents()
+
+        try:
+            results = validation.validate_files(files, progress=update)
+        finally:
+            progress.close()
+        summary = validation.summarize(results)
+
+        # Marquer les problèmes des fichiers ouverts
+        open_files = {os.path.abspath(f): f for f in self.data_panel.open_files}
+        for result in results:
+            filename = open_files.get(os.path.abspath(result['file']))
+            if filename and result['status'] != 'failed':
+                self.data_panel.show_validation(filename, result)
+
+        reply = QMessageBox.question(
+            self,
+            self.translator.get_text("validation"),
+            self.translator.get_text("validation_summary", summary['total'], summary['ok'],
+                                     summary['warnings'], summary['errors'], summary['failed']),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        report, _ = QFileDialog.getSaveFileName(
+            self, self.translator.get_text("validate_folder"),
+            os.path.join(folder, "validation.json"), "JSON (*.json);;All Files (*)")
+        if report:
+            with open(report, 'w') as f:
+                json.dump(summary, f, indent=2)
+
+    def handle_dataset_extended(self, filename, dim_name, start):
+        """Transmettre les nouveaux enregistrements d'un fichier suivi au panneau de visualisation"""
+        dataset = self.data_panel.open_files[filename]
+        self.visualization_panel.extend_dimension(filename, dataset, dim_name, start)
+    
+    def toggle_follow_latest(self, enabled):
+        """Afficher ou non automatiquement le dernier pas ajouté en mode direct"""
+        self.visualization_panel.follow_latest = enabled
+            
     def handle_dataset_modified(self, filename):
         """Gérer les modifications du dataset"""
         if filename in self.data_panel.open_files:
@@ -160,8 +350,8 @@ class MainWindow(QMainWindow):
         """Gérer l'entrée d'un glisser-déposer"""
         if event.mimeData().hasUrls():
             urls = event.mimeData().urls()
-            # Accepter si au moins un fichier est .nc
-            if any(url.toLocalFile().lower().endswith('.nc') for url in urls):
+            # Accepter si au moins un fichier est .nc (ou un store .zarr)
+            if any(url.toLocalFile().lower().endswith(('.nc', '.zarr')) for url in urls):
                 event.accept()
             else:
                 event.ignore()
@@ -183,8 +373,8 @@ class MainWindow(QMainWindow):
         """Gérer le dépôt d'un ou plusieurs fichiers"""
         urls = event.mimeData().urls()
         for url in urls:
-            file_path = url.toLocalFile()
-            if file_path.lower().endswith('.nc'):
+            file_path = url.toLocalFile().rstrip('/')
+            if file_path.lower().endswith(('.nc', '.zarr')):
                 self.data_panel.load_netcdf(file_path)
                 self.menu_bar.add_recent_file(file_path)
         event.accept()
@@ -275,11 +465,8 @@ class MainWindow(QMainWindow):
                 
         return True
     
-    def _debug_visualization_request(self, filename, var_name, dim_name, index):
-        """Fonction de debug pour la visualisation"""
-        print(f"\n=== Signal visualization_requested reçu dans MainWindow ===")
-        print(f"Fichier: {filename}")
-        print(f"Variable: {var_name}")
-        print(f"Dimension: {dim_name}")
-        print(f"Index: {index}")
-        self.visualization_panel.handle_visualization_request(filename, var_name, dim_name, index)
\ No newline at end of file
+    def handle_visualization_request(self, filename, var_name, dim_name, index):
+        """Transmettre une demande de visualisation du DataPanel au panneau de visualisation"""
+        with tracing.span("visualization_request", file=filename, variable=var_name,
+                          dim=dim_name, index=index):
+            self.visualization_panel.handle_visualization_request(filename, var_name, dim_name, index)
\ No newline at end of file
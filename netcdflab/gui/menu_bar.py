@@ -1,11 +1,14 @@
 from PyQt6.QtWidgets import QMenuBar, QMenu, QMessageBox
-from PyQt6.QtGui import QAction
+from PyQt6.QtGui import QAction, QIcon
 import json
 import os
 import platform
 import sys
 
 from netcdflab.utils.translations import Translator, Language
+from netcdflab.utils import tracing
+from netcdflab.utils.metadata_cache import MetadataCache, summary_text
+from netcdflab.utils.thumbnails import ThumbnailCache
 
 class MenuBar(QMenuBar):
     def __init__(self, parent=None):
@@ -17,18 +20,22 @@ class MenuBar(QMenuBar):
         # Menu Fichier
         self.file_menu = QMenu(self.translator.get_text("file_menu"), self)
         self.file_menu.addAction(self.translator.get_text("open"), self.parent.open_file)
+        self.file_menu.addAction(self.translator.get_text("open_aggregate"), self.parent.open_aggregate)
+        self.file_menu.addAction(self.translator.get_text("open_zarr"), self.parent.open_zarr)
         self.save_action = self.file_menu.addAction(self.translator.get_text("save_all"), 
                                                 self.parent.save_all_files)
         self.save_action.setEnabled(False)
             
         self.file_menu.addSeparator()
         
-        # Sous-menu Fichiers récents
+        # Sous-menu Fichiers récents (résumé de chaque fichier en info-bulle)
         self.recent_menu = QMenu(self.translator.get_text("recent_files"), self.file_menu)
+        self.recent_menu.setToolTipsVisible(True)
         self.file_menu.addMenu(self.recent_menu)
         
         self.file_menu.addSeparator()
         self.file_menu.addAction(self.translator.get_text("export_macro"), self.parent.export_macro)
+        self.file_menu.addAction(self.translator.get_text("validate_folder"), self.parent.validate_folder)
         self.file_menu.addSeparator()
         self.file_menu.addAction(self.translator.get_text("close_all"), self.parent.close_all_files)
         self.file_menu.addSeparator()
@@ -40,6 +47,19 @@ class MenuBar(QMenuBar):
         edit_menu.addAction(self.translator.get_text("paste"))
         edit_menu.addAction(self.translator.get_text("delete"))
         
+        # Menu Affichage
+        self.view_menu = QMenu(self.translator.get_text("view_menu"), self)
+        self.trace_action = self.view_menu.addAction(self.translator.get_text("trace_panel"))
+        self.trace_action.setCheckable(True)
+        self.trace_action.setChecked(tracing.is_enabled())
+        self.trace_action.triggered.connect(self.parent.toggle_tracing)
+        self.follow_latest_action = self.view_menu.addAction(self.translator.get_text("follow_latest"))
+        self.follow_latest_action.setCheckable(True)
+        self.follow_latest_action.setChecked(True)
+        self.follow_latest_action.triggered.connect(self.parent.toggle_follow_latest)
+        self.memory_action = self.view_menu.addAction(self.translator.get_text("memory_budget"),
+                                                      self.parent.set_memory_budget)
+        
         # Menu Aide
         help_menu = QMenu(self.translator.get_text("help_menu"), self)
         help_menu.addAction(self.translator.get_text("about"), self.show_about)
@@ -51,9 +71,15 @@ class MenuBar(QMenuBar):
         # Ajouter les menus
         self.addMenu(self.file_menu)
         self.addMenu(edit_menu)
+        self.addMenu(self.view_menu)
         self.addMenu(help_menu)
         self.addMenu(self.language_menu)  # Un seul menu langue
         
+        # Caches des métadonnées et des vignettes des fichiers ouverts
+        app_path = self.get_app_data_path()
+        self.metadata_cache = MetadataCache(app_path) if app_path else None
+        self.thumbnail_cache = ThumbnailCache(os.path.join(app_path, 'thumbnails')) if app_path else None
+        
         # Charger l'historique
         self.load_recent_files()
         
@@ -186,6 +212,13 @@ class MenuBar(QMenuBar):
             if os.path.exists(filename):
                 action = QAction(os.path.basename(filename), self)
                 action.setStatusTip(filename)
+                metadata = self.metadata_cache.peek(filename) if self.metadata_cache else None
+                if metadata:
+                    action.setToolTip(f"{filename}\n{summary_text(metadata)}")
+                if self.thumbnail_cache:
+                    preview = self.thumbnail_cache.get(self.thumbnail_cache.identity(filename))
+                    if preview:
+                        action.setIcon(QIcon(preview))
                 action.triggered.connect(lambda checked, f=filename: self.parent.data_panel.load_netcdf(f))
                 self.recent_menu.addAction(action)
         
@@ -218,11 +251,17 @@ class MenuBar(QMenuBar):
         # Mettre à jour les menus principaux
         self.file_menu.setTitle(self.translator.get_text("file_menu"))
         self.recent_menu.setTitle(self.translator.get_text("recent_files"))
+        self.view_menu.setTitle(self.translator.get_text("view_menu"))
+        self.trace_action.setText(self.translator.get_text("trace_panel"))
+        self.follow_latest_action.setText(self.translator.get_text("follow_latest"))
+        self.memory_action.setText(self.translator.get_text("memory_budget"))
         
         # Mettre à jour les actions du menu Fichier
         # Recréer toutes les actions avec les nouveaux textes
         self.file_menu.clear()
         self.file_menu.addAction(self.translator.get_text("open"), self.parent.open_file)
+        self.file_menu.addAction(self.translator.get_text("open_aggregate"), self.parent.open_aggregate)
+        self.file_menu.addAction(self.translator.get_text("open_zarr"), self.parent.open_zarr)
         self.save_action = self.file_menu.addAction(self.translator.get_text("save_all"), 
                                                 self.parent.save_all_files)
         self.save_action.setEnabled(False)
@@ -232,6 +271,7 @@ class MenuBar(QMenuBar):
         self.file_menu.addSeparator()
         
         self.file_menu.addAction(self.translator.get_text("export_macro"), self.parent.export_macro)
+        self.file_menu.addAction(self.translator.get_text("validate_folder"), self.parent.validate_folder)
         self.file_menu.addSeparator()
         self.file_menu.addAction(self.translator.get_text("close_all"), self.parent.close_all_files)
         self.file_menu.addSeparator()
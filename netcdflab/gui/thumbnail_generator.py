@@ -0,0 +1,75 @@
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from netcdflab.utils import tracing
+from netcdflab.utils.thumbnails import first_slice, render_thumbnail
+
+
+class ThumbnailGenerator(QObject):
+    """Génération des vignettes en tâche de fond, une variable par tour de boucle.
+
+    Les lectures HDF5 ne sont pas sûres entre plusieurs threads : les vignettes
+    sont calculées dans le thread de l'interface, quand la boucle d'événements
+    est libre, pour ne pas bloquer l'affichage.
+    """
+    thumbnail_ready = pyqtSignal(str, str, str)  # filename, variable, chemin de l'image
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.queue = deque()  # (filename, identité, variable, aperçu du fichier)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.process_next)
+        self._source = None  # (filename, dataset) en cours de lecture
+
+    def request(self, filename, variables):
+        """Demander les vignettes d'un fichier ; celles déjà en cache sont émises aussitôt"""
+        identity = self.cache.identity(filename)
+        if identity is None:
+            return
+        for number, variable in enumerate(variables):
+            path = self.cache.get(identity, variable)
+            if path:
+                self.thumbnail_ready.emit(filename, variable, path)
+            else:
+                self.queue.append((filename, identity, variable, number == 0))
+        if self.queue and not self.timer.isActive():
+            self.timer.start(0)
+
+    def cancel(self, filename):
+        """Abandonner les vignettes en attente d'un fichier fermé"""
+        self.queue = deque(entry for entry in self.queue if entry[0] != filename)
+        if self._source and self._source[0] == filename:
+            self._close_source()
+
+    def _open_source(self, filename):
+        from netcdflab.utils.netcdf_io import open_dataset
+
+        if self._source and self._source[0] == filename:
+            return self._source[1]
+        self._close_source()
+        self._source = (filename, open_dataset(filename))
+        return self._source[1]
+
+    def _close_source(self):
+        if self._source:
+            self._source[1].close()
+            self._source = None
+
+    def process_next(self):
+        """Calculer la vignette suivante de la file"""
+        if not self.queue:
+            self.timer.stop()
+            self._close_source()
+            return
+        filename, identity, variable, preview = self.queue.popleft()
+        try:
+            with tracing.span("thumbnail", file=filename, variable=variable):
+                dataset = self._open_source(filename)
+                image = render_thumbnail(first_slice(dataset[variable]))
+                path = self.cache.put(identity, variable, image, preview=preview)
+        except Exception as e:
+            print(f"Erreur lors de la création de la vignette de {variable}: {e}")
+            return
+        self.thumbnail_ready.emit(filename, variable, path)
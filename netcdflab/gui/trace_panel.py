@@ -0,0 +1,133 @@
+from PyQt6.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QHBoxLayout,
+                             QTreeWidget, QTreeWidgetItem, QPushButton, QLabel,
+                             QFileDialog, QMessageBox)
+from PyQt6.QtCore import Qt, QTimer
+
+from netcdflab.utils.translations import Translator
+from netcdflab.utils import tracing
+from netcdflab.utils.memory import format_bytes
+
+
+class TracePanel(QDockWidget):
+    """Panneau des traces de performance : résumé par étape et derniers spans"""
+
+    # Intervalle de rafraîchissement quand le panneau est visible (ms)
+    REFRESH_INTERVAL = 1000
+    # Nombre de spans récents affichés
+    RECENT_COUNT = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.translator = Translator()
+        self.setWindowTitle(self.translator.get_text("trace_panel"))
+        self.setObjectName("trace_panel")
+
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        # Résumé par nom de span
+        self.summary_tree = QTreeWidget()
+        self.summary_tree.setRootIsDecorated(False)
+        self.summary_tree.setHeaderLabels(self._summary_headers())
+        self.summary_label = QLabel(self.translator.get_text("trace_summary"))
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.summary_tree)
+
+        # Derniers spans
+        self.recent_tree = QTreeWidget()
+        self.recent_tree.setRootIsDecorated(False)
+        self.recent_tree.setHeaderLabels(self._recent_headers())
+        self.recent_label = QLabel(self.translator.get_text("trace_recent"))
+        layout.addWidget(self.recent_label)
+        layout.addWidget(self.recent_tree)
+
+        buttons = QHBoxLayout()
+        self.clear_button = QPushButton(self.translator.get_text("trace_clear"))
+        self.clear_button.clicked.connect(self.clear)
+        self.export_button = QPushButton(self.translator.get_text("trace_export"))
+        self.export_button.clicked.connect(self.export_trace)
+        buttons.addWidget(self.clear_button)
+        buttons.addWidget(self.export_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.setWidget(widget)
+
+        self._last_count = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self._visibility_changed)
+
+    def _summary_headers(self):
+        return [self.translator.get_text("trace_step"), self.translator.get_text("trace_count"),
+                "Total (ms)", "Max (ms)", self.translator.get_text("trace_bytes")]
+
+    def _recent_headers(self):
+        return [self.translator.get_text("trace_step"), "ms",
+                self.translator.get_text("trace_bytes"), self.translator.get_text("trace_details")]
+
+    def _visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+            self.timer.start(self.REFRESH_INTERVAL)
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        """Mettre à jour les tableaux si de nouveaux spans ont été enregistrés"""
+        events, count = tracing.tracer.snapshot_count()
+        if count == self._last_count:
+            return
+        self._last_count = count
+
+        self.summary_tree.clear()
+        stats = tracing.tracer.summary()
+        for name, entry in sorted(stats.items(), key=lambda item: -item[1]['total']):
+            QTreeWidgetItem(self.summary_tree, [
+                name, str(entry['count']), f"{entry['total'] * 1000:.1f}",
+                f"{entry['max'] * 1000:.1f}",
+                format_bytes(entry['bytes']) if entry['bytes'] else "",
+            ])
+
+        self.recent_tree.clear()
+        for event in reversed(events[-self.RECENT_COUNT:]):
+            args = dict(event['args'])
+            size = args.pop('bytes', None)
+            details = ", ".join(f"{k}={v}" for k, v in args.items())
+            QTreeWidgetItem(self.recent_tree, [
+                event['name'], f"{event['duration'] * 1000:.1f}",
+                format_bytes(size) if size else "", details,
+            ])
+
+        for tree in (self.summary_tree, self.recent_tree):
+            tree.resizeColumnToContents(0)
+
+    def clear(self):
+        tracing.tracer.clear()
+        self._last_count = None
+        self.refresh()
+
+    def export_trace(self):
+        """Exporter la trace au format Chrome (chrome://tracing, Perfetto)"""
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            self.translator.get_text("trace_export"),
+            "netcdflab_trace.json",
+            "Chrome Trace (*.json);;All Files (*)"
+        )
+        if filename:
+            try:
+                tracing.tracer.export_chrome_trace(filename)
+            except Exception as e:
+                QMessageBox.critical(self, self.translator.get_text("error"),
+                                     self.translator.get_text("export_error", str(e)))
+
+    def retranslate_ui(self):
+        """Mettre à jour les textes après un changement de langue"""
+        self.setWindowTitle(self.translator.get_text("trace_panel"))
+        self.summary_label.setText(self.translator.get_text("trace_summary"))
+        self.recent_label.setText(self.translator.get_text("trace_recent"))
+        self.summary_tree.setHeaderLabels(self._summary_headers())
+        self.recent_tree.setHeaderLabels(self._recent_headers())
+        self.clear_button.setText(self.translator.get_text("trace_clear"))
+        self.export_button.setText(self.translator.get_text("trace_export"))
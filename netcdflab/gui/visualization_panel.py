@@ -4,15 +4,18 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
                                  QComboBox, QPushButton, QLabel, QSpinBox,
                                  QScrollArea, QMenu, QInputDialog, QLineEdit,
                                  QFileDialog, QMessageBox, QApplication)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QIcon, QPixmap, QPainter, QColor
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
-from matplotlib.figure import Figure
 import numpy as np
 from datetime import datetime, timedelta
 
 from netcdflab.utils.translations import Translator
+from netcdflab.utils import tracing
+from netcdflab.utils import chunk_reader
+from netcdflab.utils import point_index
+from netcdflab.utils import sections
+from netcdflab.utils import compare
+from netcdflab.utils.chunks import time_dimension
 
 class DimensionSelector(QWidget):
     def __init__(self, name, parent=None):
@@ -26,7 +29,27 @@ class DimensionSelector(QWidget):
         layout.addWidget(self.label)
         layout.addWidget(self.combo)
 
+class PointSeriesWindow(QWidget):
+    """Fenêtre affichant la série extraite au point cliqué sur la carte"""
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.Window)
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+        from matplotlib.figure import Figure
+        
+        layout = QVBoxLayout(self)
+        self.figure = Figure(figsize=(7, 4))
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        layout.addWidget(NavigationToolbar2QT(self.canvas, self))
+        layout.addWidget(self.canvas)
+        self.resize(800, 450)
+
 class VisualizationPanel(QWidget):
+    plot_updated = pyqtSignal(str)  # filename
+    # Nombre maximal de courbes dans la fenêtre de série au point
+    MAX_SERIES_LINES = 12
+    # Nombre maximal de panneaux en mode multi-panneaux
+    MAX_PANELS = 24
+    
     def __init__(self):
         super().__init__()
         self.translator = Translator()
@@ -66,24 +89,63 @@ class VisualizationPanel(QWidget):
         
         self.controls_layout.addLayout(viz_options)
         
+        # Axes du graphique (par défaut les deux dernières dimensions) :
+        # temps × longitude pour un diagramme de Hovmöller, niveau × latitude...
+        axes_options = QHBoxLayout()
+        self.y_axis_label = QLabel(self.translator.get_text("y_axis") + ":")
+        self.y_axis_selector = QComboBox()
+        self.x_axis_label = QLabel(self.translator.get_text("x_axis") + ":")
+        self.x_axis_selector = QComboBox()
+        axes_options.addWidget(self.y_axis_label)
+        axes_options.addWidget(self.y_axis_selector)
+        axes_options.addWidget(self.x_axis_label)
+        axes_options.addWidget(self.x_axis_selector)
+        
+        # Multi-panneaux : une carte par valeur d'une dimension
+        self.panels_label = QLabel(self.translator.get_text("panels") + ":")
+        self.panels_selector = QComboBox()
+        axes_options.addWidget(self.panels_label)
+        axes_options.addWidget(self.panels_selector)
+        axes_options.addStretch()
+        self.y_axis_selector.currentIndexChanged.connect(self.axes_changed)
+        self.x_axis_selector.currentIndexChanged.connect(self.axes_changed)
+        self.panels_selector.currentIndexChanged.connect(self.axes_changed)
+        self.controls_layout.addLayout(axes_options)
+        
+        # Comparaison avec la même variable d'un autre fichier ouvert
+        compare_options = QHBoxLayout()
+        self.compare_label = QLabel(self.translator.get_text("compare_with") + ":")
+        self.compare_selector = QComboBox()
+        self.compare_mode_selector = QComboBox()
+        for mode in compare.MODES:
+            self.compare_mode_selector.addItem(self.translator.get_text(f"compare_{mode}"), mode)
+        self.compare_stats_button = QPushButton(self.translator.get_text("compare_statistics"))
+        compare_options.addWidget(self.compare_label)
+        compare_options.addWidget(self.compare_selector, 1)
+        compare_options.addWidget(self.compare_mode_selector)
+        compare_options.addWidget(self.compare_stats_button)
+        self.compare_selector.currentIndexChanged.connect(self.compare_changed)
+        self.compare_mode_selector.currentIndexChanged.connect(self.update_plot)
+        self.compare_stats_button.clicked.connect(self.show_compare_statistics)
+        self.controls_layout.addLayout(compare_options)
+        
         # Ajouter le scroll area au layout principal
         self.layout.addWidget(scroll)
         
-        # Figure matplotlib avec barre d'outils
-        self.figure = Figure(figsize=(8, 6))
-        self.canvas = FigureCanvasQTAgg(self.figure)
-        self.toolbar = NavigationToolbar2QT(self.canvas, self)
-        
-        # Connecter le menu contextuel
-        self.canvas.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.canvas.customContextMenuRequested.connect(self.show_plot_context_menu)
+        # La figure matplotlib n'est créée qu'à l'ouverture du premier fichier
+        # (voir ensure_canvas) : l'import du backend Qt de matplotlib est coûteux
+        # et retarderait le premier affichage de la fenêtre.
+        self.figure = None
+        self.canvas = None
+        self.toolbar = None
+        self.placeholder = QLabel()
+        self.placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.placeholder.setText(self.translator.get_text("no_file_loaded"))
+        self.layout.addWidget(self.placeholder, 1)
         
         # Stocker le titre actuel
         self.current_title = ""
         
-        self.layout.addWidget(self.toolbar)
-        self.layout.addWidget(self.canvas)
-        
         # Données
         self.dataset = None
         self.current_var = None
@@ -93,8 +155,54 @@ class VisualizationPanel(QWidget):
         
         self.current_filename = None
         
+        # Mode direct : afficher automatiquement le dernier pas ajouté
+        self.follow_latest = True
+        
+        # Série au point cliqué : axes de la carte affichée et index des coordonnées
+        self.map_axes = None
+        self.map_dims = None
+        self.point_indexes = {}  # (id du dataset, dimensions): index des coordonnées
+        self.series_window = None
+        # Axes du mode multi-panneaux, réutilisés tant que la grille ne change pas
+        self.panel_layout = None
+        # Points cliqués pour une coupe (None hors du mode coupe)
+        self.section_points = None
+        # Variable du fichier comparé (None hors du mode comparaison)
+        self.compare_var = None
+        self.update_compare_selector()
+        
+    def ensure_canvas(self):
+        """Créer la figure matplotlib et sa barre d'outils au premier besoin"""
+        if self.canvas is not None:
+            return
+        
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+        from matplotlib.figure import Figure
+        
+        # Figure matplotlib avec barre d'outils
+        self.figure = Figure(figsize=(8, 6))
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        self.toolbar = NavigationToolbar2QT(self.canvas, self)
+        
+        # Connecter le menu contextuel
+        self.canvas.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.canvas.customContextMenuRequested.connect(self.show_plot_context_menu)
+        self.canvas.mpl_connect('button_press_event', self.map_clicked)
+        
+        # Remplacer le texte d'attente par la figure
+        self.layout.removeWidget(self.placeholder)
+        self.placeholder.setParent(None)
+        self.layout.addWidget(self.toolbar)
+        self.layout.addWidget(self.canvas)
+        
+    def draw_canvas(self):
+        """Redessiner la figure (mesuré dans les traces sous le nom 'render')"""
+        with tracing.span("render", variable=self.current_var):
+            self.canvas.draw()
+        
     def update_dataset(self, dataset, filename):
         """Mettre à jour ou ajouter un dataset"""
+        self.ensure_canvas()
         
         self.datasets[filename] = dataset
         
@@ -111,6 +219,45 @@ class VisualizationPanel(QWidget):
             self.file_selector.setCurrentText(filename)
             
         self.current_filename = filename
+        self.update_compare_selector()
+        
+    def remove_dataset(self, filename):
+        """Retirer un dataset fermé"""
+        if filename not in self.datasets:
+            return
+        del self.datasets[filename]
+        if self.dataset is not None and self.file_selector.currentText() == filename:
+            self.dataset = None
+            self.current_var = None
+        self.file_selector.clear()
+        self.file_selector.addItems(sorted(self.datasets.keys()))
+        self.update_compare_selector()
+        if not self.datasets and self.canvas is not None:
+            self.figure.clear()
+            self.draw_canvas()
+        
+    def extend_dimension(self, filename, dataset, dim_name, start):
+        """Compléter le sélecteur d'une dimension qui a grandi (mode direct)"""
+        self.datasets[filename] = dataset
+        if self.file_selector.currentText() != filename:
+            return
+        self.dataset = dataset
+        if self.current_var is None or dim_name not in self.dataset[self.current_var].dims:
+            return
+        
+        var = self.dataset[self.current_var]
+        plot_dims = self.plot_dims(var)
+        selector = self.dim_selectors.get(dim_name)
+        if selector is not None and dim_name not in plot_dims:
+            selector.combo.blockSignals(True)
+            selector.combo.addItems(self.get_dimension_values(dim_name)[start:])
+            selector.combo.blockSignals(False)
+            if self.follow_latest:
+                # Déclenche update_plot
+                selector.combo.setCurrentIndex(selector.combo.count() - 1)
+        else:
+            # La dimension est un axe du graphique : retracer
+            self.update_plot()
         
     def get_dimension_values(self, dim_name):
         """Récupérer les valeurs d'une dimension, y compris pour les variables de type caractère"""
@@ -139,6 +286,7 @@ class VisualizationPanel(QWidget):
         var_name = self.var_selector.currentText()
         var = self.dataset[var_name]
         self.current_var = var_name
+        self.update_compare_selector()
         
         # Déconnecter temporairement les signaux
         for selector in self.dim_selectors.values():
@@ -164,15 +312,72 @@ class VisualizationPanel(QWidget):
                 selector.combo.addItems(values)
                 selector.combo.currentIndexChanged.connect(self.update_plot)
         
+        # Choix des axes, proposé à partir de trois dimensions
+        for number, combo in enumerate((self.y_axis_selector, self.x_axis_selector)):
+            combo.blockSignals(True)
+            combo.clear()
+            if len(var.dims) >= 3:
+                combo.addItems(var.dims)
+                combo.setCurrentIndex(len(var.dims) - 2 + number)
+            combo.setEnabled(len(var.dims) >= 3)
+            combo.blockSignals(False)
+        self.panels_selector.blockSignals(True)
+        self.panels_selector.clear()
+        if len(var.dims) >= 3:
+            self.panels_selector.addItem(self.translator.get_text("panels_none"), None)
+            for dim_name in var.dims:
+                self.panels_selector.addItem(dim_name, dim_name)
+        self.panels_selector.setEnabled(len(var.dims) >= 3)
+        self.panels_selector.blockSignals(False)
+        self.update_axis_selectors(var)
+        
         # Mettre à jour le graphique
         self.update_plot()
+        
+    def plot_dims(self, var):
+        """Dimensions des axes (y, x) : choisies par l'utilisateur, sinon les deux dernières"""
+        y_dim = self.y_axis_selector.currentText()
+        x_dim = self.x_axis_selector.currentText()
+        if y_dim in var.dims and x_dim in var.dims and y_dim != x_dim:
+            return [y_dim, x_dim]
+        return list(var.dims)[-2:]
+        
+    def panel_dim(self, var):
+        """Dimension parcourue par les panneaux (None hors du mode multi-panneaux)"""
+        dim_name = self.panels_selector.currentData()
+        if dim_name in var.dims and dim_name not in self.plot_dims(var):
+            return dim_name
+        return None
+        
+    def update_axis_selectors(self, var):
+        """Désactiver les sélecteurs des dimensions affichées sur les axes"""
+        plot_dims = self.plot_dims(var) if len(var.dims) >= 3 else var.dims
+        panel_dim = self.panel_dim(var) if len(var.dims) >= 3 else None
+        for dim_name, selector in self.dim_selectors.items():
+            # Multi-panneaux : le sélecteur donne le premier panneau
+            selector.setEnabled(dim_name not in plot_dims or dim_name == panel_dim)
+        # Les dimensions des axes ne peuvent pas être parcourues par les panneaux
+        model = self.panels_selector.model()
+        for row in range(1, self.panels_selector.count()):
+            item = model.item(row)
+            item.setEnabled(self.panels_selector.itemData(row) not in plot_dims)
+        
+    def axes_changed(self):
+        """Changer les dimensions affichées sur les axes"""
+        if self.dataset is None or self.current_var is None:
+            return
+        if self.y_axis_selector.currentText() == self.x_axis_selector.currentText():
+            return
+        self.update_axis_selectors(self.dataset[self.current_var])
+        self.update_plot()
             
     def update_plot(self):
         """Mettre à jour le graphique"""
-        if self.dataset is None or self.current_var is None:
+        if self.dataset is None or self.current_var is None or self.canvas is None:
             return
         
         var = self.dataset[self.current_var]
+        self.map_axes = None
         
         # Créer un dictionnaire des indices pour chaque dimension
         selection = {}
@@ -189,20 +394,29 @@ class VisualizationPanel(QWidget):
         elif ndims == 2:  # Variable 2D (carte ou autre)
             self.plot_2d(var)
         else:  # Variables avec plus de dimensions
-            # Extraire les deux dernières dimensions pour l'affichage
-            plot_dims = list(var.dims)[-2:]
+            # Dimensions des axes (par défaut les deux dernières)
+            plot_dims = self.plot_dims(var)
+            panel_dim = self.panel_dim(var)
+            if panel_dim is not None:
+                self.plot_small_multiples(var, plot_dims, panel_dim, selection)
+                self.plot_updated.emit(self.file_selector.currentText())
+                return
             
-            # Créer la sélection pour extraire les données
-            for dim in var.dims:
-                if dim not in plot_dims:
-                    var = var.isel({dim: selection[dim]})
-                    
-            # Extraire les données et les coordonnées
-            data = var.values
+            with tracing.span("slice", variable=self.current_var) as span:
+                # Créer la sélection pour extraire les données
+                indexers = {dim: selection[dim] for dim in var.dims if dim not in plot_dims}
+                        
+                # Extraire les données (chunk par chunk, avec cache) et les coordonnées
+                data = self.read_values(var, indexers)
+                span.set(bytes=data.nbytes)
+            if [dim for dim in var.dims if dim in plot_dims] != plot_dims:
+                data = data.T
             x_coords = self.dataset[plot_dims[1]].values
             y_coords = self.dataset[plot_dims[0]].values
             
             self.plot_data(data, x_coords, y_coords, plot_dims)
+        
+        self.plot_updated.emit(self.file_selector.currentText())
 
     def plot_scalar(self, var):
         """Afficher une variable scalaire"""
@@ -217,7 +431,7 @@ class VisualizationPanel(QWidget):
         self.current_title = f"Valeur de {var.name}"
         ax.set_title(self.current_title)
         
-        self.canvas.draw()
+        self.draw_canvas()
 
     def plot_1d(self, var):
         """Afficher une variable 1D"""
@@ -232,19 +446,23 @@ class VisualizationPanel(QWidget):
             x = np.arange(len(var))
         
         # Tracer la ligne
-        ax.plot(x, var.values)
+        with tracing.span("slice", variable=var.name) as span:
+            values = self.read_values(var, {})
+            span.set(bytes=values.nbytes)
+        ax.plot(x, values)
         
         # Labels
         ax.set_xlabel(dim_name)
         ax.set_ylabel(var.name)
-        if hasattr(var, 'units'):
-            ax.set_ylabel(f"{var.name} ({var.units})")
+        units = self.value_units(var)
+        if units:
+            ax.set_ylabel(f"{var.name} ({units})")
         
         ax.grid(True)
-        self.current_title = f"Variable {var.name}"
+        self.current_title = f"Variable {var.name}{self.compare_title()}"
         ax.set_title(self.current_title)
         
-        self.canvas.draw()
+        self.draw_canvas()
 
     def plot_2d(self, var):
         """Afficher une variable 2D"""
@@ -265,52 +483,469 @@ class VisualizationPanel(QWidget):
         else:
             y_coords = np.arange(var.shape[0])
         
+        with tracing.span("slice", variable=var.name) as span:
+            values = self.read_values(var, {})
+            span.set(bytes=values.nbytes)
+        
         # Créer le graphique
-        im = ax.pcolormesh(x_coords, y_coords, var.values,
-                          cmap=self.colormap_selector.currentText(),
-                          shading='auto')
+        im = ax.pcolormesh(x_coords, y_coords, values, shading='auto', **self.color_options())
         
         # Ajouter une barre de couleur
-        units = var.attrs.get('units', '')
-        self.figure.colorbar(im, ax=ax, label=units)
+        self.figure.colorbar(im, ax=ax, label=self.value_units(var))
         
         # Configurer les axes
         ax.set_xlabel(dim_names[1])
         ax.set_ylabel(dim_names[0])
-        self.current_title = var.name
+        self.current_title = var.name + self.compare_title()
         ax.set_title(self.current_title)
         
-        self.canvas.draw()
+        self.draw_canvas()
 
     def plot_data(self, data, x_coords, y_coords, dims):
         """Tracer les données"""
         self.figure.clear()
         ax = self.figure.add_subplot(111)
         
+        # Grille curviligne : tracer en longitude/latitude 2-D
+        x_label, y_label = dims[1], dims[0]
+        geographic = point_index.geographic_coordinates(self.dataset, dims)
+        if geographic is not None:
+            lat, lon = geographic
+            x_coords, y_coords = lon.values, lat.values
+            x_label, y_label = lon.name, lat.name
+        
         # Créer le graphique
-        im = ax.pcolormesh(x_coords, y_coords, data,
-                          cmap=self.colormap_selector.currentText(),
-                          shading='auto')
+        im = ax.pcolormesh(x_coords, y_coords, data, shading='auto', **self.color_options())
         
         # Ajouter une barre de couleur
         var = self.dataset[self.current_var]
-        units = var.attrs.get('units', '')
-        self.figure.colorbar(im, ax=ax, label=units)
+        self.figure.colorbar(im, ax=ax, label=self.value_units(var))
         
         # Configurer les axes
-        ax.set_xlabel(dims[1])
-        ax.set_ylabel(dims[0])
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        
+        # Un clic sur la carte affiche la série en ce point
+        self.map_axes = ax
+        self.map_dims = tuple(dims)
         
         # Titre
-        title_parts = [self.current_var]
+        title_parts = [self.current_var + self.compare_title()]
         for dim_name, selector in self.dim_selectors.items():
             if dim_name not in dims:
                 title_parts.append(f"{dim_name}: {selector.combo.currentText()}")
         self.current_title = ' | '.join(title_parts)
         ax.set_title(self.current_title)
         
-        self.canvas.draw()
+        self.draw_canvas()
+        
+    def plot_small_multiples(self, var, plot_dims, panel_dim, selection):
+        """Une carte par valeur de ``panel_dim`` (à partir de la valeur sélectionnée).
+
+        Toutes les cartes sont lues en une seule sélection rectangulaire,
+        partagent la même échelle de couleurs et sont sous-échantillonnées à
+        la taille en pixels de leur panneau avant le tracé.
+        """
+        first = max(selection.get(panel_dim, 0), 0)
+        count = min(var.sizes[panel_dim] - first, self.MAX_PANELS)
+        if count < 1:
+            first, count = 0, min(var.sizes[panel_dim], self.MAX_PANELS)
+        
+        # Une seule lecture pour tous les panneaux
+        with tracing.span("slice", variable=self.current_var, panels=count) as span:
+            indexers = {dim: selection[dim] for dim in var.dims
+                        if dim not in plot_dims and dim != panel_dim}
+            indexers[panel_dim] = slice(first, first + count)
+            data = self.read_values(var, indexers)
+            span.set(bytes=data.nbytes)
+        remaining = [dim for dim in var.dims if dim not in indexers or dim == panel_dim]
+        data = np.moveaxis(data, [remaining.index(panel_dim), remaining.index(plot_dims[0]),
+                                  remaining.index(plot_dims[1])], [0, 1, 2])
+        
+        # Échelle de couleurs commune
+        with np.errstate(all='ignore'):
+            finite = data[np.isfinite(data)] if data.dtype.kind == 'f' else data
+            vmin, vmax = (float(finite.min()), float(finite.max())) if finite.size else (0, 1)
+        options = self.color_options()
+        if 'norm' in options:
+            # Différences : échelle symétrique autour de zéro
+            vmax = max(abs(vmin), abs(vmax)) or 1
+            vmin = -vmax
+        
+        # Grille de panneaux proche des proportions de la figure
+        width, height = self.canvas.width(), self.canvas.height()
+        ncols = max(1, min(count, int(np.ceil(np.sqrt(count * width / max(height, 1))))))
+        nrows = int(np.ceil(count / ncols))
+        
+        # Sous-échantillonnage : environ un point par pixel de panneau
+        step_y = max(1, -(-data.shape[1] // max(height // nrows, 16)))
+        step_x = max(1, -(-data.shape[2] // max(width // ncols, 16)))
+        data = data[:, ::step_y, ::step_x]
+        geographic = point_index.geographic_coordinates(self.dataset, plot_dims)
+        if geographic is not None:
+            lat, lon = geographic
+            x_coords = lon.values[::step_y, ::step_x]
+            y_coords = lat.values[::step_y, ::step_x]
+        else:
+            x_coords = self.dataset[plot_dims[1]].values[::step_x]
+            y_coords = self.dataset[plot_dims[0]].values[::step_y]
+        
+        labels = self.get_dimension_values(panel_dim)
+        cmap = options['cmap']
+        units = self.value_units(var)
+        
+        # Même grille que le tracé précédent (autre premier panneau, autre
+        # sélection) : mettre à jour les valeurs sans recréer les axes
+        layout = (self.current_var, tuple(plot_dims), panel_dim, count, nrows, ncols,
+                  data.shape, cmap, units, geographic is not None)
+        panels = self.panel_layout
+        if (panels is None or panels['layout'] != layout
+                or any(ax not in self.figure.axes for ax in panels['axes'])):
+            self.figure.clear()
+            axes = self.figure.subplots(nrows, ncols, squeeze=False)
+            meshes = []
+            for number, ax in enumerate(axes.ravel()):
+                if number >= count:
+                    ax.set_visible(False)
+                    continue
+                meshes.append(ax.pcolormesh(x_coords, y_coords, data[number], cmap=cmap,
+                                            vmin=vmin, vmax=vmax, shading='auto'))
+                # Graduations sur la première colonne et la dernière ligne
+                # seulement : leur calcul domine le temps de tracé des panneaux
+                row, column = divmod(number, ncols)
+                if column > 0:
+                    ax.set_yticks([])
+                if row < nrows - 1 and number + ncols < count:
+                    ax.set_xticks([])
+                ax.tick_params(labelsize='x-small')
+            colorbar = self.figure.colorbar(meshes[-1], ax=axes.ravel().tolist(), label=units)
+            panels = {'layout': layout, 'axes': list(axes.ravel()[:count]), 'meshes': meshes,
+                      'colorbar': colorbar}
+            self.panel_layout = panels
+        else:
+            for number, mesh in enumerate(panels['meshes']):
+                mesh.set_array(data[number])
+                mesh.set_clim(vmin, vmax)
+            panels['colorbar'].update_normal(panels['meshes'][-1])
+        for number, ax in enumerate(panels['axes']):
+            ax.set_title(f"{panel_dim}: {labels[first + number]}", fontsize='small')
+        
+        title_parts = [self.current_var + self.compare_title()]
+        for dim_name, selector in self.dim_selectors.items():
+            if dim_name not in plot_dims and dim_name != panel_dim:
+                title_parts.append(f"{dim_name}: {selector.combo.currentText()}")
+        self.current_title = ' | '.join(title_parts)
+        self.figure.suptitle(self.current_title)
+        
+        self.draw_canvas()
+        
+    def update_compare_selector(self):
+        """Proposer les autres fichiers ouverts qui contiennent la variable affichée"""
+        current = self.compare_selector.currentData()
+        displayed = self.file_selector.currentText()
+        self.compare_selector.blockSignals(True)
+        self.compare_selector.clear()
+        self.compare_selector.addItem(self.translator.get_text("compare_none"), None)
+        for filename in sorted(self.datasets):
+            if filename != displayed and self.current_var in self.datasets[filename].variables:
+                self.compare_selector.addItem(os.path.basename(filename), filename)
+                self.compare_selector.setItemData(self.compare_selector.count() - 1, filename,
+                                                  Qt.ItemDataRole.ToolTipRole)
+        index = self.compare_selector.findData(current)
+        self.compare_selector.setCurrentIndex(max(index, 0))
+        self.compare_selector.blockSignals(False)
+        self.refresh_compare_var()
+        
+    def refresh_compare_var(self):
+        """Variable comparée, après vérification de l'alignement des grilles"""
+        filename = self.compare_selector.currentData()
+        self.compare_var = None
+        if (filename in self.datasets and self.dataset is not None
+                and self.current_var in self.dataset.variables):
+            try:
+                compare.check_alignment(self.dataset, self.datasets[filename], self.current_var)
+                self.compare_var = self.datasets[filename][self.current_var]
+            except ValueError as e:
+                QMessageBox.warning(
+                    self,
+                    self.translator.get_text("warning"),
+                    self.translator.get_text("compare_error", str(e))
+                )
+                self.compare_selector.blockSignals(True)
+                self.compare_selector.setCurrentIndex(0)
+                self.compare_selector.blockSignals(False)
+        self.compare_mode_selector.setEnabled(self.compare_var is not None)
+        self.compare_stats_button.setEnabled(self.compare_var is not None)
+        
+    def compare_changed(self):
+        """Activer ou changer la comparaison"""
+        self.refresh_compare_var()
+        self.update_plot()
+        
+    def compare_mode(self):
+        return self.compare_mode_selector.currentData()
+        
+    def read_values(self, var, indexers):
+        """Tranche de la variable affichée, ou de sa comparaison avec l'autre fichier"""
+        if self.compare_var is not None:
+            return compare.slice_difference(var, self.compare_var, indexers, self.compare_mode())
+        return chunk_reader.read(var, indexers)
+        
+    def color_options(self):
+        """Palette du tracé : divergente et centrée sur zéro pour les différences"""
+        if self.compare_var is not None and self.compare_mode() != 'ratio':
+            from matplotlib.colors import CenteredNorm
+            return {'cmap': 'RdBu_r', 'norm': CenteredNorm()}
+        return {'cmap': self.colormap_selector.currentText()}
+        
+    def value_units(self, var):
+        """Unités des valeurs tracées"""
+        if self.compare_var is not None and self.compare_mode() == 'ratio':
+            return ''
+        if self.compare_var is not None and self.compare_mode() == 'percent':
+            return '%'
+        return var.attrs.get('units', '')
+        
+    def compare_title(self):
+        """Suffixe du titre en mode comparaison, par exemple « [a.nc − b.nc] »"""
+        if self.compare_var is None:
+            return ""
+        first = os.path.basename(self.file_selector.currentText())
+        second = os.path.basename(self.compare_selector.currentData())
+        mode = self.compare_mode()
+        if mode == 'ratio':
+            return f" [{first} / {second}]"
+        if mode == 'percent':
+            return f" [({first} − {second}) / {second} %]"
+        return f" [{first} − {second}]"
+        
+    def show_compare_statistics(self):
+        """Biais, RMSE et écart maximal sur les variables entières"""
+        if self.compare_var is None:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            stats = compare.statistics(self.dataset[self.current_var], self.compare_var)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(
+                self,
+                self.translator.get_text("error"),
+                self.translator.get_text("compare_error", str(e))
+            )
+            return
+        QApplication.restoreOverrideCursor()
+        if not stats['count']:
+            text = self.translator.get_text("compare_no_values")
+        else:
+            text = self.translator.get_text(
+                "compare_statistics_result", self.current_var + self.compare_title(),
+                f"{stats['count']:,}", f"{stats['bias']:.6g}", f"{stats['rmse']:.6g}",
+                f"{stats['max_abs']:.6g}")
+        QMessageBox.information(self, self.translator.get_text("compare_statistics"), text)
+        
+    def map_clicked(self, event):
+        """Afficher la série de la maille cliquée (hors zoom et déplacement)"""
+        if (event.button != 1 or self.map_axes is None or event.inaxes is not self.map_axes
+                or event.xdata is None or (self.toolbar is not None and self.toolbar.mode)):
+            return
+        if self.section_points is not None:
+            self.add_section_point(event.xdata, event.ydata)
+            return
+        try:
+            row, column = self.find_cell(event.xdata, event.ydata)
+            self.show_point_series(row, column)
+        except Exception as e:
+            QMessageBox.warning(self, self.translator.get_text("warning"),
+                                self.translator.get_text("point_series_error", str(e)))
+
+    def find_cell(self, x, y):
+        """Indices (ligne, colonne) de la maille la plus proche d'un point de la carte"""
+        key = (id(self.dataset), self.map_dims)
+        index = self.point_indexes.get(key)
+        if index is None:
+            geographic = point_index.geographic_coordinates(self.dataset, self.map_dims)
+            if geographic is not None:
+                lat, lon = geographic
+                index = point_index.GridIndex(lat.values, lon.values)
+            else:
+                index = tuple(point_index.AxisIndex(self._axis_values(dim)) for dim in self.map_dims)
+            self.point_indexes = {key: index}
+        if isinstance(index, point_index.GridIndex):
+            return tuple(int(i) for i in index.nearest(y, x))
+        return index[0].nearest(y), index[1].nearest(x)
+
+    def _axis_values(self, dim):
+        """Valeurs d'un axe de la carte, dans les unités des axes matplotlib"""
+        if dim not in self.dataset.variables:
+            return np.arange(self.dataset.sizes[dim])
+        values = self.dataset[dim].values
+        if values.dtype.kind == 'M':
+            from matplotlib.dates import date2num
+            return date2num(values)
+        if values.dtype.kind not in 'iuf':
+            return np.arange(len(values))
+        return values
+
+    def show_point_series(self, row, column):
+        """Tracer la variable affichée le long des dimensions restantes en une maille"""
+        var = self.dataset[self.current_var]
+        y_dim, x_dim = self.map_dims
+        others = [dim for dim in var.dims if dim not in self.map_dims]
+        if not others:
+            return
+        
+        # Axe des abscisses : le temps ; une courbe par valeur de la première autre
+        # dimension si elle est courte, les suivantes restent à l'indice sélectionné
+        unlimited = self.dataset.encoding.get('unlimited_dims', ())
+        x_axis = time_dimension(var.variable, unlimited)
+        if x_axis not in others:
+            x_axis = others[-1]
+        rest = [dim for dim in others if dim != x_axis]
+        line_dim = rest[0] if rest and var.sizes[rest[0]] <= self.MAX_SERIES_LINES else None
+        indexers = {y_dim: row, x_dim: column}
+        for dim in rest:
+            if dim != line_dim:
+                indexers[dim] = max(self.dim_selectors[dim].combo.currentIndex(), 0)
+        
+        # Une seule sélection rectangulaire : un hyperslab (lu chunk par chunk)
+        with tracing.span("point_series", variable=self.current_var) as span:
+            values = chunk_reader.read(var, indexers)
+            span.set(bytes=values.nbytes)
+        remaining = [dim for dim in var.dims if dim not in indexers]
+        values = np.moveaxis(values, remaining.index(x_axis), -1).reshape(-1, var.sizes[x_axis])
+        
+        if self.series_window is None:
+            self.series_window = PointSeriesWindow(self)
+        figure = self.series_window.figure
+        figure.clear()
+        ax = figure.add_subplot(111)
+        x_values = self.dataset[x_axis].values if x_axis in self.dataset.variables \
+            else np.arange(var.sizes[x_axis])
+        labels = self.get_dimension_values(line_dim) if line_dim else [None]
+        for line, label in zip(values, labels):
+            ax.plot(x_values, line, label=label)
+        if line_dim:
+            ax.legend(title=line_dim, fontsize='small')
+        ax.set_xlabel(x_axis)
+        units = var.attrs.get('units', '')
+        ax.set_ylabel(f"{self.current_var} ({units})" if units else self.current_var)
+        ax.grid(True)
+        
+        y_text = self.dim_value_text(y_dim, row)
+        x_text = self.dim_value_text(x_dim, column)
+        title = f"{self.current_var} | {y_dim}: {y_text}, {x_dim}: {x_text}"
+        ax.set_title(title)
+        if np.asarray(x_values).dtype.kind == 'M':
+            figure.autofmt_xdate()
+        self.series_window.setWindowTitle(self.translator.get_text("point_series_title", title))
+        self.series_window.canvas.draw()
+        self.series_window.show()
+        self.series_window.raise_()
+        
+        # Repérer la maille sur la carte
+        if self.map_axes is not None:
+            for artist in self.map_axes.lines[:]:
+                artist.remove()
+            x_coords, y_coords = self.map_point(row, column)
+            self.map_axes.plot([x_coords], [y_coords], marker='+', color='red', markersize=12)
+            self.draw_canvas()
+
+    def start_section(self):
+        """Passer en mode coupe : les deux prochains clics sur la carte définissent le segment"""
+        if self.map_axes is None:
+            return
+        self.section_points = []
+        self.map_axes.set_title(self.translator.get_text("section_hint"))
+        self.draw_canvas()
+
+    def add_section_point(self, x, y):
+        """Enregistrer une extrémité de la coupe ; la coupe est tracée au second clic"""
+        self.section_points.append((x, y))
+        self.map_axes.plot([x], [y], marker='o', color='red')
+        if len(self.section_points) == 1:
+            self.draw_canvas()
+            return
+        start, end = self.section_points
+        self.section_points = None
+        try:
+            self.show_section(start, end)
+        except Exception as e:
+            QMessageBox.warning(self, self.translator.get_text("warning"),
+                                self.translator.get_text("section_error", str(e)))
+            self.update_plot()
+
+    def show_section(self, start, end, samples=sections.DEFAULT_SAMPLES):
+        """Tracer la variable le long du segment (start, end) de la carte"""
+        var = self.dataset[self.current_var]
+        y_dim, x_dim = self.map_dims
+        x_label, y_label = self.map_axes.get_xlabel(), self.map_axes.get_ylabel()
+        x_path, y_path, distance = sections.sample_path(start, end, samples)
+        
+        geographic = point_index.geographic_coordinates(self.dataset, self.map_dims)
+        if geographic is not None:
+            # Grille curviligne : maille la plus proche de chaque point (sans interpolation)
+            self.find_cell(*start)
+            index = self.point_indexes[(id(self.dataset), self.map_dims)]
+            cells = np.array([index.nearest(y, x) for x, y in zip(x_path, y_path)])
+            fy, fx = cells[:, 0], cells[:, 1]
+        else:
+            fy = sections.fractional_index(self._axis_values(y_dim), y_path)
+            fx = sections.fractional_index(self._axis_values(x_dim), x_path)
+        
+        # Axe vertical de la coupe : le temps (ou la première autre dimension) ;
+        # les autres dimensions restent à l'indice sélectionné
+        others = [dim for dim in var.dims if dim not in self.map_dims]
+        unlimited = self.dataset.encoding.get('unlimited_dims', ())
+        vertical = time_dimension(var.variable, unlimited) if others else None
+        if vertical not in others:
+            vertical = others[0] if others else None
+        indexers = {dim: max(self.dim_selectors[dim].combo.currentIndex(), 0)
+                    for dim in others if dim != vertical}
+        
+        with tracing.span("section", variable=self.current_var, samples=samples) as span:
+            values = sections.extract_section(var, y_dim, x_dim, fy, fx, indexers)
+            span.set(bytes=values.nbytes)
         
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
+        units = var.attrs.get('units', '')
+        if vertical is not None:
+            vertical_values = self.dataset[vertical].values
+            im = ax.pcolormesh(distance, vertical_values, values,
+                               cmap=self.colormap_selector.currentText(), shading='auto')
+            self.figure.colorbar(im, ax=ax, label=units)
+            ax.set_ylabel(vertical)
+        else:
+            ax.plot(distance, values)
+            ax.set_ylabel(f"{self.current_var} ({units})" if units else self.current_var)
+            ax.grid(True)
+        ax.set_xlabel(self.translator.get_text("distance"))
+        
+        title_parts = [self.current_var,
+                       f"{x_label}, {y_label}: ({start[0]:.4g}, {start[1]:.4g}) → ({end[0]:.4g}, {end[1]:.4g})"]
+        for dim_name, index in indexers.items():
+            title_parts.append(f"{dim_name}: {self.dim_selectors[dim_name].combo.itemText(index)}")
+        self.current_title = ' | '.join(title_parts)
+        ax.set_title(self.current_title)
+        self.map_axes = None
+        self.draw_canvas()
+
+    def map_point(self, row, column):
+        """Position sur la carte de la maille (ligne, colonne)"""
+        geographic = point_index.geographic_coordinates(self.dataset, self.map_dims)
+        if geographic is not None:
+            lat, lon = geographic
+            return lon.values[row, column], lat.values[row, column]
+        y_dim, x_dim = self.map_dims
+        return self._axis_values(x_dim)[column], self._axis_values(y_dim)[row]
+
+    def dim_value_text(self, dim, index):
+        """Valeur affichée d'une dimension à un indice"""
+        if dim in self.dataset.variables and self.dataset[dim].ndim == 1:
+            return str(self.dataset[dim].values[index])
+        return str(index)
+
     def file_changed(self):
         """Gérer le changement de fichier"""
         filename = self.file_selector.currentText()
@@ -335,6 +970,11 @@ class VisualizationPanel(QWidget):
         edit_title_action = menu.addAction(self.translator.get_text("edit_title"))
         edit_title_action.triggered.connect(self.edit_plot_title)
         
+        # Coupe le long d'un segment de la carte
+        if self.map_axes is not None:
+            section_action = menu.addAction(self.translator.get_text("section"))
+            section_action.triggered.connect(self.start_section)
+        
         # Option pour exporter l'image
         export_submenu = QMenu(self.translator.get_text("export_image"), menu)
         export_png = export_submenu.addAction("PNG")
@@ -379,7 +1019,7 @@ class VisualizationPanel(QWidget):
         if ok:
             self.current_title = new_title
             self.figure.gca().set_title(new_title)
-            self.canvas.draw()
+            self.draw_canvas()
 
     def export_plot(self, format_):
         """Exporter le graphique dans différents formats"""
@@ -416,19 +1056,18 @@ class VisualizationPanel(QWidget):
         """Activer/désactiver la grille"""
         ax = self.figure.gca()
         ax.grid(not ax.grid())
-        self.canvas.draw()
+        self.draw_canvas()
 
     def auto_scale(self):
         """Ajuster automatiquement l'échelle"""
         self.figure.gca().autoscale()
-        self.canvas.draw()
+        self.draw_canvas()
 
     def handle_visualization_request(self, filename, var_name, dim_name, index):
         """Gérer une demande de visualisation depuis le DataPanel"""
         
         # S'assurer que le dataset est disponible
         if filename not in self.datasets:
-            print(f"Dataset {filename} non trouvé")
             return
         
         # Changer de fichier si nécessaire
@@ -450,10 +1089,47 @@ class VisualizationPanel(QWidget):
                         selector.combo.setCurrentIndex(index)
                         # Pas besoin d'appeler update_plot() car le signal currentIndexChanged le fera
 
+    def show_comparison(self, file_a, file_b, var_name, starts):
+        """Afficher la différence A − B d'une variable à partir des indices ``starts``"""
+        if file_a not in self.datasets or file_b not in self.datasets:
+            return
+        if self.file_selector.currentText() != file_a:
+            self.file_selector.setCurrentText(file_a)
+        var_index = self.var_selector.findText(var_name)
+        if var_index < 0:
+            return
+        if self.var_selector.currentIndex() != var_index:
+            self.var_selector.setCurrentIndex(var_index)
+        # Dimensions non tracées : premier indice de la région
+        for dim_name, selector in self.dim_selectors.items():
+            index = starts.get(dim_name)
+            if index is not None and 0 <= index < selector.combo.count():
+                selector.combo.blockSignals(True)
+                selector.combo.setCurrentIndex(index)
+                selector.combo.blockSignals(False)
+        compare_index = self.compare_selector.findData(file_b)
+        if compare_index < 0:
+            self.update_compare_selector()
+            compare_index = self.compare_selector.findData(file_b)
+        self.compare_selector.blockSignals(True)
+        self.compare_selector.setCurrentIndex(max(compare_index, 0))
+        self.compare_selector.blockSignals(False)
+        self.compare_changed()
+
     def retranslate_ui(self):
         """Mettre à jour les textes après un changement de langue"""
         # Mettre à jour les labels des sélecteurs
         for i, label_text in enumerate(["file", "variable", "colormap"]):
             label_widget = self.controls_layout.itemAt(0).layout().itemAt(i * 2).widget()
             if isinstance(label_widget, QLabel):
-                label_widget.setText(self.translator.get_text(label_text) + ":")
\ No newline at end of file
+                label_widget.setText(self.translator.get_text(label_text) + ":")
+        self.y_axis_label.setText(self.translator.get_text("y_axis") + ":")
+        self.x_axis_label.setText(self.translator.get_text("x_axis") + ":")
+        self.panels_label.setText(self.translator.get_text("panels") + ":")
+        if self.panels_selector.count():
+            self.panels_selector.setItemText(0, self.translator.get_text("panels_none"))
+        self.compare_label.setText(self.translator.get_text("compare_with") + ":")
+        self.compare_selector.setItemText(0, self.translator.get_text("compare_none"))
+        for index, mode in enumerate(compare.MODES):
+            self.compare_mode_selector.setItemText(index, self.translator.get_text(f"compare_{mode}"))
+        self.compare_stats_button.setText(self.translator.get_text("compare_statistics"))
\ No newline at end of file
@@ -1,5 +1,9 @@
+# Premier import : sert d'origine aux mesures de temps de démarrage
+from netcdflab.utils import startup_timing
+
 import sys
 import os
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication
 from netcdflab.gui.main_window import MainWindow
 
@@ -7,25 +11,43 @@ sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 from netcdflab.utils.translations import Translator
 
+def open_files_from_args(window, args):
+    """Ouvrir les fichiers passés en arguments (après le premier affichage)"""
+    for arg in args:
+        if arg.lower().endswith('.nc'):
+            window.data_panel.load_netcdf(arg)
+            window.menu_bar.add_recent_file(arg)
+        elif arg.lower().endswith('.netcdf'):
+            window.data_panel.load_netcdf(arg)
+            window.menu_bar.add_recent_file(arg)
+    if window.data_panel.pending_files:
+        # Les fichiers affichés depuis le cache sont ouverts par des timers
+        # déjà programmés : ce timer s'exécute après le dernier d'entre eux
+        QTimer.singleShot(0, lambda: files_loaded(window))
+    elif args:
+        files_loaded(window)
+
+def files_loaded(window):
+    """Jalon de fin d'ouverture des fichiers, ajouté au rapport déjà enregistré"""
+    startup_timing.mark("files_loaded")
+    startup_timing.save_report(window.menu_bar.get_app_data_path())
+
 def main():
+    startup_timing.mark("imports_done")
     app = QApplication(sys.argv)
     
     # Créer l'instance du traducteur et charger les préférences
     translator = Translator()
     
     window = MainWindow()
+    startup_timing.mark("window_created")
     window.show()
     
-    # Ouvrir tous les fichiers passés en arguments
-    for arg in sys.argv[1:]:
-        if arg.lower().endswith('.nc'):
-            window.data_panel.load_netcdf(arg)
-            window.menu_bar.add_recent_file(arg)
-        elif arg.lower().endswith('.netcdf'):
-            window.data_panel.load_netcdf(arg)
-            window.menu_bar.add_recent_file(arg)
+    # Ouvrir tous les fichiers passés en arguments une fois la fenêtre affichée :
+    # les imports scientifiques (xarray, matplotlib) ne sont faits qu'à ce moment
+    window.first_painted.connect(lambda: open_files_from_args(window, sys.argv[1:]))
     
     sys.exit(app.exec())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
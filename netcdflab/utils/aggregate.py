@@ -0,0 +1,145 @@
+"""Agrégation virtuelle de plusieurs fichiers NetCDF le long d'une dimension.
+
+``open_aggregate(files, dim='time')`` combine par exemple des fichiers
+journaliers en un seul dataset xarray, comme ``xarray.open_mfdataset`` mais
+sans dask. Seuls les en-têtes et la coordonnée ``dim`` de chaque fichier
+sont lus à l'ouverture ; les variables qui dépendent de ``dim`` sont des
+tableaux différés qui ne lisent, pour une sélection donnée, que les
+fichiers qui la couvrent. Les autres variables sont prises dans le premier
+fichier.
+"""
+import os
+
+import numpy as np
+
+
+def aggregate_name(files, dim):
+    """Nom affiché d'un agrégat : motif commun des fichiers et dimension"""
+    names = [os.path.basename(f) for f in files]
+    prefix = os.path.commonprefix(names)
+    suffix = os.path.commonprefix([n[len(prefix):][::-1] for n in names])[::-1]
+    directory = os.path.dirname(os.path.abspath(files[0]))
+    return os.path.join(directory, f"{prefix}*{suffix} [{dim}]")
+
+
+def _lazy_array_class():
+    """Classe du tableau agrégé (xarray n'est importé qu'au premier agrégat)"""
+    from xarray.backends import BackendArray
+    from xarray.core import indexing
+
+    class AggregatedArray(BackendArray):
+        """Tableau différé formé de morceaux (un par fichier) le long d'un axe"""
+
+        def __init__(self, pieces, axis):
+            self.pieces = pieces  # variables xarray différées, une par fichier
+            self.axis = axis
+            lengths = [piece.shape[axis] for piece in pieces]
+            self.offsets = np.concatenate([[0], np.cumsum(lengths)])
+            shape = list(pieces[0].shape)
+            shape[axis] = int(self.offsets[-1])
+            self.shape = tuple(shape)
+            self.dtype = pieces[0].dtype
+
+        def __getitem__(self, key):
+            return indexing.explicit_indexing_adapter(
+                key, self.shape, indexing.IndexingSupport.OUTER, self._getitem)
+
+        def _getitem(self, key):
+            key = tuple(key)
+            positions = np.arange(self.shape[self.axis])[key[self.axis]]
+            scalar = positions.ndim == 0
+            positions = np.atleast_1d(positions)
+
+            # Regrouper les positions demandées par fichier (dans l'ordre demandé)
+            files = np.searchsorted(self.offsets, positions, side='right') - 1
+            parts = []
+            start = 0
+            while start < len(positions):
+                stop = start + 1
+                while stop < len(positions) and files[stop] == files[start]:
+                    stop += 1
+                number = files[start]
+                local = positions[start:stop] - self.offsets[number]
+                piece_key = list(key)
+                piece_key[self.axis] = local
+                parts.append(np.asarray(self.pieces[number][tuple(piece_key)].values))
+                start = stop
+
+            # Axe du résultat correspondant à la dimension agrégée
+            out_axis = sum(1 for k in key[:self.axis] if not isinstance(k, (int, np.integer)))
+            if not parts:
+                empty_key = list(key)
+                empty_key[self.axis] = slice(0, 0)
+                return np.asarray(self.pieces[0][tuple(empty_key)].values)
+            data = parts[0] if len(parts) == 1 else np.concatenate(parts, axis=out_axis)
+            return data.take(0, axis=out_axis) if scalar else data
+
+    return AggregatedArray, indexing
+
+
+def _sort_key(dataset, dim):
+    """Première valeur de la coordonnée d'agrégation (ordre des fichiers)"""
+    if dim in dataset.indexes and dataset.sizes[dim]:
+        return dataset.indexes[dim][0]
+    return None
+
+
+def open_aggregate(files, dim='time'):
+    """Ouvrir des fichiers comme un seul dataset différé concaténé le long de ``dim``"""
+    import xarray as xr
+
+    if not files:
+        raise ValueError("Aucun fichier à agréger")
+
+    # En-têtes : dimensions, variables et coordonnée d'agrégation
+    sources = []
+    try:
+        for filename in sorted(files):
+            dataset = xr.open_dataset(filename)
+            sources.append((filename, dataset))
+            if dim not in dataset.dims:
+                raise ValueError(f"La dimension '{dim}' est absente de {filename}")
+        aggregate = _combine(sources, dim)
+    finally:
+        # Les fichiers sont rouverts à la demande par xarray lors des lectures
+        for _, dataset in sources:
+            dataset.close()
+    return aggregate
+
+
+def _combine(sources, dim):
+    """Construire le dataset agrégé à partir des datasets ouverts"""
+    import xarray as xr
+
+    AggregatedArray, indexing = _lazy_array_class()
+
+    if all(_sort_key(ds, dim) is not None for _, ds in sources):
+        sources.sort(key=lambda item: _sort_key(item[1], dim))
+
+    first = sources[0][1]
+    variables = {}
+    for name, var in first.variables.items():
+        if dim not in var.dims:
+            variables[name] = var
+            continue
+        pieces = []
+        for filename, dataset in sources:
+            if name not in dataset.variables:
+                raise ValueError(f"La variable '{name}' est absente de {filename}")
+            piece = dataset.variables[name]
+            other = [s for d, s in zip(piece.dims, piece.shape) if d != dim]
+            if piece.dims != var.dims or other != [s for d, s in zip(var.dims, var.shape) if d != dim]:
+                raise ValueError(f"Dimensions de '{name}' différentes dans {filename}")
+            pieces.append(piece)
+        if name == dim:
+            # Coordonnée d'agrégation : concaténée en mémoire (index)
+            data = np.concatenate([piece.values for piece in pieces])
+        else:
+            data = indexing.LazilyIndexedArray(AggregatedArray(pieces, var.dims.index(dim)))
+        variables[name] = xr.Variable(var.dims, data, var.attrs, var.encoding)
+
+    coords = {name: variables.pop(name) for name in list(variables) if name in first.coords}
+    aggregate = xr.Dataset(variables, coords=coords, attrs=first.attrs)
+    aggregate.encoding['aggregate'] = {'dim': dim, 'files': [f for f, _ in sources]}
+    aggregate.encoding['unlimited_dims'] = set(first.encoding.get('unlimited_dims', ()))
+    return aggregate
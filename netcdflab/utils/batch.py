@@ -0,0 +1,249 @@
+"""Traitements par lots sur plusieurs fichiers NetCDF.
+
+Applique une liste ordonnée d'opérations (voir ``netcdflab.utils.operations``)
+à tous les fichiers correspondant à un motif, dans un pool de processus.
+Les fichiers sont chargés et sauvegardés avec ``netcdf_io``, comme dans
+l'application, pour que les résultats soient identiques.
+
+Utilisation en ligne de commande::
+
+    python -m netcdflab.utils.batch "data/*.nc" --operations ops.json \\
+        --output-dir corrected --workers 4 --memory-limit 2048 --report report.json
+
+où ``ops.json`` contient une liste d'opérations, par exemple::
+
+    [{"op": "set_attribute", "name": "institution", "value": "ATMO"},
+     {"op": "rename_variable", "old": "conc", "new": "concentration"},
+     {"op": "subset", "isel": {"time": [0, 24]}},
+     {"op": "recompress", "complevel": 4}]
+
+``--memory-limit`` est appliqué deux fois : les fichiers dont l'empreinte
+estimée dépasse le budget sont ignorés, puis l'espace d'adressage de chaque
+worker est borné (``RLIMIT_AS``) à sa taille au démarrage plus le budget.
+Un worker qui dépasse malgré tout le budget (estimation trop basse) échoue
+sur ce fichier avec « Mémoire insuffisante » au lieu d'épuiser la mémoire de
+la machine. Les fichiers ne sont pas découpés : chaque opération travaille
+sur le dataset complet. Sans module ``resource`` (Windows), seule
+l'estimation est appliquée.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from netcdflab.utils import netcdf_io
+from netcdflab.utils.operations import apply_operations
+from netcdflab.utils.journal import load_pipeline, pipeline_operations
+
+# Facteur appliqué à la taille en mémoire du fichier pour estimer le pic
+# d'utilisation d'un worker (données chargées + copies lors du sous-ensemble)
+MEMORY_FACTOR = 2
+
+
+def address_space():
+    """Taille de l'espace d'adressage du processus (octets), ou None si inconnue"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def limit_memory(memory_limit):
+    """Initialiseur des workers : borner l'espace d'adressage à la taille
+    actuelle (interpréteur et bibliothèques chargés) plus ``memory_limit``"""
+    try:
+        import resource
+    except ImportError:
+        return
+    # Charger les bibliothèques et les tampons d'OpenBLAS (alloués au premier
+    # produit matriciel) avant de mesurer : ils ne font pas partie du budget
+    import numpy as np
+    import netCDF4  # noqa: F401
+    import xarray  # noqa: F401
+    np.dot(np.ones((2, 2)), np.ones((2, 2)))
+    current = address_space()
+    if current is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + int(memory_limit)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def find_files(pattern):
+    """Lister les fichiers correspondant au motif (``**`` est récursif)"""
+    return sorted(f for f in glob.glob(pattern, recursive=True) if os.path.isfile(f))
+
+
+def output_path(filename, output_dir=None):
+    """Chemin de sortie d'un fichier (sur place si aucun dossier n'est donné)"""
+    if not output_dir:
+        return filename
+    return os.path.join(output_dir, os.path.basename(filename))
+
+
+def process_file(filename, operations, output_dir=None, memory_limit=None):
+    """Traiter un fichier ; retourne un dictionnaire décrivant le résultat"""
+    start = time.perf_counter()
+    result = {
+        'file': filename,
+        'output': output_path(filename, output_dir),
+        'status': 'ok',
+        'error': None,
+        'input_bytes': os.path.getsize(filename),
+        'output_bytes': None,
+        'memory_bytes': None,
+    }
+
+    try:
+        memory_bytes = netcdf_io.estimate_nbytes(filename) * MEMORY_FACTOR
+        result['memory_bytes'] = memory_bytes
+        if memory_limit and memory_bytes > memory_limit:
+            result['status'] = 'skipped'
+            result['error'] = (f"Mémoire estimée ({memory_bytes / 2**20:.0f} Mo) supérieure "
+                               f"au budget ({memory_limit / 2**20:.0f} Mo)")
+        else:
+            dataset = netcdf_io.load_dataset(filename)
+            dataset, encoding = apply_operations(dataset, operations)
+            netcdf_io.write_dataset(dataset, result['output'], encoding=encoding)
+            result['output_bytes'] = os.path.getsize(result['output'])
+    except MemoryError:
+        result['status'] = 'error'
+        result['error'] = "Mémoire insuffisante"
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(files, operations, output_dir=None, workers=None, memory_limit=None,
+              progress=None):
+    """Appliquer les opérations à chaque fichier dans un pool de processus.
+
+    ``operations`` est une liste commune à tous les fichiers ou un
+    dictionnaire ``{fichier: liste}``.
+    ``memory_limit`` (octets) est le budget de chaque worker : les fichiers
+    dont l'empreinte estimée le dépasse sont ignorés plutôt que chargés, et
+    l'espace d'adressage de chaque worker est borné à ce budget au-delà de
+    sa taille au démarrage (``limit_memory``).
+    ``progress(done, total, result)`` est appelé après chaque fichier.
+    Retourne la liste des résultats dans l'ordre des fichiers.
+    """
+    files = list(files)
+    if output_dir:
+        names = [os.path.basename(f) for f in files]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"Plusieurs fichiers auraient la même sortie: {', '.join(duplicates)}")
+        os.makedirs(output_dir, exist_ok=True)
+
+    results = {}
+    if not files:
+        return []
+
+    # 'spawn' : pas d'héritage de l'état Qt si le pool est lancé depuis l'application
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=limit_memory if memory_limit else None,
+                             initargs=(memory_limit,) if memory_limit else ()) as executor:
+        futures = {
+            executor.submit(process_file, f,
+                            operations[f] if isinstance(operations, dict) else operations,
+                            output_dir, memory_limit): f
+            for f in files
+        }
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker interrompu (mémoire, signal...)
+                result = {'file': filename, 'output': output_path(filename, output_dir),
+                          'status': 'error', 'error': f"{type(e).__name__}: {e}",
+                          'seconds': None}
+            results[filename] = result
+            if progress:
+                progress(len(results), len(files), result)
+
+    return [results[f] for f in files]
+
+
+def summarize(results):
+    """Résumé d'un traitement par lots"""
+    by_status = {}
+    for result in results:
+        by_status.setdefault(result['status'], []).append(result)
+    ok = by_status.get('ok', [])
+    return {
+        'total': len(results),
+        'ok': len(ok),
+        'errors': len(by_status.get('error', [])),
+        'skipped': len(by_status.get('skipped', [])),
+        'seconds': sum(r['seconds'] or 0 for r in results),
+        'input_bytes': sum(r['input_bytes'] for r in ok),
+        'output_bytes': sum(r['output_bytes'] for r in ok),
+        'failed': [{'file': r['file'], 'status': r['status'], 'error': r['error']}
+                   for r in results if r['status'] != 'ok'],
+        'files': results,
+    }
+
+
+def _print_progress(done, total, result):
+    line = f"[{done}/{total}] {result['file']}: {result['status']}"
+    if result.get('seconds') is not None:
+        line += f" ({result['seconds']:.2f} s)"
+    if result['error']:
+        line += f" - {result['error']}"
+    print(line, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m netcdflab.utils.batch',
+        description="Appliquer une liste d'opérations à plusieurs fichiers NetCDF")
+    parser.add_argument('pattern', help="Motif des fichiers (ex: 'data/**/*.nc')")
+    parser.add_argument('--operations', required=True,
+                        help="Fichier JSON contenant la liste des opérations "
+                             "(ou pipeline exporté depuis l'application)")
+    parser.add_argument('--output-dir', help="Dossier de sortie (par défaut: sur place)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus")
+    parser.add_argument('--memory-limit', type=float, default=None,
+                        help="Budget mémoire par worker, en Mo")
+    parser.add_argument('--report', help="Écrire le rapport JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    operations = pipeline_operations(load_pipeline(args.operations))
+
+    files = find_files(args.pattern)
+    if not files:
+        print(f"Aucun fichier ne correspond à {args.pattern}")
+        return 1
+
+    memory_limit = int(args.memory_limit * 2**20) if args.memory_limit else None
+    results = run_batch(files, operations, output_dir=args.output_dir,
+                        workers=args.workers, memory_limit=memory_limit,
+                        progress=_print_progress)
+    summary = summarize(results)
+
+    print(f"\n{summary['ok']}/{summary['total']} fichier(s) traité(s), "
+          f"{summary['errors']} erreur(s), {summary['skipped']} ignoré(s)")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    return 0 if summary['ok'] == summary['total'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Lecture de sélections rectangulaires chunk par chunk, avec un cache.
+
+Une série temporelle en un point d'un fichier découpé en cartes (chunks
+(1, lat, lon)) décompresse un chunk entier par pas de temps pour n'en
+garder qu'une valeur ; la série voisine décompresse de nouveau les mêmes
+chunks. ``read`` découpe la sélection demandée selon les chunks du
+fichier, lit chaque chunk une seule fois (entier, décodé par xarray) et
+le conserve dans un cache LRU borné : les sélections qui se recouvrent
+(points voisins, cartes successives d'un fichier découpé en séries) sont
+servies depuis la mémoire.
+
+Les variables chargées en mémoire, sans chunks ou dont la forme ne
+correspond plus au fichier (sous-ensemble, agrégat) sont lues directement.
+"""
+import os
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+
+from netcdflab.utils import memory
+from netcdflab.utils import tracing
+from netcdflab.utils.metadata_cache import file_key
+
+# Taille maximale du cache des chunks décompressés
+DEFAULT_CACHE_BYTES = 64 * 2**20
+# Au-delà, la sélection est lue directement (surcoût des lectures une par une)
+MAX_PLANNED_CHUNKS = 16384
+
+
+class ChunkCache:
+    """Chunks décodés, évincés du moins récemment utilisé au plus récent"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if data.nbytes > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self.entries[key] = data
+        self.nbytes += data.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def discard(self, filename):
+        """Oublier les chunks d'un fichier (chemin relatif ou absolu)"""
+        filename = os.path.realpath(filename)
+        for key in [key for key in self.entries if key[0] == filename]:
+            self.nbytes -= self.entries.pop(key).nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+
+cache = ChunkCache()
+memory.manager.register_cache("chunks", lambda: cache.nbytes, cache.clear)
+
+
+def file_chunks(var):
+    """Chunks du fichier pour une variable encore sur disque, sinon None"""
+    variable = getattr(var, 'variable', var)
+    encoding = variable.encoding
+    chunks = encoding.get('chunksizes')
+    if (variable._in_memory or not chunks or encoding.get('contiguous')
+            or not encoding.get('source')
+            or tuple(encoding.get('original_shape', ())) != variable.shape
+            or len(chunks) != variable.ndim):
+        return None
+    return tuple(int(c) for c in chunks)
+
+
+def file_variable(var):
+    """Chemin de la variable dans son fichier (groupe et nom sur disque), sinon None
+
+    Le nom d'un DataArray change avec un renommage et un ``Variable`` n'en
+    a pas : on remonte jusqu'au tableau du backend netCDF4, qui garde le nom
+    lu dans le fichier.
+    """
+    data = getattr(getattr(var, 'variable', var), '_data', None)
+    while data is not None:
+        name = getattr(data, 'variable_name', None)
+        if name is not None:
+            group = getattr(getattr(data, 'datastore', None), '_group', None) or '/'
+            return group.rstrip('/') + '/' + name
+        data = getattr(data, 'array', None)
+    return None
+
+
+def _ranges(var, indexers):
+    """(début, fin, axe supprimé) de chaque axe, ou None si la sélection n'est pas rectangulaire"""
+    ranges = []
+    for dim, size in zip(var.dims, var.shape):
+        key = indexers.get(dim, slice(None))
+        if isinstance(key, (int, np.integer)):
+            index = int(key) + size if key < 0 else int(key)
+            if not 0 <= index < size:
+                raise IndexError(f"Indice {key} hors de la dimension '{dim}' ({size})")
+            ranges.append((index, index + 1, True))
+        elif isinstance(key, slice):
+            start, stop, step = key.indices(size)
+            if step != 1 or stop <= start:
+                return None
+            ranges.append((start, stop, False))
+        else:
+            return None
+    return ranges
+
+
+def plan(shape, chunks, ranges):
+    """Chunks touchés par la sélection : (indice du chunk, sélection dans le fichier,
+    sélection dans le chunk, sélection dans le résultat)"""
+    axes = []
+    for size, chunk, (start, stop, _) in zip(shape, chunks, ranges):
+        parts = []
+        for number in range(start // chunk, (stop - 1) // chunk + 1):
+            low, high = number * chunk, min((number + 1) * chunk, size)
+            first, last = max(start, low), min(stop, high)
+            parts.append((number, slice(low, high), slice(first - low, last - low),
+                          slice(first - start, last - start)))
+        axes.append(parts)
+    for combination in itertools.product(*axes):
+        yield (tuple(p[0] for p in combination), tuple(p[1] for p in combination),
+               tuple(p[2] for p in combination), tuple(p[3] for p in combination))
+
+
+def read(var, indexers, chunk_cache=None):
+    """Valeurs de ``var.isel(indexers)`` lues chunk par chunk (entiers ou tranches de pas 1)"""
+    return read_many(var, [indexers], chunk_cache)[0]
+
+
+def read_many(var, requests, chunk_cache=None):
+    """Lire plusieurs sélections d'une variable en lisant une seule fois chaque chunk.
+
+    Les sélections sont regroupées par chunk : un chunk partagé par
+    plusieurs sélections (séries en plusieurs points d'une même carte) est
+    décompressé une fois, dans l'ordre du fichier.
+    """
+    chunk_cache = cache if chunk_cache is None else chunk_cache
+    variable = getattr(var, 'variable', var)
+    name = getattr(var, 'name', None)
+    chunks = file_chunks(variable)
+    all_ranges = [_ranges(variable, indexers) if chunks else None for indexers in requests]
+
+    def direct(indexers):
+        return np.asarray(variable.isel({k: v for k, v in indexers.items()
+                                         if k in variable.dims}).values)
+
+    # Regrouper les morceaux de chaque sélection par chunk
+    by_chunk = {}
+    for number, ranges in enumerate(all_ranges):
+        if ranges is None:
+            continue
+        count = 1
+        for chunk, (start, stop, _) in zip(chunks, ranges):
+            count *= (stop - 1) // chunk - start // chunk + 1
+        if count > MAX_PLANNED_CHUNKS:
+            continue
+        for index, file_slices, chunk_slices, out_slices in plan(variable.shape, chunks, ranges):
+            by_chunk.setdefault(index, (file_slices, []))[1].append((number, chunk_slices, out_slices))
+
+    # Sans chunk partagé ni place dans le cache, la lecture directe (un seul
+    # appel HDF5) décompresse déjà chaque chunk une fois, avec moins de surcoût
+    chunk_bytes = int(np.prod(chunks or (), dtype=np.int64)) * variable.dtype.itemsize
+    shared = sum(len(parts) for _, parts in by_chunk.values()) > len(by_chunk)
+    if not shared and len(by_chunk) * chunk_bytes > chunk_cache.max_bytes:
+        by_chunk = {}
+
+    results = [None] * len(requests)
+    path = file_variable(variable) if by_chunk else None
+    if path is None:
+        by_chunk = {}
+    else:
+        try:
+            source = os.path.realpath(variable.encoding['source'])
+            version = file_key(source)
+        except OSError:
+            by_chunk = {}
+
+    with tracing.span("chunk_read", variable=name, requests=len(requests),
+                      chunks=len(by_chunk)) as span:
+        read_bytes = 0
+        outputs = {}
+        for index in sorted(by_chunk):
+            file_slices, parts = by_chunk[index]
+            key = (source, version, path, index)
+            data = chunk_cache.get(key)
+            if data is None:
+                data = np.asarray(variable[file_slices].values)
+                read_bytes += data.nbytes
+                chunk_cache.put(key, data)
+            for number, chunk_slices, out_slices in parts:
+                if number not in outputs:
+                    outputs[number] = np.empty([stop - start for start, stop, _ in all_ranges[number]],
+                                               dtype=data.dtype)
+                outputs[number][out_slices] = data[chunk_slices]
+        span.set(bytes=read_bytes)
+
+    for number, indexers in enumerate(requests):
+        if number in outputs:
+            results[number] = outputs[number][
+                tuple(0 if squeeze else slice(None) for _, _, squeeze in all_ranges[number])]
+        else:
+            results[number] = direct(indexers)
+    return results
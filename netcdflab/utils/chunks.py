@@ -0,0 +1,286 @@
+"""Organisation des variables sur disque (chunks HDF5) et rechunking.
+
+Les performances de lecture dépendent de la forme des chunks : une variable
+(time, lat, lon) découpée en chunks (1, lat, lon) se lit vite carte par
+carte mais une série temporelle en un point touche un chunk par pas de
+temps. ``layout`` décrit la variable à partir de son encodage xarray
+(chunks, filtres) et estime le nombre de chunks lus pour les deux accès
+typiques ; ``rechunk_variable`` réécrit un fichier avec un nouveau
+découpage pour une variable, par blocs de taille bornée.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from netcdflab.utils import tracing
+
+# Mémoire maximale utilisée pour les blocs copiés lors d'un rechunking
+DEFAULT_BUFFER_BYTES = 64 * 2**20
+# Filtres de compression renseignés dans l'encodage xarray
+COMPRESSION_FILTERS = ('zlib', 'szip', 'zstd', 'bzip2', 'blosc')
+
+
+def time_dimension(var, unlimited_dims=()):
+    """Dimension le long de laquelle on lit une série temporelle"""
+    for dim in var.dims:
+        if dim in unlimited_dims:
+            return dim
+    for dim in var.dims:
+        if 'time' in dim.lower():
+            return dim
+    return var.dims[0] if var.dims else None
+
+
+def chunks_read(shape, chunks, selection):
+    """Nombre de chunks (ou de segments contigus si ``chunks`` est None) lus par une sélection.
+
+    ``selection`` donne pour chaque axe le nombre d'éléments lus : l'axe
+    entier ou un seul indice.
+    """
+    if chunks is None:
+        # Stockage contigu : un segment par combinaison des axes qui
+        # précèdent la dernière dimension lue partiellement
+        partial = [i for i, (n, size) in enumerate(zip(selection, shape)) if n < size]
+        if not partial:
+            return 1
+        return int(np.prod(selection[:partial[-1]], dtype=np.int64))
+    return int(np.prod([-(-n // c) if n > 1 else 1 for n, c in zip(selection, chunks)],
+                       dtype=np.int64))
+
+
+def access_reads(var, chunks, unlimited_dims=()):
+    """Chunks lus pour une carte (deux derniers axes entiers) et une série temporelle en un point"""
+    shape = tuple(var.shape)
+    ndim = len(shape)
+    if ndim < 2:
+        return None
+    reads = {'map': chunks_read(shape, chunks, [1] * (ndim - 2) + list(shape[-2:]))}
+    dim = time_dimension(var, unlimited_dims)
+    axis = var.dims.index(dim)
+    if axis < ndim - 2:
+        selection = [1] * ndim
+        selection[axis] = shape[axis]
+        reads['series'] = chunks_read(shape, chunks, selection)
+    return reads
+
+
+def filters(encoding):
+    """Filtres appliqués à la variable (compression, shuffle, somme de contrôle)"""
+    names = []
+    for name in COMPRESSION_FILTERS:
+        if encoding.get(name):
+            names.append(f"{name} {encoding['complevel']}" if name == 'zlib' else name)
+    if encoding.get('shuffle'):
+        names.append('shuffle')
+    if encoding.get('fletcher32'):
+        names.append('fletcher32')
+    return names
+
+
+def storage_sizes(filename, names):
+    """Taille compressée sur disque de chaque variable (nécessite h5py, extra ``storage``, sinon dictionnaire vide)"""
+    try:
+        import h5py
+    except ImportError:
+        return {}
+    sizes = {}
+    try:
+        with h5py.File(filename, 'r') as f:
+            for name in names:
+                if name in f and isinstance(f[name], h5py.Dataset):
+                    sizes[name] = f[name].id.get_storage_size()
+    except OSError:
+        return {}
+    return sizes
+
+
+def layout(dataset, filename=None):
+    """Description du stockage de chaque variable.
+
+    Retourne ``{nom: {'chunks', 'filters', 'ratio', 'estimated', 'reads'}}``.
+    Le taux de compression est exact avec h5py ; sinon il est estimé pour
+    l'ensemble des variables compressées à partir de la taille du fichier
+    (``estimated`` vaut alors True).
+    """
+    unlimited = set(getattr(dataset, 'encoding', {}).get('unlimited_dims', ()))
+    result = {}
+    compressed = []
+    for name, var in dataset.variables.items():
+        encoding = var.encoding
+        chunks = encoding.get('chunksizes')
+        if encoding.get('contiguous', chunks is None):
+            chunks = None
+        chunks = tuple(int(c) for c in chunks) if chunks else None
+        var_filters = filters(encoding)
+        nbytes = var.size * var.dtype.itemsize
+        result[name] = {
+            'chunks': chunks,
+            'filters': var_filters,
+            'ratio': 1.0 if nbytes else None,
+            'estimated': False,
+            'reads': access_reads(var, chunks, unlimited),
+            'nbytes': nbytes,
+        }
+        if any(f in COMPRESSION_FILTERS or f.startswith('zlib') for f in var_filters):
+            compressed.append(name)
+
+    if compressed and filename and os.path.exists(filename):
+        sizes = storage_sizes(filename, compressed)
+        if sizes:
+            for name, stored in sizes.items():
+                result[name]['ratio'] = result[name]['nbytes'] / stored if stored else None
+        else:
+            # Estimation : les variables non compressées occupent leur taille brute
+            raw = sum(entry['nbytes'] for name, entry in result.items() if name not in compressed)
+            stored = os.path.getsize(filename) - raw
+            total = sum(result[name]['nbytes'] for name in compressed)
+            ratio = total / stored if stored > 0 else None
+            for name in compressed:
+                result[name]['ratio'] = ratio
+                result[name]['estimated'] = True
+    return result
+
+
+def parse_chunks(text, shape):
+    """Lire une forme de chunks « 1, 24, 100, 100 » (``*`` ou 0 : axe entier)"""
+    parts = [p.strip() for p in text.replace('x', ',').replace('×', ',').split(',') if p.strip()]
+    if len(parts) != len(shape):
+        raise ValueError(f"{len(shape)} tailles attendues, {len(parts)} données")
+    chunks = []
+    for part, size in zip(parts, shape):
+        value = size if part in ('*', '0') else int(part)
+        if value < 1:
+            raise ValueError(f"Taille de chunk invalide : {part}")
+        chunks.append(min(value, max(size, 1)))
+    return tuple(chunks)
+
+
+def blocks(shape, itemsize, buffer_bytes, align=None):
+    """Découper un tableau en blocs d'au plus ``buffer_bytes`` (sélections par axe).
+
+    Les blocs sont formés de chunks ``align`` entiers, agrandis en partant
+    du dernier axe : chaque chunk de sortie est écrit (et compressé) une
+    seule fois. Sans découpage, les premiers axes sont parcourus indice par
+    indice.
+    """
+    ndim = len(shape)
+    if ndim == 0:
+        yield ()
+        return
+    block = list(align) if align else [1] * ndim
+    if int(np.prod(shape, dtype=np.int64)) * itemsize <= buffer_bytes:
+        block = list(shape)
+    for axis in reversed(range(ndim)):
+        other = int(np.prod(block[:axis] + block[axis + 1:], dtype=np.int64)) * itemsize
+        unit = block[axis]
+        count = max(1, buffer_bytes // max(other * unit, 1))
+        block[axis] = min(shape[axis], unit * count)
+        if block[axis] < shape[axis]:
+            break
+    steps = [range(0, n, b) for n, b in zip(shape, block)]
+    for starts in np.ndindex(*[len(r) for r in steps]):
+        yield tuple(slice(r[i], min(r[i] + b, n)) for r, i, b, n in zip(steps, starts, block, shape))
+
+
+def _copy_attributes(src, dst):
+    for name in src.ncattrs():
+        if name != '_FillValue':
+            dst.setncattr(name, src.getncattr(name))
+
+
+def _storage_options(var, chunks=None):
+    """Arguments de ``createVariable`` reproduisant le stockage de ``var`` (chunks remplacés si donnés)"""
+    options = {}
+    current = var.chunking()
+    if chunks is not None:
+        options['chunksizes'] = chunks
+    elif current != 'contiguous' and current is not None:
+        options['chunksizes'] = tuple(current)
+    else:
+        options['contiguous'] = True
+    for name, value in (var.filters() or {}).items():
+        if name in ('zlib', 'shuffle', 'fletcher32') and value:
+            options[name] = True
+        elif name == 'complevel' and value:
+            options['complevel'] = value
+        elif name in COMPRESSION_FILTERS and value:
+            options['compression'] = name
+    return options
+
+
+def _copy_group(src, dst, variable, chunks, buffer_bytes):
+    """Copier un groupe netCDF4 (valeurs brutes, sans décodage) avec un nouveau découpage"""
+    for name, dim in src.dimensions.items():
+        dst.createDimension(name, None if dim.isunlimited() else len(dim))
+    _copy_attributes(src, dst)
+
+    for name, var in src.variables.items():
+        var.set_auto_maskandscale(False)
+        options = {}
+        fill = var.getncattr('_FillValue') if '_FillValue' in var.ncattrs() else None
+        if fill is not None:
+            options['fill_value'] = fill
+        path = src.path.rstrip('/') + '/' + name
+        options.update(_storage_options(var, chunks if path == variable else None))
+        out = dst.createVariable(name, var.datatype, var.dimensions, **options)
+        out.set_auto_maskandscale(False)
+        _copy_attributes(var, out)
+
+        shape = var.shape
+        if not shape:
+            out.assignValue(var.getValue())
+            continue
+        if 0 in shape:
+            continue
+        if options.get('chunksizes') != tuple(var.chunking() or ()):
+            # Les chunks source lus par plusieurs blocs restent en cache (borné par le tampon)
+            var.set_var_chunk_cache(size=buffer_bytes)
+        itemsize = getattr(var.dtype, 'itemsize', 8)
+        align = options.get('chunksizes')
+        for block in blocks(shape, itemsize, buffer_bytes, align):
+            out[block] = var[block]
+
+    for name, group in src.groups.items():
+        _copy_group(group, dst.createGroup(name), variable, chunks, buffer_bytes)
+
+
+def rechunk_variable(filename, variable, chunks, output=None, buffer_bytes=DEFAULT_BUFFER_BYTES):
+    """Réécrire ``filename`` (ou l'écrire dans ``output``) avec un nouveau découpage pour ``variable``.
+
+    Le fichier est recopié variable par variable, par blocs d'au plus
+    ``buffer_bytes`` : la mémoire utilisée ne dépend pas de la taille du
+    fichier (tampon et cache des chunks HDF5 de la variable lue). Les valeurs sont copiées sans décodage et les filtres,
+    dimensions illimitées, attributs et groupes sont conservés.
+    """
+    import netCDF4
+    from netcdflab.utils.netcdf_io import release_file, replace_file
+
+    variable = '/' + variable.lstrip('/')
+    output = output or filename
+    temp_fd, temp_path = tempfile.mkstemp(suffix='.nc', dir=os.path.dirname(os.path.abspath(output)))
+    os.close(temp_fd)
+    try:
+        with tracing.span("rechunk", file=filename, variable=variable, chunks=str(chunks)) as span:
+            with netCDF4.Dataset(filename) as src:
+                group_path, name = variable.rsplit('/', 1)
+                group = src
+                for part in filter(None, group_path.split('/')):
+                    group = group.groups.get(part)
+                    if group is None:
+                        break
+                if group is None or name not in group.variables:
+                    raise ValueError(f"Variable absente du fichier : {variable}")
+                with netCDF4.Dataset(temp_path, 'w', format=src.data_model) as dst:
+                    _copy_group(src, dst, variable, tuple(chunks), buffer_bytes)
+            # Descripteurs d'xarray encore ouverts : HDF5 les confondrait avec le nouveau fichier
+            release_file(filename)
+            release_file(output)
+            replace_file(temp_path, output)
+            span.set(file_bytes=os.path.getsize(output))
+    finally:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
@@ -0,0 +1,158 @@
+"""Comparaison d'une même variable entre deux fichiers ouverts.
+
+Les deux grilles doivent être alignées : mêmes dimensions, mêmes tailles
+et mêmes valeurs de coordonnées (``check_alignment``). La différence
+(A − B, rapport A / B ou écart relatif en %) est calculée à la demande,
+tranche par tranche, à partir des lectures chunk par chunk de
+``chunk_reader`` ; les tranches de variables lues sur disque sont gardées
+dans un cache borné. ``statistics`` parcourt les deux variables entières
+par blocs (mémoire bornée) pour le biais, la RMSE et l'écart maximal.
+"""
+import os
+
+import numpy as np
+
+from netcdflab.utils import chunk_reader
+from netcdflab.utils import memory
+from netcdflab.utils import tracing
+from netcdflab.utils.chunks import DEFAULT_BUFFER_BYTES, blocks
+from netcdflab.utils.metadata_cache import file_key
+from netcdflab.utils.point_index import geographic_coordinates
+
+# Modes de comparaison
+MODES = ('difference', 'ratio', 'percent')
+
+# Tranches comparées déjà calculées
+cache = chunk_reader.ChunkCache()
+memory.manager.register_cache("comparisons", lambda: cache.nbytes, cache.clear)
+
+
+def discard(filename):
+    """Oublier les comparaisons qui utilisent un fichier (chemin relatif ou absolu)"""
+    filename = os.path.realpath(filename)
+    for key in [key for key in cache.entries if filename in key[:2]]:
+        cache.nbytes -= cache.entries.pop(key).nbytes
+
+
+def check_alignment(dataset_a, dataset_b, name):
+    """Vérifier que ``name`` est défini sur la même grille dans les deux datasets.
+
+    Lève ValueError en décrivant la première différence trouvée.
+    """
+    for dataset in (dataset_a, dataset_b):
+        if name not in dataset.variables:
+            raise ValueError(f"Variable absente d'un des fichiers : {name}")
+    var_a, var_b = dataset_a[name], dataset_b[name]
+    if var_a.dims != var_b.dims:
+        raise ValueError(f"Dimensions différentes : {var_a.dims} / {var_b.dims}")
+    if var_a.shape != var_b.shape:
+        raise ValueError(f"Tailles différentes : {var_a.shape} / {var_b.shape}")
+    if var_a.dtype.kind not in 'iuf' or var_b.dtype.kind not in 'iuf':
+        raise ValueError(f"Variable non numérique : {name}")
+
+    # Coordonnées de dimension et coordonnées géographiques 2-D
+    coordinates = [(dim, dim) for dim in var_a.dims
+                   if dim in dataset_a.variables and dim in dataset_b.variables]
+    for first, second in zip(var_a.dims, var_a.dims[1:]):
+        geo_a = geographic_coordinates(dataset_a, (first, second))
+        geo_b = geographic_coordinates(dataset_b, (first, second))
+        if geo_a is not None and geo_b is not None:
+            coordinates += [(geo_a[0].name, geo_b[0].name), (geo_a[1].name, geo_b[1].name)]
+    for name_a, name_b in coordinates:
+        values_a = dataset_a[name_a].values
+        values_b = dataset_b[name_b].values
+        if values_a.shape != values_b.shape:
+            raise ValueError(f"Coordonnée {name_a} de taille différente")
+        if values_a.dtype.kind in 'iuf' and values_b.dtype.kind in 'iuf':
+            same = np.allclose(values_a, values_b, equal_nan=True)
+        else:
+            same = np.array_equal(values_a, values_b)
+        if not same:
+            raise ValueError(f"Coordonnée {name_a} différente entre les deux fichiers")
+
+
+def combine(a, b, mode='difference'):
+    """A − B, A / B ou 100 × (A − B) / B (NaN là où B est nul pour les rapports)"""
+    dtype = np.result_type(a.dtype, b.dtype, np.float32)
+    a = np.asarray(a, dtype=dtype)
+    b = np.asarray(b, dtype=dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mode == 'difference':
+            return a - b
+        if mode == 'ratio':
+            return np.where(b != 0, a / b, np.nan)
+        if mode == 'percent':
+            return np.where(b != 0, 100 * (a - b) / b, np.nan)
+    raise ValueError(f"Mode de comparaison inconnu : {mode}")
+
+
+def _source_key(var):
+    """Fichier, version et chemin sur disque d'une variable non modifiée, sinon None"""
+    variable = getattr(var, 'variable', var)
+    source = variable.encoding.get('source')
+    path = chunk_reader.file_variable(variable)
+    if variable._in_memory or not source or path is None:
+        return None
+    source = os.path.realpath(source)
+    try:
+        return source, file_key(source), path
+    except OSError:
+        return None
+
+
+def slice_difference(var_a, var_b, indexers, mode='difference', use_cache=True):
+    """Tranche ``indexers`` (entiers ou tranches de pas 1) de la comparaison de A et B"""
+    key = None
+    if use_cache:
+        source_a, source_b = _source_key(var_a), _source_key(var_b)
+        if source_a is not None and source_b is not None:
+            selection = tuple(sorted((dim, (value.start, value.stop) if isinstance(value, slice)
+                                      else int(value)) for dim, value in indexers.items()))
+            key = (source_a, source_b, mode, selection)
+            data = cache.get(key)
+            if data is not None:
+                return data
+
+    with tracing.span("compare", variable=var_a.name, mode=mode) as span:
+        a, b = chunk_reader.read(var_a, indexers), chunk_reader.read(var_b, indexers)
+        data = combine(a, b, mode)
+        span.set(bytes=a.nbytes + b.nbytes)
+    if key is not None:
+        cache.put(key, data)
+    return data
+
+
+def statistics(var_a, var_b, buffer_bytes=DEFAULT_BUFFER_BYTES):
+    """Biais, RMSE et écart absolu maximal de A − B sur les variables entières.
+
+    Les deux variables sont lues par blocs alignés sur les chunks de A
+    (au plus ``buffer_bytes`` par variable) ; les valeurs manquantes dans
+    l'une ou l'autre sont ignorées. Retourne ``{'count', 'bias', 'rmse',
+    'max_abs'}`` (None si aucune valeur n'est comparable).
+    """
+    variable_a = getattr(var_a, 'variable', var_a)
+    variable_b = getattr(var_b, 'variable', var_b)
+    itemsize = max(variable_a.dtype.itemsize, variable_b.dtype.itemsize, 8)
+    count = 0
+    total = 0.0
+    squares = 0.0
+    max_abs = 0.0
+    with tracing.span("compare_statistics", variable=getattr(var_a, 'name', None)) as span:
+        read_bytes = 0
+        for block in blocks(variable_a.shape, itemsize, buffer_bytes,
+                            chunk_reader.file_chunks(variable_a)):
+            a = np.asarray(variable_a[block].values, dtype=np.float64)
+            b = np.asarray(variable_b[block].values, dtype=np.float64)
+            read_bytes += a.nbytes + b.nbytes
+            difference = (a - b)[np.isfinite(a) & np.isfinite(b)]
+            if not difference.size:
+                continue
+            count += difference.size
+            total += float(difference.sum())
+            squares += float(np.square(difference).sum())
+            max_abs = max(max_abs, float(np.abs(difference).max()))
+        span.set(bytes=read_bytes, count=count)
+    if not count:
+        return {'count': 0, 'bias': None, 'rmse': None, 'max_abs': None}
+    return {'count': count, 'bias': total / count, 'rmse': float(np.sqrt(squares / count)),
+            'max_abs': max_abs}
@@ -1,86 +1,217 @@
+"""Génération de fichiers NetCDF de test (données de pollution simulées).
+
+Le fichier par défaut (4 polluants x 24 heures x 100 x 100) reste celui de
+``create_test_netcdf(filename)``. Tous les paramètres peuvent être modifiés
+pour produire des fichiers de plusieurs dizaines de Go pour les mesures de
+performance : les champs sont calculés de façon vectorisée et écrits par
+blocs de pas de temps, la mémoire utilisée ne dépend donc pas de la taille
+du fichier. Avec ``seed``, le contenu est reproductible quel que soit le
+découpage en blocs.
+
+Utilisation en ligne de commande::
+
+    python -m netcdflab.utils.create_test_netcdf big.nc --nx 1000 --ny 1000 \\
+        --time 8760 --chunks 1,1,250,250 --complevel 4 --unlimited --seed 42
+"""
+import sys
+import argparse
 import numpy as np
 from netCDF4 import Dataset
-from datetime import datetime, timedelta
-from netCDF4 import stringtochar
+from datetime import datetime
 
-def create_test_netcdf(filename):
-    # Paramètres de la grille
-    nx, ny = 100, 100  # dimensions spatiales
-    nb_temps = 24  # nombre de pas de temps (24 heures)
+# Paramètres du bruit (moyenne, écart-type) de chaque polluant
+POLLUTANT_PARAMS = {
+    "NOx": (40, 15),
+    "PM10": (20, 8),
+    "CO2": (400, 50),
+    "O3": (60, 20),
+}
+DEFAULT_POLLUTANTS = list(POLLUTANT_PARAMS)
+DEFAULT_PARAMS = (50, 15)
 
-    # Liste des polluants
-    polluants = ["NOx", "PM10", "CO2", "O3"]
-    nb_polluants = len(polluants)
+# Taille maximale d'un bloc écrit en une fois (un polluant, plusieurs pas de temps)
+DEFAULT_BLOCK_BYTES = 64 * 2**20
+
+
+def spatial_gradient(nx, ny, scale=50):
+    """Carte de base : décroissance exponentielle depuis le centre de la grille"""
+    y, x = np.ogrid[0:ny, 0:nx]
+    dist = np.hypot(x - nx / 2, y - ny / 2)
+    return np.exp(-dist / scale)
+
+
+def estimate_size(nx=100, ny=100, nb_temps=24, polluants=DEFAULT_POLLUTANTS, dtype='f4',
+                  groups=None):
+    """Taille non compressée des données générées, en octets"""
+    n_groups = len(groups) if groups else 1
+    return n_groups * len(polluants) * nb_temps * ny * nx * np.dtype(dtype).itemsize
 
-    # Création du fichier NetCDF
-    rootgrp = Dataset(filename, "w", format="NETCDF4")
+
+def _time_block(nb_temps, ny, nx, dtype, chunks, block_bytes):
+    """Nombre de pas de temps écrits par bloc, aligné sur les chunks en temps"""
+    step_bytes = ny * nx * max(np.dtype(dtype).itemsize, 8)  # calcul en float64
+    block = max(1, min(nb_temps, block_bytes // step_bytes))
+    time_chunk = chunks[-3] if chunks and len(chunks) >= 3 else 1
+    if time_chunk > 1 and block > time_chunk:
+        block -= block % time_chunk
+    return block
+
+
+def _write_structure(group, nx, ny, nb_temps, polluants, dtype, chunks, complevel,
+                     unlimited_time, separate_variables):
+    """Créer dimensions, coordonnées et variables ; retourne les variables de concentration"""
+    name_len = max(10, max(len(p) for p in polluants))
 
     # Création des dimensions
-    time = rootgrp.createDimension("time", nb_temps)
-    lat = rootgrp.createDimension("lat", ny)
-    lon = rootgrp.createDimension("lon", nx)
-    pollutant = rootgrp.createDimension("pollutant", nb_polluants)  # dimension fixe
-    name_strlen = rootgrp.createDimension("name_strlen", 10)  # longueur max des noms de polluants
+    group.createDimension("time", None if unlimited_time else nb_temps)
+    group.createDimension("lat", ny)
+    group.createDimension("lon", nx)
+    group.createDimension("pollutant", len(polluants))  # dimension fixe
+    group.createDimension("name_strlen", name_len)  # longueur max des noms de polluants
 
     # Création des variables
-    times = rootgrp.createVariable("time", "f8", ("time",))
-    latitudes = rootgrp.createVariable("latitude", "f4", ("lat",))
-    longitudes = rootgrp.createVariable("longitude", "f4", ("lon",))
-    pollutants = rootgrp.createVariable("pollutant_name", "S1", ("pollutant", "name_strlen"))
-    concentrations = rootgrp.createVariable("concentration", "f4", ("pollutant", "time", "lat", "lon",))
+    times = group.createVariable("time", "f8", ("time",))
+    latitudes = group.createVariable("latitude", "f4", ("lat",))
+    longitudes = group.createVariable("longitude", "f4", ("lon",))
+    pollutants = group.createVariable("pollutant_name", "S1", ("pollutant", "name_strlen"))
 
-    # Définition des attributs
-    rootgrp.description = "Données de pollution atmosphérique"
-    rootgrp.history = f"Créé le {datetime.now().strftime('%Y-%m-%d')}"
-    rootgrp.source = "Données simulées"
+    compression = {}
+    if complevel:
+        compression = {'zlib': True, 'complevel': complevel, 'shuffle': True}
+
+    if separate_variables:
+        var_chunks = tuple(chunks[-3:]) if chunks else None
+        concentrations = [
+            group.createVariable(pol, dtype, ("time", "lat", "lon"),
+                                 chunksizes=var_chunks, **compression)
+            for pol in polluants
+        ]
+    else:
+        var = group.createVariable("concentration", dtype, ("pollutant", "time", "lat", "lon"),
+                                   chunksizes=tuple(chunks) if chunks else None, **compression)
+        concentrations = [var] * len(polluants)
 
+    # Définition des attributs
     times.units = "hours since 2024-01-01 00:00:00"
     times.calendar = "gregorian"
     latitudes.units = "degrees_north"
     longitudes.units = "degrees_east"
-    concentrations.units = "µg/m³"
-
-    # Remplissage des données
-    # Coordonnées temporelles
-    time_values = np.arange(nb_temps, dtype=float)
-    times[:] = time_values
+    for var in set(concentrations):
+        var.units = "µg/m³"
 
     # Coordonnées spatiales
-    lat_values = np.linspace(43.0, 44.0, ny)
-    lon_values = np.linspace(1.0, 2.0, nx)
-    latitudes[:] = lat_values
-    longitudes[:] = lon_values
+    latitudes[:] = np.linspace(43.0, 44.0, ny)
+    longitudes[:] = np.linspace(1.0, 2.0, nx)
 
     # Stockage des noms de polluants
-    for i, pol in enumerate(polluants):
-        pollutants[i] = stringtochar(np.array(pol.ljust(10), dtype="S10"))
-
-    # Génération de données aléatoires pour chaque polluant
-    for i, pol in enumerate(polluants):
-        # Paramètres spécifiques à chaque polluant
-        if pol == "NOx":
-            mean, std = 40, 15
-        elif pol == "PM10":
-            mean, std = 20, 8
-        elif pol == "CO2":
-            mean, std = 400, 50
-        else:  # O3
-            mean, std = 60, 20
-        
-        # Génération des données avec variation spatiale et temporelle
-        for t in range(nb_temps):
-            # Création d'une carte de base avec gradient spatial
-            base = np.zeros((ny, nx))
-            for y in range(ny):
-                for x in range(nx):
-                    # Ajout d'un gradient spatial
-                    dist = np.sqrt((x - nx/2)**2 + (y - ny/2)**2)
-                    base[y, x] = np.exp(-dist/50)  # Décroissance exponentielle depuis le centre
-            
-            # Ajout de bruit gaussien
-            noise = np.random.normal(mean, std, (ny, nx))
-            # Combinaison du gradient et du bruit
-            concentrations[i, t, :, :] = base * noise
-
-    # Fermeture du fichier
-    rootgrp.close()
\ No newline at end of file
+    pollutants[:] = np.array([list(pol.ljust(name_len)) for pol in polluants], dtype="S1")
+
+    return times, concentrations
+
+
+def _write_data(times, concentrations, polluants, nx, ny, nb_temps, dtype, chunks,
+                block_bytes, seed, separate_variables):
+    """Calculer et écrire les concentrations par blocs de pas de temps"""
+    base = spatial_gradient(nx, ny)
+    block = _time_block(nb_temps, ny, nx, dtype, chunks, block_bytes)
+    out_dtype = np.dtype(dtype)
+    noise = np.empty((block, ny, nx))
+
+    for t0 in range(0, nb_temps, block):
+        t1 = min(t0 + block, nb_temps)
+        # Coordonnées temporelles (étend la dimension si elle est illimitée)
+        times[t0:t1] = np.arange(t0, t1, dtype=float)
+
+        for i, pol in enumerate(polluants):
+            mean, std = POLLUTANT_PARAMS.get(pol, DEFAULT_PARAMS)
+            # Un générateur par pas de temps : résultat indépendant de la taille des blocs
+            steps = noise[:t1 - t0]
+            for k, t in enumerate(range(t0, t1)):
+                np.random.default_rng([seed, i, t]).standard_normal(out=steps[k])
+            # Combinaison du gradient et du bruit gaussien
+            data = base * (mean + std * steps)
+            if out_dtype.kind in ('i', 'u'):
+                info = np.iinfo(out_dtype)
+                data = np.clip(np.rint(data), info.min, info.max)
+            data = data.astype(out_dtype, copy=False)
+
+            if separate_variables:
+                concentrations[i][t0:t1, :, :] = data
+            else:
+                concentrations[i][i, t0:t1, :, :] = data
+
+
+def create_test_netcdf(filename, nx=100, ny=100, nb_temps=24, polluants=None, dtype='f4',
+                       chunks=None, complevel=0, unlimited_time=False, groups=None,
+                       seed=None, separate_variables=False, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Créer un fichier NetCDF de test.
+
+    - ``nx``, ``ny``, ``nb_temps`` : taille de la grille et nombre de pas de temps
+    - ``polluants`` : noms des polluants (par défaut NOx, PM10, CO2, O3)
+    - ``dtype`` : type des concentrations ('f4', 'f8', 'i2'...)
+    - ``chunks`` : chunks de la variable concentration (pollutant, time, lat, lon)
+    - ``complevel`` : niveau de compression zlib (0 = pas de compression)
+    - ``unlimited_time`` : dimension temps illimitée
+    - ``groups`` : noms de groupes ; la même structure est écrite dans chacun
+    - ``seed`` : graine pour des données reproductibles
+    - ``separate_variables`` : une variable (time, lat, lon) par polluant au lieu
+      d'une variable concentration à 4 dimensions
+    """
+    polluants = list(polluants or DEFAULT_POLLUTANTS)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    # Création du fichier NetCDF
+    rootgrp = Dataset(filename, "w", format="NETCDF4")
+    try:
+        rootgrp.description = "Données de pollution atmosphérique"
+        rootgrp.history = f"Créé le {datetime.now().strftime('%Y-%m-%d')}"
+        rootgrp.source = "Données simulées"
+
+        targets = [rootgrp.createGroup(name) for name in groups] if groups else [rootgrp]
+        for number, group in enumerate(targets):
+            times, concentrations = _write_structure(
+                group, nx, ny, nb_temps, polluants, dtype, chunks, complevel,
+                unlimited_time, separate_variables)
+            _write_data(times, concentrations, polluants, nx, ny, nb_temps, dtype, chunks,
+                        block_bytes, seed + number, separate_variables)
+    finally:
+        # Fermeture du fichier
+        rootgrp.close()
+
+
+def _parse_chunks(text):
+    return tuple(int(c) for c in text.split(',')) if text else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m netcdflab.utils.create_test_netcdf',
+        description="Générer un fichier NetCDF de test")
+    parser.add_argument('filename')
+    parser.add_argument('--nx', type=int, default=100)
+    parser.add_argument('--ny', type=int, default=100)
+    parser.add_argument('--time', type=int, default=24, dest='nb_temps', help="Nombre de pas de temps")
+    parser.add_argument('--variables', nargs='+', default=None, help="Noms des polluants")
+    parser.add_argument('--dtype', default='f4')
+    parser.add_argument('--chunks', type=_parse_chunks, default=None,
+                        help="Chunks, ex: 1,24,100,100 (ou 24,100,100 avec --separate)")
+    parser.add_argument('--complevel', type=int, default=0)
+    parser.add_argument('--unlimited', action='store_true', help="Dimension temps illimitée")
+    parser.add_argument('--groups', nargs='+', default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--separate', action='store_true', help="Une variable par polluant")
+    args = parser.parse_args(argv)
+
+    polluants = args.variables or DEFAULT_POLLUTANTS
+    size = estimate_size(args.nx, args.ny, args.nb_temps, polluants, args.dtype, args.groups)
+    print(f"Génération de {args.filename} ({size / 2**20:.0f} Mo non compressés)...")
+    create_test_netcdf(args.filename, nx=args.nx, ny=args.ny, nb_temps=args.nb_temps,
+                       polluants=polluants, dtype=args.dtype, chunks=args.chunks,
+                       complevel=args.complevel, unlimited_time=args.unlimited,
+                       groups=args.groups, seed=args.seed, separate_variables=args.separate)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
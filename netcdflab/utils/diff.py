@@ -0,0 +1,369 @@
+"""Différences entre deux versions d'un fichier NetCDF.
+
+La structure (groupes, dimensions, variables, attributs) est comparée
+directement ; les données le sont par empreintes : chaque variable est
+découpée selon ses chunks (par blocs bornés si elle est contiguë), chaque
+région est lue une fois, sans décodage, et résumée par une empreinte
+BLAKE2. Seules les régions dont les empreintes diffèrent sont signalées :
+aucune comparaison valeur par valeur ni chargement complet des deux
+fichiers n'est nécessaire.
+
+Les empreintes d'un fichier (``manifest``) sont calculées dans un pool de
+threads pendant la lecture des régions suivantes ; les deux fichiers sont
+traités en parallèle dans deux processus (les lectures HDF5 ne sont pas
+sûres entre threads). Un manifeste enregistré en JSON peut remplacer un
+fichier : on compare alors une nouvelle version à une archive sans l'avoir
+sous la main.
+
+Utilisation en ligne de commande::
+
+    python -m netcdflab.utils.diff old.nc new.nc --report diff.json
+    python -m netcdflab.utils.diff new.nc --save-manifest new.json
+    python -m netcdflab.utils.diff old.json new.nc
+
+Le code de sortie vaut 0 si les fichiers sont identiques, 1 s'ils diffèrent.
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from netcdflab.utils import tracing
+from netcdflab.utils.chunks import blocks
+from netcdflab.utils.metadata_cache import to_json
+
+# Taille des régions des variables contiguës
+DEFAULT_BLOCK_BYTES = 4 * 2**20
+# Threads qui calculent les empreintes pendant la lecture
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# En dessous, les deux fichiers sont lus l'un après l'autre (démarrage des processus)
+PARALLEL_MIN_BYTES = 64 * 2**20
+# Nombre maximal de régions modifiées détaillées par variable
+MAX_REGIONS = 1000
+MANIFEST_VERSION = 1
+
+
+def region_shape(var, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Forme des régions d'une variable netCDF4 : ses chunks, sinon des blocs bornés"""
+    shape = var.shape
+    chunking = var.chunking()
+    if chunking != 'contiguous' and chunking is not None and len(chunking) == len(shape):
+        return [max(1, min(int(c), max(n, 1))) for c, n in zip(chunking, shape)]
+    itemsize = getattr(var.dtype, 'itemsize', 8)
+    first = next(blocks(shape, itemsize, block_bytes), ())
+    return [max(1, s.stop - s.start) for s in first]
+
+
+def region_slices(shape, region):
+    """Sélections des régions (dans l'ordre C de la grille des régions)"""
+    counts = [-(-n // r) for n, r in zip(shape, region)]
+    for index in np.ndindex(*counts):
+        yield tuple(slice(i * r, min((i + 1) * r, n)) for i, r, n in zip(index, region, shape))
+
+
+def _digest(data):
+    """Empreinte d'une région (valeurs brutes, sans décodage)"""
+    data = np.asarray(data)
+    if data.dtype.kind == 'O':
+        payload = repr(data.tolist()).encode('utf-8')
+    else:
+        payload = np.ascontiguousarray(data).view(np.uint8)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _attributes(obj):
+    return {name: to_json(obj.getncattr(name)) for name in obj.ncattrs()}
+
+
+def _walk(group):
+    """Groupes d'un fichier netCDF4, avec leur chemin"""
+    yield group.path, group
+    for child in group.groups.values():
+        yield from _walk(child)
+
+
+def manifest(filename, grids=None, variables=None, block_bytes=DEFAULT_BLOCK_BYTES,
+             workers=DEFAULT_WORKERS):
+    """Structure et empreintes des régions d'un fichier.
+
+    ``grids`` impose la forme des régions de certaines variables
+    (``{chemin: forme}``) pour les aligner sur celles d'un autre fichier ;
+    ``variables`` limite les empreintes à ces chemins.
+    """
+    import netCDF4
+
+    result = {'version': MANIFEST_VERSION, 'file': os.path.abspath(filename),
+              'groups': {}, 'variables': {}}
+    with tracing.span("diff_manifest", file=filename) as span, \
+            netCDF4.Dataset(filename) as nc, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        read_bytes = 0
+        for path, group in _walk(nc):
+            result['groups'][path] = {
+                'dimensions': {name: [len(dim), dim.isunlimited()]
+                               for name, dim in group.dimensions.items()},
+                'attributes': _attributes(group),
+            }
+            for name, var in group.variables.items():
+                var_path = path.rstrip('/') + '/' + name
+                entry = {
+                    'dims': list(var.dimensions),
+                    'shape': list(var.shape),
+                    'dtype': str(var.dtype),
+                    'attributes': _attributes(var),
+                }
+                result['variables'][var_path] = entry
+                if variables is not None and var_path not in variables:
+                    continue
+                var.set_auto_maskandscale(False)
+                region = list((grids or {}).get(var_path) or region_shape(var, block_bytes))
+                entry['region'] = region
+                if 0 in var.shape:
+                    entry['hashes'] = []
+                    continue
+                # Empreintes calculées pendant la lecture des régions suivantes
+                hashes = []
+                pending = deque()
+                for selection in region_slices(var.shape, region):
+                    data = var[selection] if selection else var.getValue()
+                    read_bytes += getattr(data, 'nbytes', 0)
+                    pending.append(pool.submit(_digest, data))
+                    while len(pending) > workers:
+                        hashes.append(pending.popleft().result())
+                hashes.extend(future.result() for future in pending)
+                entry['hashes'] = hashes
+        span.set(bytes=read_bytes)
+    return result
+
+
+def load_manifest(filename):
+    """Lire un manifeste JSON enregistré avec ``--save-manifest``"""
+    with open(filename) as f:
+        data = json.load(f)
+    if data.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Version de manifeste non prise en charge : {filename}")
+    return data
+
+
+def _compare_dicts(a, b):
+    """Clés ajoutées, supprimées et valeurs modifiées entre deux dictionnaires"""
+    return {
+        'added': {key: b[key] for key in sorted(set(b) - set(a))},
+        'removed': sorted(set(a) - set(b)),
+        'changed': {key: [a[key], b[key]] for key in sorted(set(a) & set(b)) if a[key] != b[key]},
+    }
+
+
+def _is_empty(diff):
+    return not (diff['added'] or diff['removed'] or diff['changed'])
+
+
+def _merge_regions(indices, counts):
+    """Regrouper les régions consécutives le long du dernier axe découpé : [(premier, dernier indice)]"""
+    axis = max([i for i, n in enumerate(counts) if n > 1], default=None)
+    runs = []
+    for index in indices:
+        position = tuple(int(i) for i in np.unravel_index(index, counts)) if counts else ()
+        if runs and axis is not None:
+            last = runs[-1][1]
+            if last[:axis] + last[axis + 1:] == position[:axis] + position[axis + 1:] \
+                    and last[axis] + 1 == position[axis]:
+                runs[-1] = (runs[-1][0], position)
+                continue
+        runs.append((position, position))
+    return runs
+
+
+def compare_data(entry_a, entry_b):
+    """Régions modifiées d'une variable présente dans les deux manifestes"""
+    if entry_a.get('hashes') is None or entry_b.get('hashes') is None:
+        return None
+    if entry_a['region'] != entry_b['region']:
+        return {'status': 'grid_mismatch'}
+    region = entry_a['region']
+    shape_a, shape_b = entry_a['shape'], entry_b['shape']
+    counts_a = [-(-n // r) for n, r in zip(shape_a, region)]
+    counts_b = [-(-n // r) for n, r in zip(shape_b, region)]
+    # Régions communes aux deux grilles (les variables ont pu grandir)
+    common = [min(a, b) for a, b in zip(counts_a, counts_b)]
+    changed = []
+    total = 0
+    for position in np.ndindex(*common):
+        total += 1
+        index_a = int(np.ravel_multi_index(position, counts_a)) if counts_a else 0
+        index_b = int(np.ravel_multi_index(position, counts_b)) if counts_b else 0
+        if entry_a['hashes'][index_a] != entry_b['hashes'][index_b]:
+            changed.append(int(np.ravel_multi_index(position, common)) if common else 0)
+    shape = [min(a, b) for a, b in zip(shape_a, shape_b)]
+    regions = []
+    merged = _merge_regions(changed, common)
+    for first, last in merged[:MAX_REGIONS]:
+        regions.append([[int(f) * r, min((int(l) + 1) * r, n)]
+                        for f, l, r, n in zip(first, last, region, shape)])
+    return {
+        'status': 'changed' if changed else ('identical' if shape_a == shape_b else 'resized'),
+        'regions_total': total,
+        'regions_changed': len(changed),
+        'regions': regions,
+        'truncated': len(merged) > MAX_REGIONS,
+    }
+
+
+def compare_manifests(a, b):
+    """Différences de structure et de données entre deux manifestes"""
+    groups = _compare_dicts(a['groups'], b['groups'])
+    result = {
+        'files': [a.get('file'), b.get('file')],
+        'groups': {'added': sorted(groups['added']), 'removed': groups['removed']},
+        'dimensions': {},
+        'attributes': {},
+        'variables': {'added': sorted(set(b['variables']) - set(a['variables'])),
+                      'removed': sorted(set(a['variables']) - set(b['variables'])),
+                      'changed': {}, 'attributes': {}},
+        'data': {},
+    }
+    for path in sorted(set(a['groups']) & set(b['groups'])):
+        dims = _compare_dicts(a['groups'][path]['dimensions'], b['groups'][path]['dimensions'])
+        if not _is_empty(dims):
+            result['dimensions'][path] = dims
+        attrs = _compare_dicts(a['groups'][path]['attributes'], b['groups'][path]['attributes'])
+        if not _is_empty(attrs):
+            result['attributes'][path] = attrs
+    for path in sorted(set(a['variables']) & set(b['variables'])):
+        entry_a, entry_b = a['variables'][path], b['variables'][path]
+        if entry_a['dims'] != entry_b['dims'] or entry_a['dtype'] != entry_b['dtype']:
+            result['variables']['changed'][path] = {
+                'dims': [entry_a['dims'], entry_b['dims']],
+                'dtype': [entry_a['dtype'], entry_b['dtype']]}
+            continue
+        attrs = _compare_dicts(entry_a['attributes'], entry_b['attributes'])
+        if not _is_empty(attrs):
+            result['variables']['attributes'][path] = attrs
+        data = compare_data(entry_a, entry_b)
+        if data is not None and data['status'] != 'identical':
+            data['shape'] = [entry_a['shape'], entry_b['shape']]
+            data['dims'] = entry_a['dims']
+            result['data'][path] = data
+    result['identical'] = not (
+        result['groups']['added'] or result['groups']['removed'] or result['dimensions']
+        or result['attributes'] or result['variables']['added']
+        or result['variables']['removed'] or result['variables']['changed']
+        or result['variables']['attributes'] or result['data'])
+    return result
+
+
+def _manifests(sources, workers):
+    """Manifestes des sources (fichiers lus en parallèle dans des processus)"""
+    files = [s for s in sources if isinstance(s, str)]
+    size = sum(os.path.getsize(f) for f in files)
+    if len(files) < 2 or size < PARALLEL_MIN_BYTES:
+        return [manifest(s, workers=workers) if isinstance(s, str) else s for s in sources]
+    # 'spawn' : pas d'héritage de l'état Qt si le pool est lancé depuis l'application
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(files), mp_context=context) as executor:
+        futures = {f: executor.submit(manifest, f, workers=workers) for f in files}
+        return [futures[s].result() if isinstance(s, str) else s for s in sources]
+
+
+def diff_files(a, b, workers=DEFAULT_WORKERS):
+    """Comparer deux fichiers (chemins) ou manifestes (dictionnaires ou chemins .json)"""
+    sources = [load_manifest(s) if isinstance(s, str) and s.endswith('.json') else s
+               for s in (a, b)]
+    with tracing.span("diff", files=f"{a} | {b}"):
+        manifest_a, manifest_b = _manifests(sources, workers)
+        # Chunks différents : relire B sur les régions de A (ou A sur celles de B
+        # quand B n'est disponible que sous forme de manifeste)
+        reference, target = (manifest_a, 1) if isinstance(sources[1], str) else (manifest_b, 0)
+        other = (manifest_a, manifest_b)[target]
+        realign = {path: entry['region'] for path, entry in reference['variables'].items()
+                   if 'region' in entry and path in other['variables']
+                   and other['variables'][path].get('region') != entry['region']}
+        if realign and isinstance(sources[target], str):
+            aligned = manifest(sources[target], grids=realign, variables=set(realign),
+                               workers=workers)
+            for path in realign:
+                other['variables'][path] = aligned['variables'][path]
+        return compare_manifests(manifest_a, manifest_b)
+
+
+def format_report(result):
+    """Résumé lisible d'une comparaison"""
+    lines = []
+    if result['identical']:
+        return "Fichiers identiques"
+    for path in result['groups']['added']:
+        lines.append(f"+ groupe {path}")
+    for path in result['groups']['removed']:
+        lines.append(f"- groupe {path}")
+    for path, dims in result['dimensions'].items():
+        for name, value in dims['added'].items():
+            lines.append(f"+ dimension {path.rstrip('/')}/{name} ({value[0]})")
+        for name in dims['removed']:
+            lines.append(f"- dimension {path.rstrip('/')}/{name}")
+        for name, (old, new) in dims['changed'].items():
+            lines.append(f"~ dimension {path.rstrip('/')}/{name} : {old[0]} -> {new[0]}")
+    for path, attrs in result['attributes'].items():
+        for name in list(attrs['added']) + attrs['removed'] + list(attrs['changed']):
+            lines.append(f"~ attribut global {path.rstrip('/')}/{name}")
+    for path in result['variables']['added']:
+        lines.append(f"+ variable {path}")
+    for path in result['variables']['removed']:
+        lines.append(f"- variable {path}")
+    for path, change in result['variables']['changed'].items():
+        lines.append(f"~ variable {path} : {change['dims'][0]} {change['dtype'][0]}"
+                     f" -> {change['dims'][1]} {change['dtype'][1]}")
+    for path, attrs in result['variables']['attributes'].items():
+        for name in list(attrs['added']) + attrs['removed'] + list(attrs['changed']):
+            lines.append(f"~ attribut {path}:{name}")
+    for path, data in result['data'].items():
+        if data['status'] == 'grid_mismatch':
+            lines.append(f"? données {path} : régions différentes, comparaison impossible")
+            continue
+        lines.append(f"~ données {path} : {data['regions_changed']}/{data['regions_total']}"
+                     f" régions modifiées" + (" (taille modifiée)" if data['shape'][0] != data['shape'][1] else ""))
+        for region in data['regions'][:20]:
+            lines.append("    " + ", ".join(f"{dim} {start}:{stop}"
+                                            for dim, (start, stop) in zip(data['dims'], region)))
+        if len(data['regions']) > 20:
+            lines.append(f"    ... {len(data['regions']) - 20} autres")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m netcdflab.utils.diff',
+        description="Comparer deux versions d'un fichier NetCDF (structure, attributs, données)")
+    parser.add_argument('old', help="Ancienne version (fichier NetCDF ou manifeste .json)")
+    parser.add_argument('new', nargs='?', help="Nouvelle version (fichier NetCDF ou manifeste .json)")
+    parser.add_argument('--report', help="Écrire le rapport JSON dans ce fichier")
+    parser.add_argument('--save-manifest', help="Enregistrer le manifeste de la dernière version")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="Threads de calcul des empreintes par fichier")
+    args = parser.parse_args(argv)
+
+    if args.new is None:
+        if not args.save_manifest:
+            parser.error("une seconde version ou --save-manifest est nécessaire")
+        with open(args.save_manifest, 'w') as f:
+            json.dump(manifest(args.old, workers=args.workers), f)
+        return 0
+
+    result = diff_files(args.old, args.new, workers=args.workers)
+    print(format_report(result))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.save_manifest and not args.new.endswith('.json'):
+        with open(args.save_manifest, 'w') as f:
+            json.dump(manifest(args.new, workers=args.workers), f)
+    return 0 if result['identical'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Export d'une variable en tableau « long » (CSV ou Parquet), bloc par bloc.
+
+Chaque valeur devient une ligne : une colonne par dimension (valeur de la
+coordonnée, ou indice si la dimension n'a pas de coordonnée), une colonne
+par coordonnée auxiliaire portée par les mêmes dimensions, puis la valeur.
+La variable (ou le sous-ensemble choisi) est lue par blocs alignés sur les
+chunks du fichier ; chaque bloc donne un morceau de tableau écrit aussitôt
+— quelques lignes de CSV ou un row group Parquet — sans jamais construire
+le ``DataFrame`` complet (``to_dataframe``).
+
+Le bloc suivant est lu par le thread appelant (les lectures HDF5 ne sont
+pas sûres entre threads) pendant que le précédent est mis en forme et écrit
+dans un thread dédié. Parquet nécessite ``pyarrow`` (dépendance
+optionnelle, ``pip install .[parquet]``).
+
+Utilisation en ligne de commande::
+
+    python -m netcdflab.utils.export data.nc concentration out.parquet --subset "time=0:24" --dropna
+"""
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from netcdflab.utils import tracing
+from netcdflab.utils.chunk_reader import file_chunks
+from netcdflab.utils.chunks import blocks
+
+# Taille maximale d'un bloc lu (estimée sur les valeurs et les colonnes de coordonnées)
+BLOCK_BYTES = 16 * 2**20
+# Formats reconnus d'après l'extension du fichier de sortie
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+
+
+def parquet_available():
+    """pyarrow est-il installé ?"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def output_format(filename):
+    """Format d'après l'extension (CSV par défaut)"""
+    return FORMATS.get(os.path.splitext(filename)[1].lower(), 'csv')
+
+
+def parse_subset(text, dims):
+    """Lire un sous-ensemble « time=0:24, level=2 » en tranches par dimension.
+
+    Un indice seul garde la dimension (tranche d'un élément) pour que la
+    colonne de coordonnée reste dans le tableau.
+    """
+    subset = {}
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        dim, sep, value = part.partition('=')
+        dim = dim.strip()
+        if not sep or dim not in dims:
+            raise ValueError(f"Dimension inconnue : {dim} (attendu : {', '.join(dims)})")
+        bounds = [int(b) if b.strip() else None for b in value.split(':')]
+        if len(bounds) == 1:
+            index = bounds[0]
+            subset[dim] = slice(index, None if index == -1 else index + 1)
+        elif len(bounds) <= 3:
+            subset[dim] = slice(*bounds)
+        else:
+            raise ValueError(f"Sélection invalide : {part}")
+    return subset
+
+
+def _fill_values(var):
+    """Valeurs manquantes encore présentes (variable non décodée)"""
+    values = []
+    for name in ('_FillValue', 'missing_value'):
+        value = var.attrs.get(name)
+        if value is not None:
+            values.extend(np.atleast_1d(value).tolist())
+    return values
+
+
+def _dimension_values(var):
+    """Valeurs de la coordonnée de chaque dimension (indices à défaut)"""
+    columns = []
+    for dim, size in zip(var.dims, var.shape):
+        if dim in var.coords and var.coords[dim].dims == (dim,):
+            columns.append(np.asarray(var.coords[dim].values))
+        else:
+            columns.append(np.arange(size))
+    return columns
+
+
+def _auxiliary_names(var):
+    """Coordonnées non dimensionnelles portées par des dimensions de la variable"""
+    return [name for name, coord in var.coords.items()
+            if name not in var.dims and coord.dims and set(coord.dims) <= set(var.dims)]
+
+
+def rows(var, subset=None, dropna=False, block_bytes=BLOCK_BYTES):
+    """Générer les colonnes ``{nom: tableau 1-D}`` de chaque bloc de la variable.
+
+    ``subset`` associe à des dimensions une tranche (voir ``parse_subset``) ;
+    avec ``dropna``, les lignes dont la valeur est NaN ou une valeur de
+    remplissage sont retirées au fil de la lecture. Chaque bloc est un
+    tuple ``(colonnes, lignes lues)``.
+    """
+    subset = subset or {}
+    # Valeurs (ou indices) de la variable entière : les indices restent ceux du fichier
+    coordinates = [values[subset.get(dim, slice(None))]
+                   for dim, values in zip(var.dims, _dimension_values(var))]
+    if subset:
+        var = var.isel(subset)
+    variable = var.variable
+    name = var.name if var.name is not None else 'value'
+    dims = list(var.dims)
+    auxiliary = _auxiliary_names(var)
+    fills = _fill_values(var) if dropna else []
+    # Une colonne par dimension et par coordonnée auxiliaire, en plus de la valeur
+    itemsize = 8 * (len(dims) + len(auxiliary) + 1)
+
+    for block in blocks(var.shape, itemsize, block_bytes, file_chunks(variable)):
+        values = np.asarray(variable[block].values)
+        shape = values.shape
+        values = values.ravel()
+        count = values.size
+        keep = None
+        if dropna:
+            keep = np.isnan(values) if values.dtype.kind in 'fc' else np.zeros(count, dtype=bool)
+            for fill in fills:
+                keep |= values == fill
+            keep = ~keep
+            if keep.all():
+                keep = None
+            elif not keep.any():
+                yield {}, count
+                continue
+
+        columns = {}
+        for axis, (dim, selection) in enumerate(zip(dims, block)):
+            coord = coordinates[axis][selection]
+            # Indice qui varie le plus lentement en premier (ordre C)
+            column = np.repeat(np.tile(coord, int(np.prod(shape[:axis], dtype=np.int64))),
+                               int(np.prod(shape[axis + 1:], dtype=np.int64)))
+            columns[dim] = column if keep is None else column[keep]
+        if auxiliary:
+            block_var = var[dict(zip(dims, block))]
+            for aux_name in auxiliary:
+                column = block_var[aux_name].broadcast_like(block_var).transpose(*dims).values.ravel()
+                columns[aux_name] = column if keep is None else column[keep]
+        columns[name] = values if keep is None else values[keep]
+        yield columns, count
+
+
+def _as_arrow(columns):
+    """Colonnes acceptées par pyarrow (dates cftime converties en texte)"""
+    return {name: column.astype(str) if column.dtype == object else column
+            for name, column in columns.items()}
+
+
+class _CsvWriter:
+    def __init__(self, filename):
+        self.file = open(filename, 'w', newline='')
+        self.header = True
+
+    def write(self, columns):
+        import pandas as pd
+        pd.DataFrame(columns).to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, filename, compression='snappy'):
+        self.filename = filename
+        self.compression = compression
+        self.writer = None
+
+    def write(self, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table(_as_arrow(columns))
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.filename, table.schema,
+                                           compression=self.compression)
+        # Un row group par bloc
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+
+
+def export_variable(var, filename, fmt=None, subset=None, dropna=False,
+                    block_bytes=BLOCK_BYTES, compression='snappy'):
+    """Écrire la variable (ou un sous-ensemble) en tableau long dans ``filename``.
+
+    Retourne ``{'rows', 'dropped', 'blocks', 'bytes', 'seconds',
+    'rows_per_second', 'bytes_per_second'}``. Au plus deux blocs sont en
+    mémoire à la fois. Lève ``ImportError`` si Parquet est demandé sans
+    pyarrow.
+    """
+    fmt = fmt or output_format(filename)
+    if fmt == 'parquet':
+        if not parquet_available():
+            raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow)")
+        writer = _ParquetWriter(filename, compression=compression)
+    elif fmt == 'csv':
+        writer = _CsvWriter(filename)
+    else:
+        raise ValueError(f"Format inconnu : {fmt}")
+
+    written = dropped = count = 0
+    start = time.perf_counter()
+    with tracing.span("export", variable=getattr(var, 'name', None), format=fmt) as span:
+        empty = None
+        try:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pending = deque()
+                for columns, read in rows(var, subset, dropna, block_bytes):
+                    count += 1
+                    if not columns:
+                        dropped += read
+                        continue
+                    size = len(next(iter(columns.values())))
+                    written += size
+                    dropped += read - size
+                    if empty is None:
+                        empty = {key: column[:0] for key, column in columns.items()}
+                    pending.append(pool.submit(writer.write, columns))
+                    # Lecture du bloc suivant pendant l'écriture de celui-ci
+                    while len(pending) > 1:
+                        pending.popleft().result()
+                while pending:
+                    pending.popleft().result()
+            if empty is None:
+                # Toutes les valeurs retirées : fichier avec les seuls noms de colonnes
+                columns = next(rows(var, subset, False, block_bytes), ({}, 0))[0]
+                writer.write({key: column[:0] for key, column in columns.items()})
+        finally:
+            writer.close()
+        seconds = time.perf_counter() - start
+        nbytes = os.path.getsize(filename)
+        span.set(bytes=nbytes, rows=written)
+
+    return {
+        'rows': written,
+        'dropped': dropped,
+        'blocks': count,
+        'bytes': nbytes,
+        'seconds': seconds,
+        'rows_per_second': written / seconds if seconds else None,
+        'bytes_per_second': nbytes / seconds if seconds else None,
+    }
+
+
+def format_summary(result):
+    """Résumé d'un export sur une ligne"""
+    text = (f"{result['rows']} lignes, {result['bytes'] / 2**20:.1f} Mo "
+            f"en {result['seconds']:.2f} s")
+    if result['rows_per_second']:
+        text += (f" ({result['rows_per_second']:,.0f} lignes/s, "
+                 f"{result['bytes_per_second'] / 2**20:.1f} Mo/s)")
+    if result['dropped']:
+        text += f", {result['dropped']} valeurs manquantes ignorées"
+    return text
+
+
+def main(argv=None):
+    import xarray as xr
+
+    parser = argparse.ArgumentParser(
+        prog='python -m netcdflab.utils.export',
+        description="Exporter une variable NetCDF en tableau (CSV ou Parquet)")
+    parser.add_argument('input', help="Fichier NetCDF")
+    parser.add_argument('variable', help="Variable à exporter")
+    parser.add_argument('output', help="Fichier de sortie (.csv ou .parquet)")
+    parser.add_argument('--format', choices=sorted(set(FORMATS.values())),
+                        help="Format (déduit de l'extension par défaut)")
+    parser.add_argument('--subset', default='', help="Sous-ensemble, ex: 'time=0:24, level=2'")
+    parser.add_argument('--dropna', action='store_true',
+                        help="Ignorer les valeurs manquantes (NaN, _FillValue)")
+    parser.add_argument('--block-mb', type=float, default=BLOCK_BYTES / 2**20,
+                        help="Taille maximale d'un bloc lu (Mo)")
+    parser.add_argument('--compression', default='snappy', help="Compression Parquet")
+    args = parser.parse_args(argv)
+
+    with xr.open_dataset(args.input) as dataset:
+        if args.variable not in dataset.variables:
+            print(f"Variable introuvable : {args.variable}")
+            return 1
+        var = dataset[args.variable]
+        try:
+            result = export_variable(var, args.output, args.format,
+                                     parse_subset(args.subset, var.dims), args.dropna,
+                                     int(args.block_mb * 2**20), args.compression)
+        except (ImportError, ValueError) as e:
+            print(e)
+            return 1
+    print(format_summary(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
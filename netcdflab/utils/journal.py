@@ -0,0 +1,347 @@
+"""Journal des modifications faites dans l'application.
+
+Chaque édition de ``DataPanel`` est enregistrée comme une opération de
+``netcdflab.utils.operations``. Le journal peut être exporté :
+
+- en pipeline JSON, rejouable avec ``python -m netcdflab.utils.journal``
+  ou applicable à d'autres fichiers avec ``python -m netcdflab.utils.batch`` ;
+- en script Python autonome (xarray seulement).
+
+Au rejeu, les opérations d'un même fichier sont fusionnées : le fichier est
+lu et écrit une seule fois, et les opérations écrasées par une opération
+ultérieure (même attribut, même valeur, variable supprimée) sont retirées.
+"""
+import sys
+import json
+import math
+import argparse
+from datetime import datetime
+
+PIPELINE_VERSION = 1
+
+# Opérations après lesquelles les noms et positions ne désignent plus
+# forcément les mêmes données : la fusion ne les traverse pas
+_BARRIERS = ('rename_variable', 'drop_index', 'subset')
+
+
+def fuse_operations(operations):
+    """Retirer les opérations sans effet sur le résultat final.
+
+    Parcourt la liste à rebours : une modification d'attribut ou de valeur
+    est inutile si la même cible est réécrite plus loin, ou si sa variable
+    est supprimée plus loin, sans opération de renommage ou de découpage
+    entre les deux.
+    """
+    fused = []
+    overwritten = set()
+    for operation in reversed(operations):
+        op = operation.get('op')
+        if op in _BARRIERS:
+            overwritten.clear()
+            fused.append(operation)
+            continue
+
+        if op in ('set_attribute', 'delete_attribute'):
+            variable = operation.get('variable')
+            key = ('attr', variable, operation['name'])
+            if key in overwritten or (variable and ('var', variable) in overwritten):
+                continue
+            overwritten.add(key)
+        elif op == 'set_value':
+            variable = operation['variable']
+            key = ('value', variable, operation['index'])
+            if key in overwritten or ('var', variable) in overwritten:
+                continue
+            overwritten.add(key)
+        elif op == 'delete_variable':
+            overwritten.add(('var', operation['name']))
+
+        fused.append(operation)
+
+    fused.reverse()
+    return fused
+
+
+def to_json_value(value):
+    """Convertir une valeur éditée en valeur JSON (dates en ISO 8601)"""
+    import numpy as np
+
+    if isinstance(value, np.datetime64):
+        return str(value.astype('datetime64[s]'))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class OperationJournal:
+    """Liste ordonnée des opérations appliquées à chaque fichier"""
+
+    def __init__(self):
+        self.entries = []  # (filename, operation)
+
+    def record(self, filename, operation):
+        """Ajouter une opération au journal"""
+        operation = {key: to_json_value(value) for key, value in operation.items()}
+        self.entries.append((filename, operation))
+
+    def clear(self, filename=None):
+        """Vider le journal (pour un fichier ou pour tous)"""
+        if filename is None:
+            self.entries = []
+        else:
+            self.entries = [(f, op) for f, op in self.entries if f != filename]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def files(self):
+        """Fichiers modifiés, dans l'ordre de la première modification"""
+        return list(dict.fromkeys(f for f, _ in self.entries))
+
+    def operations_for(self, filename, fuse=True):
+        """Opérations d'un fichier, fusionnées par défaut"""
+        operations = [op for f, op in self.entries if f == filename]
+        return fuse_operations(operations) if fuse else operations
+
+    def to_pipeline(self, fuse=True):
+        """Pipeline JSON : une étape (lecture + écriture) par fichier"""
+        return {
+            'version': PIPELINE_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'steps': [{'file': f, 'operations': self.operations_for(f, fuse)}
+                      for f in self.files()],
+        }
+
+    def export_json(self, path, fuse=True):
+        """Exporter le journal en pipeline JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.to_pipeline(fuse), f, indent=2, ensure_ascii=False)
+
+    def export_script(self, path, fuse=True):
+        """Exporter le journal en script Python autonome"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(pipeline_to_script(self.to_pipeline(fuse)))
+
+
+def load_pipeline(path):
+    """Lire un pipeline JSON (ou une simple liste d'opérations)"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {'version': PIPELINE_VERSION, 'steps': [{'file': None, 'operations': data}]}
+    if data.get('version', 0) > PIPELINE_VERSION:
+        raise ValueError(f"Version de pipeline non supportée: {data.get('version')}")
+    return data
+
+
+def pipeline_operations(pipeline):
+    """Liste d'opérations d'un pipeline à une seule étape (pour l'appliquer à d'autres fichiers)"""
+    steps = pipeline['steps']
+    if len(steps) != 1:
+        files = ', '.join(str(step['file']) for step in steps)
+        raise ValueError(f"Le pipeline contient plusieurs fichiers ({files}) : "
+                         "impossible de choisir les opérations à appliquer")
+    return steps[0]['operations']
+
+
+def replay_pipeline(pipeline, output_dir=None, workers=None, progress=None):
+    """Rejouer un pipeline : chaque fichier est lu et écrit une seule fois"""
+    from netcdflab.utils.batch import run_batch
+
+    operations = {}
+    for step in pipeline['steps']:
+        operations.setdefault(step['file'], []).extend(step['operations'])
+    operations = {f: fuse_operations(ops) for f, ops in operations.items()}
+    return run_batch(list(operations), operations, output_dir=output_dir,
+                     workers=workers, progress=progress)
+
+
+def _literal(value):
+    """Représentation Python d'une valeur JSON"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return f"float('{value}')"
+    return repr(value)
+
+
+def _operation_to_code(operation):
+    """Traduire une opération en lignes de code xarray"""
+    op = operation['op']
+    variable = operation.get('variable')
+    target = f"ds[{variable!r}]" if variable else "ds"
+
+    if op == 'set_attribute':
+        return [f"{target}.attrs[{operation['name']!r}] = {_literal(operation['value'])}"]
+    if op == 'delete_attribute':
+        return [f"{target}.attrs.pop({operation['name']!r}, None)"]
+    if op == 'rename_variable':
+        return [f"ds[{operation['new']!r}] = ds[{operation['old']!r}]",
+                f"del ds[{operation['old']!r}]"]
+    if op == 'delete_variable':
+        return [f"del ds[{operation['name']!r}]"]
+    if op == 'set_value':
+        return [f"ds = set_value(ds, {variable!r}, {operation['index']!r}, "
+                f"{_literal(operation['value'])})"]
+    if op == 'drop_index':
+        return [f"ds = ds.drop_isel({{{operation['dim']!r}: [{operation['index']!r}]}})"]
+    if op == 'subset':
+        lines = []
+        for method in ('isel', 'sel'):
+            if operation.get(method):
+                selection = ', '.join(
+                    f"{dim!r}: " + (f"slice(*{list(bounds)!r})" if isinstance(bounds, list)
+                                    and 2 <= len(bounds) <= 3 else repr(bounds))
+                    for dim, bounds in operation[method].items())
+                lines.append(f"ds = ds.{method}({{{selection}}})")
+        return lines
+    if op == 'recompress':
+        return [f"encoding.update(compression_encoding(ds, {operation.get('complevel', 4)!r}, "
+                f"{operation.get('variables')!r}))"]
+    if op == 'pack':
+        return [f"encoding.update(packing_encoding(ds, {operation.get('variables')!r}, "
+                f"{operation.get('dtype', 'int16')!r}, {operation.get('complevel', 4)!r}))"]
+    if op == 'quantize':
+        from netcdflab.utils.packing import quantize_encoding
+        quantization = quantize_encoding(operation.get('significant_digits'),
+                                         operation.get('least_significant_digit'),
+                                         operation.get('mode', 'BitGroom'),
+                                         operation.get('complevel', 4))
+        return [f"encoding.update({{name: dict({quantization!r}) "
+                f"for name in float_variables(ds, {operation.get('variables')!r})}})"]
+    raise ValueError(f"Opération inconnue: {op}")
+
+
+_SCRIPT_HEADER = '''#!/usr/bin/env python
+"""Macro exportée par NetCDF Lab le {date}.
+
+Rejoue les modifications enregistrées ; chaque fichier est lu et écrit une
+seule fois. Utilisation :
+
+    python macro.py                # fichiers d'origine
+    python macro.py a.nc b.nc      # autres fichiers (macro d'un seul fichier)
+"""
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+import xarray as xr
+
+
+def set_value(ds, name, index, value):
+    values = ds[name].values.copy()
+    values[index] = np.datetime64(value) if values.dtype.kind == 'M' else value
+    if name in ds.indexes:
+        return ds.assign_coords({{name: (ds[name].dims, values, ds[name].attrs)}})
+    ds[name].values = values
+    return ds
+
+
+def compression_encoding(ds, complevel, variables=None):
+    encoding = {{}}
+    for name in variables or list(ds.variables):
+        var = ds.variables[name]
+        if var.dims and var.dtype.kind not in ('U', 'S', 'O'):
+            encoding[name] = {{'zlib': bool(complevel), 'complevel': complevel}}
+    return encoding
+
+
+def float_variables(ds, variables=None):
+    return variables or [name for name, var in ds.data_vars.items()
+                         if var.dtype.kind == 'f' and var.dims]
+
+
+def packing_encoding(ds, variables, dtype, complevel):
+    info = np.iinfo(dtype)
+    # Valeur entière réservée à _FillValue : la plus petite (signé) ou la plus grande
+    if info.min < 0:
+        lowest, levels, fill = info.min + 1, info.max - info.min - 1, info.min
+    else:
+        lowest, levels, fill = 0, info.max - 1, info.max
+    encoding = {{}}
+    for name in float_variables(ds, variables):
+        low, high = float(ds[name].min()), float(ds[name].max())
+        if not np.isfinite(low):
+            low = high = 0.0
+        scale = (high - low) / levels
+        scale = scale if scale > 0 else 1.0
+        encoding[name] = {{'dtype': dtype, 'scale_factor': scale, 'add_offset': low - lowest * scale,
+                          '_FillValue': fill}}
+        if complevel:
+            encoding[name].update({{'zlib': True, 'complevel': complevel}})
+    return encoding
+
+
+def run(path, process):
+    with xr.open_dataset(path) as source:
+        ds = source.load()
+    encoding = {{}}
+    ds = process(ds, encoding)
+    fd, temp_path = tempfile.mkstemp(suffix='.nc', dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        ds.to_netcdf(temp_path, encoding=encoding)
+        shutil.move(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    print(f"{{path}}: OK")
+
+'''
+
+
+def pipeline_to_script(pipeline):
+    """Générer le code d'un script Python autonome rejouant le pipeline"""
+    parts = [_SCRIPT_HEADER.format(date=datetime.now().strftime('%Y-%m-%d %H:%M'))]
+    steps = []
+    for number, step in enumerate(pipeline['steps']):
+        lines = []
+        for operation in step['operations']:
+            lines.extend(_operation_to_code(operation))
+        body = '\n'.join(f"    {line}" for line in lines) or "    pass"
+        parts.append(f"\ndef step_{number}(ds, encoding):\n{body}\n    return ds\n\n")
+        steps.append(f"    ({step['file']!r}, step_{number}),")
+
+    parts.append("\nSTEPS = [\n" + '\n'.join(steps) + "\n]\n\n")
+    parts.append('''
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        if len(STEPS) != 1:
+            sys.exit("Cette macro contient plusieurs fichiers : lancez-la sans argument")
+        for path in sys.argv[1:]:
+            run(path, STEPS[0][1])
+    else:
+        for path, process in STEPS:
+            run(path, process)
+''')
+    return ''.join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m netcdflab.utils.journal',
+        description="Rejouer un pipeline JSON exporté par NetCDF Lab")
+    parser.add_argument('pipeline', help="Fichier JSON du pipeline")
+    parser.add_argument('--output-dir', help="Dossier de sortie (par défaut: sur place)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus")
+    parser.add_argument('--script', help="Convertir le pipeline en script Python au lieu de le rejouer")
+    args = parser.parse_args(argv)
+
+    pipeline = load_pipeline(args.pipeline)
+    if args.script:
+        with open(args.script, 'w', encoding='utf-8') as f:
+            f.write(pipeline_to_script(pipeline))
+        return 0
+
+    from netcdflab.utils.batch import summarize, _print_progress
+    results = replay_pipeline(pipeline, output_dir=args.output_dir,
+                              workers=args.workers, progress=_print_progress)
+    summary = summarize(results)
+    print(f"\n{summary['ok']}/{summary['total']} fichier(s) traité(s)")
+    return 0 if summary['ok'] == summary['total'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
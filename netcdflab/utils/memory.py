@@ -0,0 +1,209 @@
+"""Suivi de la mémoire utilisée par les fichiers ouverts et budget global.
+
+Les fichiers sont ouverts en accès différé : une variable n'occupe de la
+mémoire qu'une fois lue (tracé, édition...). ``MemoryBudget`` mesure les
+octets résidents par fichier, par variable et par cache, et libère de la
+mémoire quand le budget est dépassé :
+
+1. vidage des caches enregistrés avec ``register_cache`` ;
+2. retour à l'accès sur disque des variables chargées, en commençant par
+   les fichiers utilisés le moins récemment.
+
+Seules les variables identiques au fichier sur disque sont libérées : une
+variable dont les valeurs ont été modifiées reste en mémoire jusqu'à la
+sauvegarde.
+
+Le budget par défaut est la moitié de la mémoire physique ; il peut être
+fixé en Mo avec la variable d'environnement ``NETCDFLAB_MEMORY_BUDGET``.
+"""
+import os
+import itertools
+
+from netcdflab.utils import tracing
+
+# Budget utilisé si la mémoire physique ne peut pas être déterminée
+FALLBACK_BUDGET = 4 * 2**30
+# Fraction de la mémoire physique utilisée par défaut
+DEFAULT_FRACTION = 0.5
+
+# Toutes les variables d'un fichier sont modifiées
+ALL_VARIABLES = None
+
+
+def format_bytes(size):
+    """Afficher une taille en octets de façon lisible"""
+    for unit in ('o', 'Ko', 'Mo', 'Go'):
+        if abs(size) < 1024 or unit == 'Go':
+            return f"{size:.0f} {unit}" if unit == 'o' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def physical_memory():
+    """Mémoire physique de la machine en octets (None si inconnue)"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        pass
+    if os.name == 'nt':
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong),
+                        ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong),
+                        ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullTotalPhys
+    return None
+
+
+def default_budget():
+    """Budget par défaut : NETCDFLAB_MEMORY_BUDGET (Mo) ou moitié de la mémoire physique"""
+    value = os.getenv('NETCDFLAB_MEMORY_BUDGET')
+    if value:
+        try:
+            return int(float(value) * 2**20)
+        except ValueError:
+            print(f"NETCDFLAB_MEMORY_BUDGET invalide: {value}")
+    total = physical_memory()
+    return int(total * DEFAULT_FRACTION) if total else FALLBACK_BUDGET
+
+
+def resident_variables(dataset):
+    """Octets en mémoire de chaque variable chargée d'un dataset"""
+    return {name: int(var.nbytes) for name, var in dataset.variables.items()
+            if var._in_memory}
+
+
+def changed_variables(operation):
+    """Variables dont les valeurs diffèrent du fichier après une opération.
+
+    Retourne un ensemble de noms ou ``ALL_VARIABLES``.
+    """
+    name = operation['op']
+    if name == 'set_value':
+        return {operation['variable']}
+    if name == 'rename_variable':
+        # Le nouveau nom n'existe pas dans le fichier
+        return {operation['new']}
+    if name in ('drop_index', 'subset'):
+        return ALL_VARIABLES
+    # Attributs, suppression, compression : données inchangées
+    return set()
+
+
+class MemoryBudget:
+    """Comptabilité mémoire des fichiers ouverts et éviction au-delà du budget"""
+
+    def __init__(self, budget=None):
+        self.budget = budget if budget is not None else default_budget()
+        self.caches = {}  # nom: (taille(), vider())
+        self.changed = {}  # filename: noms des variables modifiées (ou ALL_VARIABLES)
+        self._last_access = {}  # filename: numéro d'accès
+        self._clock = itertools.count()
+
+    def register_cache(self, name, size, clear):
+        """Déclarer un cache : ``size()`` retourne ses octets, ``clear()`` le vide"""
+        self.caches[name] = (size, clear)
+
+    def touch(self, filename):
+        """Noter l'utilisation d'un fichier (ordre d'éviction)"""
+        self._last_access[filename] = next(self._clock)
+
+    def mark_changed(self, filename, operation):
+        """Enregistrer les variables modifiées par une opération d'édition"""
+        changed = changed_variables(operation)
+        current = self.changed.get(filename, set())
+        if changed is ALL_VARIABLES or current is ALL_VARIABLES:
+            self.changed[filename] = ALL_VARIABLES
+        else:
+            self.changed[filename] = current | changed
+
+    def mark_clean(self, filename):
+        """Le dataset correspond de nouveau au fichier (après sauvegarde)"""
+        self.changed.pop(filename, None)
+        self.touch(filename)
+
+    def forget(self, filename):
+        self.changed.pop(filename, None)
+        self._last_access.pop(filename, None)
+
+    def usage(self, datasets):
+        """Octets résidents par fichier, par variable et par cache"""
+        files = {}
+        for filename, dataset in datasets.items():
+            variables = resident_variables(dataset)
+            files[filename] = {'total': sum(variables.values()), 'variables': variables}
+        caches = {name: int(size()) for name, (size, _) in self.caches.items()}
+        total = sum(f['total'] for f in files.values()) + sum(caches.values())
+        return {'files': files, 'caches': caches, 'total': total, 'budget': self.budget}
+
+    def evictable(self, filename, dataset):
+        """Variables chargées qui peuvent être relues depuis le fichier"""
+        changed = self.changed.get(filename, set())
+        if changed is ALL_VARIABLES or not os.path.exists(filename):
+            return {}
+        return {name: size for name, size in resident_variables(dataset).items()
+                if name not in changed and name not in dataset.indexes}
+
+    def enforce(self, datasets, keep=None):
+        """Libérer de la mémoire si le budget est dépassé ; retourne les octets libérés.
+
+        ``keep`` est le fichier en cours d'utilisation, libéré en dernier.
+        """
+        usage = self.usage(datasets)
+        excess = usage['total'] - self.budget
+        if excess <= 0:
+            return 0
+
+        freed = 0
+        with tracing.span("memory_evict", excess=excess) as span:
+            # 1. Caches, du plus gros au plus petit
+            for name, size in sorted(usage['caches'].items(), key=lambda item: -item[1]):
+                if freed >= excess:
+                    break
+                if size:
+                    self.caches[name][1]()
+                    freed += size
+
+            # 2. Variables chargées des fichiers les moins récemment utilisés
+            order = sorted(datasets, key=lambda f: (f == keep, self._last_access.get(f, -1)))
+            for filename in order:
+                if freed >= excess:
+                    break
+                candidates = self.evictable(filename, datasets[filename])
+                names = []
+                for name, size in sorted(candidates.items(), key=lambda item: -item[1]):
+                    if freed >= excess:
+                        break
+                    names.append(name)
+                    freed += size
+                if names:
+                    release_variables(datasets[filename], filename, names)
+            span.set(bytes=freed)
+        return freed
+
+
+def release_variables(dataset, filename, names):
+    """Remplacer des variables chargées par un accès différé au fichier"""
+    from netcdflab.utils.netcdf_io import open_dataset
+
+    with open_dataset(filename) as source:
+        for name in names:
+            if name not in source.variables:
+                continue
+            current = dataset.variables[name]
+            lazy = source.variables[name].copy(deep=False)
+            lazy.attrs = dict(current.attrs)
+            lazy.encoding = dict(current.encoding)
+            dataset[name] = lazy
+
+
+# Instance globale utilisée par l'application
+manager = MemoryBudget()
@@ -0,0 +1,271 @@
+"""Cache persistant des métadonnées des fichiers NetCDF.
+
+Pour chaque fichier ouvert, les dimensions, variables (dims, type,
+attributs, encodage), les valeurs affichées dans l'arbre et quelques
+statistiques peu coûteuses sont enregistrées dans une base SQLite du
+dossier de l'application. L'entrée est identifiée par le chemin, la taille
+et la date de modification du fichier : elle est ignorée dès que le
+fichier change.
+
+À la réouverture, l'arbre est construit depuis le cache (``CachedDataset``)
+sans relire le fichier, et le menu des fichiers récents affiche un résumé
+de chaque fichier.
+"""
+import os
+import json
+import time
+import sqlite3
+import warnings
+
+import numpy as np
+
+CACHE_FILENAME = 'metadata_cache.sqlite'
+# Incrémenté quand le contenu des métadonnées change
+FORMAT_VERSION = 2
+# Nombre maximal de fichiers conservés dans le cache
+MAX_ENTRIES = 500
+# Les valeurs des variables plus petites sont conservées (comme dans l'arbre)
+MAX_VALUES = 100
+# Taille maximale des variables dont les statistiques sont calculées
+MAX_STATS_SIZE = 100_000
+# Clés d'encodage conservées
+ENCODING_KEYS = ('dtype', 'zlib', 'complevel', 'shuffle', 'chunksizes', 'contiguous',
+                 'fletcher32', 'szip', 'zstd', 'bzip2', 'blosc', '_FillValue', 'scale_factor', 'add_offset', 'units', 'calendar')
+
+
+def file_key(filename):
+    """Identité d'un fichier sur disque : (taille, date de modification en ns)"""
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def to_json(value):
+    """Convertir une valeur (numpy, bytes, dates...) en valeur JSON"""
+    if isinstance(value, np.ndarray):
+        return [to_json(v) for v in value.tolist()] if value.dtype.kind != 'M' \
+            else [str(v) for v in value]
+    if isinstance(value, np.datetime64):
+        return str(value)
+    if isinstance(value, np.generic):
+        # Même traitement que les valeurs Python (NaN et infinis en texte)
+        return to_json(value.item())
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, float) and not np.isfinite(value):
+        return str(value)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def variable_stats(var):
+    """Minimum, maximum et moyenne d'une petite variable numérique"""
+    if var.dtype.kind not in 'iuf' or var.size == 0 or var.size > MAX_STATS_SIZE:
+        return None
+    values = np.asarray(var.values, dtype=float)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        stats = {'min': np.nanmin(values), 'max': np.nanmax(values), 'mean': np.nanmean(values)}
+    return {key: to_json(float(value)) for key, value in stats.items()}
+
+
+def describe(dataset):
+    """Métadonnées JSON d'un dataset xarray"""
+    variables = {}
+    for name, var in dataset.variables.items():
+        entry = {
+            'dims': list(var.dims),
+            'shape': list(var.shape),
+            'dtype': var.dtype.str if var.dtype.kind != 'O' else 'object',
+            'attrs': {key: to_json(value) for key, value in var.attrs.items()},
+            'encoding': {key: to_json(value) for key, value in var.encoding.items()
+                         if key in ENCODING_KEYS},
+        }
+        if var.size < MAX_VALUES or name in dataset.dims:
+            entry['values'] = to_json(np.atleast_1d(var.values))
+        stats = variable_stats(var)
+        if stats:
+            entry['stats'] = stats
+        variables[name] = entry
+    return {
+        'version': FORMAT_VERSION,
+        'dims': {name: int(size) for name, size in dataset.sizes.items()},
+        'unlimited': sorted(dataset.encoding.get('unlimited_dims', ())),
+        'attrs': {key: to_json(value) for key, value in dataset.attrs.items()},
+        'variables': variables,
+        'nbytes': int(dataset.nbytes),
+    }
+
+
+def summary_text(metadata):
+    """Résumé d'une ligne : dimensions, nombre de variables et taille des données"""
+    from netcdflab.utils.memory import format_bytes
+
+    dims = ", ".join(f"{name}: {size}" for name, size in metadata['dims'].items())
+    data_vars = [name for name in metadata['variables'] if name not in metadata['dims']]
+    return f"{dims} | {len(data_vars)} variables | {format_bytes(metadata['nbytes'])}"
+
+
+class CachedVariable:
+    """Variable reconstruite depuis le cache (même interface que l'arbre utilise)"""
+
+    def __init__(self, name, entry):
+        self.name = name
+        self.dims = tuple(entry['dims'])
+        self.shape = tuple(entry['shape'])
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+        self.dtype = np.dtype(entry['dtype'])
+        self.attrs = entry['attrs']
+        self.encoding = entry['encoding']
+        self.stats = entry.get('stats')
+        self._values = entry.get('values')
+
+    @property
+    def values(self):
+        if self._values is None:
+            raise ValueError(f"Valeurs de {self.name} absentes du cache")
+        if self.dtype.kind == 'S':
+            # Les chaînes d'octets sont stockées décodées
+            return np.array(self._values, dtype=str)
+        if self.dtype.kind == 'O':
+            return np.array(self._values, dtype=object)
+        return np.array(self._values, dtype=self.dtype)
+
+
+class CachedDataset:
+    """Dataset reconstruit depuis le cache, sans accès au fichier"""
+
+    def __init__(self, metadata):
+        self.dims = dict(metadata['dims'])
+        self.sizes = self.dims
+        self.attrs = metadata['attrs']
+        self.variables = {name: CachedVariable(name, entry)
+                          for name, entry in metadata['variables'].items()}
+        self.nbytes = metadata['nbytes']
+        self.encoding = {'unlimited_dims': set(metadata.get('unlimited', ()))}
+
+
+class MetadataCache:
+    """Base SQLite des métadonnées, indexée par chemin, taille et date de modification"""
+
+    def __init__(self, app_data_path, filename=CACHE_FILENAME):
+        self.path = os.path.join(app_data_path, filename)
+        self.enabled = True
+        try:
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER,"
+                " accessed REAL, metadata TEXT)")
+            # Statistiques complètes des variables, calculées à la demande
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS statistics ("
+                " path TEXT, variable TEXT, size INTEGER, mtime INTEGER, stats TEXT,"
+                " PRIMARY KEY (path, variable))")
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Cache des métadonnées indisponible: {e}")
+            self.enabled = False
+
+    def _row(self, filename):
+        return self.connection.execute(
+            "SELECT size, mtime, metadata FROM files WHERE path = ?",
+            (os.path.abspath(filename),)).fetchone()
+
+    def get(self, filename):
+        """Métadonnées du fichier si le cache est à jour, sinon None"""
+        if not self.enabled:
+            return None
+        try:
+            key = file_key(filename)
+            row = self._row(filename)
+            if row is None or (row[0], row[1]) != key:
+                return None
+            metadata = json.loads(row[2])
+            if metadata.get('version') != FORMAT_VERSION:
+                return None
+            self.connection.execute("UPDATE files SET accessed = ? WHERE path = ?",
+                                    (time.time(), os.path.abspath(filename)))
+            self.connection.commit()
+            return metadata
+        except (OSError, ValueError, sqlite3.Error):
+            return None
+
+    def peek(self, filename):
+        """Métadonnées enregistrées, sans vérifier ni lire le fichier"""
+        if not self.enabled:
+            return None
+        try:
+            row = self._row(filename)
+            return json.loads(row[2]) if row else None
+        except (ValueError, sqlite3.Error):
+            return None
+
+    def put(self, filename, metadata):
+        """Enregistrer les métadonnées d'un fichier"""
+        if not self.enabled:
+            return
+        try:
+            size, mtime = file_key(filename)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime, accessed, metadata)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(filename), size, mtime, time.time(), json.dumps(metadata)))
+            self.prune()
+            self.connection.commit()
+        except (OSError, TypeError, ValueError, sqlite3.Error) as e:
+            print(f"Erreur lors de l'écriture du cache des métadonnées: {e}")
+
+    def get_statistics(self, filename):
+        """Statistiques enregistrées pour la version actuelle du fichier : ``{variable: stats}``"""
+        if not self.enabled:
+            return {}
+        try:
+            size, mtime = file_key(filename)
+            rows = self.connection.execute(
+                "SELECT variable, stats FROM statistics WHERE path = ? AND size = ? AND mtime = ?",
+                (os.path.abspath(filename), size, mtime)).fetchall()
+            return {variable: json.loads(stats) for variable, stats in rows}
+        except (OSError, ValueError, sqlite3.Error):
+            return {}
+
+    def put_statistics(self, filename, variable, stats):
+        """Enregistrer les statistiques d'une variable (valables tant que le fichier ne change pas)"""
+        if not self.enabled:
+            return
+        try:
+            size, mtime = file_key(filename)
+            path = os.path.abspath(filename)
+            # Les statistiques d'une version précédente du fichier ne servent plus
+            self.connection.execute(
+                "DELETE FROM statistics WHERE path = ? AND (size != ? OR mtime != ?)",
+                (path, size, mtime))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO statistics (path, variable, size, mtime, stats)"
+                " VALUES (?, ?, ?, ?, ?)", (path, variable, size, mtime, json.dumps(stats)))
+            self.connection.commit()
+        except (OSError, TypeError, ValueError, sqlite3.Error) as e:
+            print(f"Erreur lors de l'écriture des statistiques: {e}")
+
+    def remove(self, filename):
+        if self.enabled:
+            self.connection.execute("DELETE FROM files WHERE path = ?",
+                                    (os.path.abspath(filename),))
+            self.connection.execute("DELETE FROM statistics WHERE path = ?",
+                                    (os.path.abspath(filename),))
+            self.connection.commit()
+
+    def prune(self, max_entries=MAX_ENTRIES):
+        """Supprimer les entrées les moins récemment utilisées au-delà de ``max_entries``"""
+        self.connection.execute(
+            "DELETE FROM files WHERE path NOT IN"
+            " (SELECT path FROM files ORDER BY accessed DESC LIMIT ?)", (max_entries,))
+        self.connection.execute(
+            "DELETE FROM statistics WHERE path NOT IN (SELECT path FROM files)")
+
+    def close(self):
+        if self.enabled:
+            self.connection.close()
+            self.enabled = False
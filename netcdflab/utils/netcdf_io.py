@@ -0,0 +1,371 @@
+"""Lecture et écriture des fichiers NetCDF.
+
+Ce module regroupe le code de chargement et de sauvegarde utilisé par
+``DataPanel`` afin que les outils hors interface (traitements par lots,
+scripts) produisent exactement les mêmes fichiers que l'application. Un
+store Zarr local (répertoire) s'ouvre par les mêmes fonctions.
+"""
+import os
+import gc
+import shutil
+import tempfile
+from datetime import datetime
+
+from netcdflab.utils import tracing
+
+# Unités utilisées pour les dates sans attribut 'units'
+DEFAULT_TIME_UNITS = 'seconds since 1970-01-01 00:00:00'
+# Arguments de createVariable repris de l'encodage lu par xarray
+STORAGE_KEYS = ('zlib', 'complevel', 'shuffle', 'fletcher32', 'contiguous', 'chunksizes', 'endian')
+# Attributs posés par netCDF-C sur une variable quantifiée : mode de quantification
+QUANTIZE_ATTRIBUTES = {
+    '_QuantizeBitGroomNumberOfSignificantDigits': 'BitGroom',
+    '_QuantizeGranularBitRoundNumberOfSignificantDigits': 'GranularBitRound',
+    '_QuantizeBitRoundNumberOfSignificantBits': 'BitRound',
+}
+# Attributs déplacés dans l'encodage par le décodage CF, à réécrire tels quels
+RESTORED_ATTRIBUTES = ('missing_value', 'coordinates')
+
+
+def is_zarr(filename):
+    """Le chemin désigne-t-il un store Zarr local (un répertoire) ?"""
+    return os.path.isdir(filename)
+
+
+def open_dataset(filename):
+    """Ouvrir un fichier NetCDF ou un store Zarr local (lecture différée, sans dask)"""
+    import xarray as xr
+
+    if is_zarr(filename):
+        return xr.open_dataset(filename, engine='zarr', chunks=None)
+    return xr.open_dataset(filename)
+
+
+def load_dataset(filename):
+    """Charger un fichier NetCDF entièrement en mémoire et fermer le fichier"""
+    with tracing.span("load", file=filename) as span:
+        # Ouvrir le dataset (lecture de l'en-tête et décodage CF)
+        with tracing.span("decode", file=filename):
+            original_dataset = open_dataset(filename)
+        # Faire une copie et fermer l'original
+        dataset = original_dataset.copy(deep=True)
+        original_dataset.close()
+        span.set(bytes=int(dataset.nbytes), file_bytes=os.path.getsize(filename))
+    return dataset
+
+
+def estimate_nbytes(filename):
+    """Estimer la mémoire nécessaire au chargement d'un fichier (sans lire les données)"""
+    with open_dataset(filename) as dataset:
+        return int(dataset.nbytes)
+
+
+def release_file(filename):
+    """Fermer les descripteurs que le cache de fichiers d'xarray garde ouverts sur ``filename``.
+
+    Une variable différée rouvre son fichier à la lecture, même après la
+    fermeture de son dataset, et le descripteur reste dans ce cache. Il
+    doit être fermé avant de remplacer le fichier : HDF5 le confondrait
+    avec le nouveau fichier écrit au même chemin. La lecture suivante
+    rouvre le fichier.
+    """
+    from xarray.backends.file_manager import FILE_CACHE
+
+    path = os.path.realpath(filename)
+    for key in list(FILE_CACHE):
+        args = key[1] if len(key) > 1 else ()
+        if args and isinstance(args[0], (str, os.PathLike)) and os.path.realpath(args[0]) == path:
+            handle = FILE_CACHE.pop(key, None)
+            if handle is not None:
+                handle.close()
+
+
+def is_time(var):
+    """Variable de dates (datetime64, ou dates cftime d'un calendrier non standard)"""
+    if var.dtype.kind == 'M':
+        return True
+    return var.dtype.kind == 'O' and 'since' in str(var.encoding.get('units', ''))
+
+
+def variable_encoding(var, unlimited_dims=()):
+    """Encodage d'origine d'une variable (``var.encoding`` lu par xarray) au format de ``write_dataset``.
+
+    Conserve le type stocké, ``_FillValue``, ``scale_factor``/``add_offset``,
+    la compression, les chunks et la quantification du fichier lu. Les
+    chunks sont abandonnés si la forme de la variable a changé.
+    """
+    import numpy as np
+
+    source = var.encoding
+    encoding = {key: source[key] for key in STORAGE_KEYS if source.get(key) is not None}
+    if tuple(source.get('original_shape', var.shape)) != tuple(var.shape):
+        encoding.pop('chunksizes', None)
+        encoding.pop('contiguous', None)
+    if encoding.get('contiguous') and set(var.dims) & set(unlimited_dims):
+        encoding.pop('contiguous')
+
+    time = is_time(var)
+    dtype = source.get('dtype')
+    if dtype is not None and not time and var.dtype.kind in 'iuf' and np.dtype(dtype).kind in 'iuf':
+        encoding['dtype'] = np.dtype(dtype)
+        if np.dtype(dtype).kind in 'iu':
+            encoding.update({key: source[key] for key in ('scale_factor', 'add_offset')
+                             if key in source})
+    fill = source.get('_FillValue', var.attrs.get('_FillValue'))
+    if fill is not None and (time or var.dtype.kind in 'iuf'):
+        encoding['_FillValue'] = fill
+
+    for attr_name, mode in QUANTIZE_ATTRIBUTES.items():
+        if attr_name in var.attrs:
+            encoding.update({'significant_digits': int(var.attrs[attr_name]), 'quantize_mode': mode})
+    if 'least_significant_digit' in var.attrs:
+        encoding['least_significant_digit'] = int(var.attrs['least_significant_digit'])
+    return encoding
+
+
+def _merge_encoding(saved, explicit, var):
+    """Encodage d'origine complété par l'encodage demandé (compactage ou quantification)"""
+    from netcdflab.utils import packing
+
+    merged = dict(saved)
+    if 'dtype' in explicit or any(key in explicit for key in packing.QUANTIZE_KEYS):
+        for key in packing.QUANTIZE_KEYS:
+            merged.pop(key, None)
+        # Nouveau compactage, ou quantification d'une variable compactée : type d'origine oublié
+        if 'dtype' in explicit or merged.get('dtype', var.dtype) != var.dtype:
+            for key in packing.PACKING_KEYS:
+                merged.pop(key, None)
+    merged.update(explicit)
+    if merged.get('contiguous') and any(merged.get(key) for key in
+                                        ('zlib', 'shuffle', 'fletcher32', 'chunksizes')):
+        # Une variable compressée est forcément découpée en chunks
+        merged.pop('contiguous')
+    return merged
+
+
+def write_dataset(dataset, filename, encoding=None, unlimited_dims=None, report=None):
+    """Écrire un dataset dans un fichier NetCDF4.
+
+    Le fichier est d'abord écrit dans un fichier temporaire puis copié vers
+    sa destination, ce qui permet d'écraser le fichier source du dataset.
+    Chaque variable garde l'encodage du fichier lu (``variable_encoding`` :
+    type stocké, valeur de remplissage, compactage, compression, chunks,
+    unités et calendrier des dates). ``encoding`` associe à un nom de
+    variable des arguments supplémentaires de ``createVariable`` (zlib,
+    complevel, chunksizes, significant_digits...) et, comme dans xarray,
+    ``dtype``, ``scale_factor``, ``add_offset`` et ``_FillValue`` pour
+    stocker des entiers compactés (voir ``packing``) ; ils priment sur
+    l'encodage d'origine.
+    Les dimensions illimitées du fichier d'origine
+    (``dataset.encoding['unlimited_dims']``) sont conservées, sauf si
+    ``unlimited_dims`` est donné. Si ``report`` est un dictionnaire, il
+    reçoit pour chaque variable compactée ou quantifiée les tailles et
+    l'erreur maximale relue dans le fichier écrit.
+    """
+    import numpy as np
+    import netCDF4
+    from netcdflab.utils import packing
+
+    encoding = encoding or {}
+    if unlimited_dims is None:
+        unlimited_dims = dataset.encoding.get('unlimited_dims', ())
+    unlimited_dims = set(unlimited_dims)
+
+    with tracing.span("save", file=filename) as span:
+        # Créer un fichier temporaire
+        temp_dir = tempfile.gettempdir()
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.nc', dir=temp_dir)
+        os.close(temp_fd)
+
+        try:
+            # Fermer explicitement le dataset xarray
+            dataset.close()
+
+            # Forcer le garbage collector
+            gc.collect()
+
+            # Créer le fichier temporaire
+            with netCDF4.Dataset(temp_path, 'w', format='NETCDF4') as dst:
+                # Copier les dimensions
+                for name, size in dataset.sizes.items():
+                    dst.createDimension(name, None if name in unlimited_dims else size)
+
+                # Copier les variables
+                reduced = []
+                for name, var in dataset.variables.items():
+                    explicit = encoding.get(name, {})
+                    var_encoding = _merge_encoding(variable_encoding(var, unlimited_dims),
+                                                   explicit, var)
+                    stored = {key: var_encoding.pop(key) for key in packing.PACKING_KEYS
+                              if key in var_encoding}
+                    fill = stored.get('_FillValue')
+                    if any(key in explicit for key in packing.PACKING_KEYS + packing.QUANTIZE_KEYS):
+                        reduced.append(name)
+                    # Gérer les types spéciaux
+                    time = is_time(var)
+                    if time:
+                        # Unités et calendrier du fichier d'origine
+                        units = var.encoding.get('units', var.attrs.get('units', DEFAULT_TIME_UNITS))
+                        calendar = var.encoding.get('calendar', var.attrs.get('calendar'))
+                        # Convertir les valeurs en nombres
+                        dates = np.asarray(_dates_to_numbers(var.values, units, calendar or 'standard'))
+                        # Type entier d'origine s'il représente les dates exactement, double sinon
+                        dtype = np.dtype(var.encoding.get('dtype', 'f8'))
+                        if dtype.kind not in 'iu' or not np.array_equal(dates, np.round(dates)):
+                            dtype = np.dtype('f8')
+                        var_out = dst.createVariable(name, dtype, var.dims, fill_value=fill,
+                                                     **var_encoding)
+                        var_out[:] = dates.astype(dtype)
+                        var_out.units = units
+                        if calendar:
+                            var_out.calendar = calendar
+                    elif np.dtype(stored.get('dtype', var.dtype)).kind in 'iu' and var.dtype.kind == 'f':
+                        # Valeurs décodées (NaN) stockées en entiers : compactage explicite, bloc par bloc
+                        var_out = dst.createVariable(name, stored['dtype'], var.dims,
+                                                     fill_value=fill, **var_encoding)
+                        packing.write_packed(var, var_out, stored)
+                    else:
+                        # Pour les autres types
+                        var_out = dst.createVariable(name, stored.get('dtype', var.dtype), var.dims,
+                                                     fill_value=fill, **var_encoding)
+                        values = var.values
+                        if var.dtype.kind == 'f' and fill is not None and not np.isnan(fill):
+                            # Valeurs manquantes décodées en NaN : revenir à la valeur de remplissage
+                            values = np.where(np.isnan(values), fill, values)
+                        var_out[:] = values
+
+                    # Copier les attributs (ceux de l'encodage sont posés à la création)
+                    skipped = {'_FillValue', 'least_significant_digit', *QUANTIZE_ATTRIBUTES}
+                    if time:
+                        skipped.update(('units', 'calendar'))
+                    for attr_name, attr_value in var.attrs.items():
+                        if attr_name not in skipped:
+                            setattr(var_out, attr_name, attr_value)
+                    for attr_name in RESTORED_ATTRIBUTES:
+                        # Une valeur manquante du type d'origine n'a plus de sens après un compactage
+                        if attr_name in var.encoding and attr_name not in var.attrs and \
+                                not (attr_name == 'missing_value' and 'dtype' in explicit):
+                            setattr(var_out, attr_name, var.encoding[attr_name])
+
+                # Copier les attributs globaux
+                for attr_name, attr_value in dataset.attrs.items():
+                    setattr(dst, attr_name, attr_value)
+
+            if report is not None and reduced:
+                packing.measure(dataset, temp_path, reduced, report)
+
+            # Fichiers rouverts par la lecture des variables différées
+            sources = {var.encoding.get('source') for var in dataset.variables.values()}
+            for source in sources - {None}:
+                release_file(source)
+            release_file(filename)
+            replace_file(temp_path, filename)
+            span.set(bytes=int(dataset.nbytes), file_bytes=os.path.getsize(filename))
+
+        finally:
+            # Nettoyer le fichier temporaire
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+
+def _dates_to_numbers(values, units, calendar='standard'):
+    """Convertir des datetime64 (ou des dates cftime) en nombres selon ``units``"""
+    import netCDF4
+
+    if values.dtype.kind == 'M':
+        values = values.astype('datetime64[s]').astype(datetime)
+    return netCDF4.date2num(values, units=units, calendar=calendar)
+
+
+def append_records(filename, source, dim=None):
+    """Ajouter des enregistrements à la fin d'un fichier, le long de sa dimension illimitée.
+
+    ``source`` est un nom de fichier, un dataset xarray ou un dictionnaire
+    ``{variable: tableau}``. Toutes les variables du fichier qui dépendent
+    de ``dim`` doivent s'y trouver avec les mêmes dimensions ; les autres
+    variables de la source sont ignorées. Le fichier est ouvert en mode
+    ``'a'`` : seuls les nouveaux enregistrements sont écrits, variable par
+    variable, sans réécrire le reste du fichier. Les descripteurs gardés
+    ouverts par xarray sur ``filename`` sont fermés auparavant (voir
+    ``release_file``). Retourne
+    ``(dim, ancienne longueur, nombre d'enregistrements ajoutés)``.
+    """
+    import numpy as np
+    import netCDF4
+    import xarray as xr
+
+    with tracing.span("append", file=filename) as span:
+        opened = isinstance(source, (str, os.PathLike))
+        if opened:
+            source = xr.open_dataset(source)
+        try:
+            # HDF5 refuse l'ouverture en écriture d'un fichier encore ouvert en lecture
+            release_file(filename)
+            with netCDF4.Dataset(filename, 'a') as dst:
+                if dim is None:
+                    dim = next((name for name, d in dst.dimensions.items() if d.isunlimited()), None)
+                if dim is None or dim not in dst.dimensions or not dst.dimensions[dim].isunlimited():
+                    raise ValueError(f"Le fichier n'a pas de dimension illimitée '{dim}'")
+                start = len(dst.dimensions[dim])
+
+                # Vérifier toutes les variables avant d'écrire quoi que ce soit
+                records = [(name, var) for name, var in dst.variables.items()
+                           if dim in var.dimensions]
+                count = None
+                for name, var in records:
+                    if name not in source:
+                        raise ValueError(f"La variable '{name}' est absente de la source")
+                    values = source[name]
+                    dims = getattr(values, 'dims', None)
+                    if dims is not None and tuple(dims) != var.dimensions:
+                        raise ValueError(f"Dimensions de '{name}' différentes : {dims} au lieu de {var.dimensions}")
+                    shape = np.shape(values)
+                    axis = var.dimensions.index(dim)
+                    expected = [len(dst.dimensions[d]) for d in var.dimensions]
+                    if len(shape) != len(expected) or any(
+                            n != e for i, (n, e) in enumerate(zip(shape, expected)) if i != axis):
+                        raise ValueError(f"Forme de '{name}' incompatible : {shape}")
+                    if count is None:
+                        count = shape[axis]
+                    elif shape[axis] != count:
+                        raise ValueError(f"Nombre d'enregistrements différent pour '{name}'")
+                count = count or 0
+
+                for name, var in records:
+                    data = np.asarray(getattr(source[name], 'values', source[name]))
+                    if data.dtype.kind == 'M':
+                        data = _dates_to_numbers(data, getattr(var, 'units', DEFAULT_TIME_UNITS),
+                                                 getattr(var, 'calendar', 'standard'))
+                    elif data.dtype.kind == 'f':
+                        # Les NaN deviennent la valeur manquante du fichier
+                        data = np.ma.masked_invalid(data)
+                    index = [slice(None)] * var.ndim
+                    index[var.dimensions.index(dim)] = slice(start, start + count)
+                    var[tuple(index)] = data
+            span.set(dim=dim, records=count)
+        finally:
+            if opened:
+                source.close()
+    return dim, start, count
+
+
+def replace_file(source, destination):
+    """Remplacer ``destination`` par une copie de ``source``"""
+    try:
+        # Sous Windows, supprimer d'abord le fichier existant
+        if os.path.exists(destination):
+            os.remove(destination)
+
+        # Copier le fichier temporaire vers la destination
+        shutil.copy2(source, destination)
+
+    except Exception:
+        # Si la copie échoue, essayer avec un appel système
+        import subprocess
+        if os.name == 'nt':  # Windows
+            subprocess.run(['copy', source, destination], shell=True, check=True)
+        else:  # Unix
+            subprocess.run(['cp', source, destination], check=True)
@@ -0,0 +1,175 @@
+"""Opérations d'édition applicables à un dataset hors de l'interface.
+
+Chaque opération est décrite par un dictionnaire sérialisable en JSON,
+par exemple ``{"op": "rename_variable", "old": "temp", "new": "t2m"}``.
+Les fonctions modifient le dataset reçu ou en retournent un nouveau ;
+``apply_operation`` retourne toujours le dataset à utiliser ensuite.
+
+``encoding`` est le dictionnaire d'encodage transmis à
+``netcdf_io.write_dataset`` (compression, chunks, compactage,
+quantification) : les opérations qui portent sur le stockage le complètent
+au lieu de modifier les données.
+"""
+
+
+def set_attribute(dataset, encoding, name, value, variable=None):
+    """Définir un attribut global ou de variable"""
+    target = dataset[variable] if variable else dataset
+    target.attrs[name] = value
+    return dataset
+
+
+def delete_attribute(dataset, encoding, name, variable=None):
+    """Supprimer un attribut global ou de variable (sans erreur s'il est absent)"""
+    target = dataset[variable] if variable else dataset
+    target.attrs.pop(name, None)
+    return dataset
+
+
+def rename_variable(dataset, encoding, old, new):
+    """Renommer une variable"""
+    if old == new:
+        return dataset
+    if new in dataset.variables:
+        raise ValueError(f"Une variable nommée '{new}' existe déjà")
+
+    # Même approche que l'édition du nom dans l'arbre
+    dataset[new] = dataset[old]
+    del dataset[old]
+    if old in encoding:
+        encoding[new] = encoding.pop(old)
+    return dataset
+
+
+def delete_variable(dataset, encoding, name):
+    """Supprimer une variable (les dimensions ne peuvent pas être supprimées)"""
+    if name in dataset.dims:
+        raise ValueError(f"Impossible de supprimer '{name}' car c'est une dimension du fichier.")
+    del dataset[name]
+    encoding.pop(name, None)
+    return dataset
+
+
+def set_value(dataset, encoding, variable, index, value):
+    """Modifier une valeur d'une variable 1D (les dates sont données en ISO 8601)"""
+    import numpy as np
+
+    var = dataset[variable]
+    var_data = var.values.copy()
+    if var_data.dtype.kind == 'M':
+        value = np.datetime64(value)
+    if var_data.ndim == 0:
+        var_data[()] = value
+    else:
+        var_data[index] = value
+
+    if variable in dataset.indexes:
+        # Les coordonnées de dimension ne peuvent pas être modifiées en place
+        return dataset.assign_coords({variable: (var.dims, var_data, var.attrs)})
+    dataset[variable].values = var_data
+    return dataset
+
+
+def drop_index(dataset, encoding, dim, index):
+    """Supprimer la position ``index`` le long de la dimension ``dim``"""
+    return dataset.drop_isel({dim: [index]})
+
+
+def _as_slice(bounds):
+    """Convertir [début, fin(, pas)] en slice ; un entier ou une liste sont gardés"""
+    if isinstance(bounds, (list, tuple)) and 2 <= len(bounds) <= 3 and \
+            all(b is None or isinstance(b, (int, float)) for b in bounds):
+        return slice(*bounds)
+    return bounds
+
+
+def subset(dataset, encoding, isel=None, sel=None):
+    """Extraire un sous-ensemble par indices (isel) ou par valeurs (sel)"""
+    if isel:
+        dataset = dataset.isel({dim: _as_slice(b) for dim, b in isel.items()})
+    if sel:
+        dataset = dataset.sel({dim: _as_slice(b) for dim, b in sel.items()})
+    return dataset
+
+
+def recompress(dataset, encoding, complevel=4, shuffle=True, variables=None):
+    """Compresser les variables numériques (zlib) à l'écriture"""
+    names = variables or list(dataset.variables)
+    for name in names:
+        var = dataset.variables[name]
+        # Les chaînes de longueur variable ne peuvent pas être compressées
+        if var.dtype.kind in ('U', 'S', 'O') or not var.dims:
+            continue
+        var_encoding = encoding.setdefault(name, {})
+        if complevel:
+            var_encoding.update({'zlib': True, 'complevel': complevel, 'shuffle': shuffle})
+        else:
+            var_encoding.update({'zlib': False})
+    return dataset
+
+
+def pack(dataset, encoding, variables=None, dtype='int16', complevel=4):
+    """Stocker les variables flottantes en entiers compactés (scale_factor, add_offset)"""
+    from netcdflab.utils import packing
+
+    names = variables or [name for name, var in dataset.data_vars.items() if packing.can_pack(var)]
+    for name in names:
+        var = dataset.variables[name]
+        if not packing.can_pack(var):
+            raise ValueError(f"'{name}' n'est pas une variable flottante")
+        var_encoding = encoding.setdefault(name, {})
+        for key in packing.QUANTIZE_KEYS:
+            var_encoding.pop(key, None)
+        var_encoding.update(packing.pack_encoding(var, dtype))
+        if complevel:
+            var_encoding.update({'zlib': True, 'complevel': complevel, 'shuffle': True})
+    return dataset
+
+
+def quantize(dataset, encoding, variables=None, significant_digits=None,
+             least_significant_digit=None, mode='BitGroom', complevel=4):
+    """Quantifier les variables flottantes avant compression (type flottant conservé)"""
+    from netcdflab.utils import packing
+
+    names = variables or [name for name, var in dataset.data_vars.items() if packing.can_pack(var)]
+    quantization = packing.quantize_encoding(significant_digits, least_significant_digit,
+                                             mode, complevel)
+    for name in names:
+        if not packing.can_pack(dataset.variables[name]):
+            raise ValueError(f"'{name}' n'est pas une variable flottante")
+        var_encoding = encoding.setdefault(name, {})
+        for key in packing.PACKING_KEYS + packing.QUANTIZE_KEYS:
+            var_encoding.pop(key, None)
+        var_encoding.update(quantization)
+    return dataset
+
+
+OPERATIONS = {
+    'set_attribute': set_attribute,
+    'delete_attribute': delete_attribute,
+    'rename_variable': rename_variable,
+    'delete_variable': delete_variable,
+    'set_value': set_value,
+    'drop_index': drop_index,
+    'subset': subset,
+    'recompress': recompress,
+    'pack': pack,
+    'quantize': quantize,
+}
+
+
+def apply_operation(dataset, operation, encoding):
+    """Appliquer une opération décrite par un dictionnaire ``{"op": ..., **paramètres}``"""
+    params = dict(operation)
+    name = params.pop('op', None)
+    if name not in OPERATIONS:
+        raise ValueError(f"Opération inconnue: {name}")
+    return OPERATIONS[name](dataset, encoding, **params)
+
+
+def apply_operations(dataset, operations, encoding=None):
+    """Appliquer une liste ordonnée d'opérations ; retourne (dataset, encoding)"""
+    encoding = {} if encoding is None else encoding
+    for operation in operations:
+        dataset = apply_operation(dataset, operation, encoding)
+    return dataset, encoding
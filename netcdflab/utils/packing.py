@@ -0,0 +1,161 @@
+"""Stockage compact des variables flottantes : entiers compactés ou quantification.
+
+Compactage : les valeurs sont stockées en ``int16`` ou ``uint8`` avec les
+attributs CF ``scale_factor`` et ``add_offset``, calculés à partir du
+minimum et du maximum de la variable (une passe par blocs alignés sur les
+chunks du fichier). La plus petite (``int16``) ou la plus grande
+(``uint8``) valeur entière est réservée à ``_FillValue`` ; l'erreur
+maximale vaut la moitié de ``scale_factor``.
+
+Quantification : netCDF-C met à zéro les bits de mantisse inutiles
+(``significant_digits`` avec BitGroom, GranularBitRound ou BitRound, ou
+``least_significant_digit``) avant la compression zlib, qui devient bien
+plus efficace. Le type flottant est conservé.
+
+Les deux modes produisent un encodage de variable au format xarray (clés
+``dtype``, ``scale_factor``, ``add_offset``, ``_FillValue``,
+``significant_digits``...) appliqué par ``netcdf_io.write_dataset``.
+"""
+import numpy as np
+
+from netcdflab.utils.chunk_reader import file_chunks
+from netcdflab.utils.chunks import blocks
+
+# Types entiers proposés pour le compactage
+PACKED_TYPES = ('int16', 'uint8')
+# Algorithmes de quantification de netCDF-C (significant_digits)
+QUANTIZE_MODES = ('BitGroom', 'GranularBitRound', 'BitRound')
+# Clés d'encodage qui changent le type stocké
+PACKING_KEYS = ('dtype', 'scale_factor', 'add_offset', '_FillValue')
+# Clés d'encodage de quantification (arguments de createVariable)
+QUANTIZE_KEYS = ('significant_digits', 'quantize_mode', 'least_significant_digit')
+# Taille maximale d'un bloc lu (estimée en float64)
+BLOCK_BYTES = 16 * 2**20
+
+
+def can_pack(var):
+    """Seules les variables flottantes à au moins une dimension sont compactées"""
+    return var.dtype.kind == 'f' and bool(var.dims)
+
+
+def value_range(var, block_bytes=BLOCK_BYTES):
+    """Minimum et maximum des valeurs finies (None, None si aucune)"""
+    variable = getattr(var, 'variable', var)
+    low, high = np.inf, -np.inf
+    for block in blocks(variable.shape, 8, block_bytes, file_chunks(variable)):
+        values = np.asarray(variable[block].values)
+        finite = values[np.isfinite(values)]
+        if finite.size:
+            low = min(low, float(finite.min()))
+            high = max(high, float(finite.max()))
+    if low > high:
+        return None, None
+    return low, high
+
+
+def _levels(dtype):
+    """Plus petite valeur entière utilisable, nombre d'intervalles et valeur de remplissage"""
+    info = np.iinfo(dtype)
+    if info.min < 0:
+        return info.min + 1, info.max - (info.min + 1), info.min
+    return 0, info.max - 1, info.max
+
+
+def pack_encoding(var, dtype='int16', block_bytes=BLOCK_BYTES):
+    """Encodage compacté de la variable : ``{'dtype', 'scale_factor', 'add_offset', '_FillValue'}``"""
+    dtype = np.dtype(dtype)
+    lowest, levels, fill = _levels(dtype)
+    low, high = value_range(var, block_bytes)
+    if low is None:
+        low = high = 0.0
+    scale = (high - low) / levels
+    if not scale > 0:
+        # Variable constante : une seule valeur entière utilisée
+        scale = 1.0
+    # Facteurs du même type que les valeurs décodées (float32 reste float32)
+    float_type = var.dtype.type if var.dtype.kind == 'f' else np.float64
+    return {
+        'dtype': dtype.name,
+        'scale_factor': float_type(scale),
+        'add_offset': float_type(low - lowest * scale),
+        '_FillValue': dtype.type(fill),
+    }
+
+
+def pack(values, encoding):
+    """Compacter des valeurs décodées (NaN : ``_FillValue``, valeur réservée à défaut)"""
+    dtype = np.dtype(encoding['dtype'])
+    lowest, levels, fill = _levels(dtype)
+    scale = np.float64(encoding.get('scale_factor', 1.0))
+    offset = np.float64(encoding.get('add_offset', 0.0))
+    scaled = np.round((np.asarray(values, dtype=np.float64) - offset) / scale)
+    missing = ~np.isfinite(scaled)
+    packed = np.clip(np.where(missing, lowest, scaled), lowest, lowest + levels).astype(dtype)
+    packed[missing] = encoding.get('_FillValue', fill)
+    return packed
+
+
+def unpack(packed, encoding):
+    """Valeurs décodées d'entiers compactés"""
+    values = packed * np.float64(encoding.get('scale_factor', 1.0)) + \
+        np.float64(encoding.get('add_offset', 0.0))
+    fill = encoding.get('_FillValue', _levels(np.dtype(encoding['dtype']))[2])
+    return np.where(packed == fill, np.nan, values)
+
+
+def write_packed(var, var_out, encoding, block_bytes=BLOCK_BYTES):
+    """Écrire une variable compactée bloc par bloc dans ``var_out`` (netCDF4, sans mise à l'échelle)"""
+    variable = getattr(var, 'variable', var)
+    var_out.set_auto_maskandscale(False)
+    for key in ('scale_factor', 'add_offset'):
+        if key in encoding:
+            var_out.setncattr(key, encoding[key])
+    for block in blocks(variable.shape, 8, block_bytes, file_chunks(variable)):
+        var_out[block] = pack(np.asarray(variable[block].values), encoding)
+
+
+def quantize_encoding(significant_digits=None, least_significant_digit=None,
+                      mode='BitGroom', complevel=4):
+    """Encodage de quantification (avec compression zlib, sans quoi elle ne réduit rien)"""
+    if significant_digits is None and least_significant_digit is None:
+        raise ValueError("significant_digits ou least_significant_digit est nécessaire")
+    if mode not in QUANTIZE_MODES:
+        raise ValueError(f"Mode de quantification inconnu : {mode} ({', '.join(QUANTIZE_MODES)})")
+    encoding = {'zlib': True, 'complevel': complevel or 4, 'shuffle': True}
+    if significant_digits is not None:
+        encoding.update({'significant_digits': int(significant_digits), 'quantize_mode': mode})
+    else:
+        encoding['least_significant_digit'] = int(least_significant_digit)
+    return encoding
+
+
+def measure(dataset, filename, names, report, block_bytes=BLOCK_BYTES):
+    """Comparer les variables ``names`` écrites dans ``filename`` au dataset d'origine.
+
+    Complète ``report[nom]`` avec le type stocké, la taille brute d'origine,
+    la taille stockée (``None`` sans h5py), la taille non compressée et
+    l'erreur absolue maximale relue dans le fichier.
+    """
+    import netCDF4
+    from netcdflab.utils.chunks import storage_sizes
+
+    stored_sizes = storage_sizes(filename, names)
+    with netCDF4.Dataset(filename) as nc:
+        for name in names:
+            var = dataset.variables[name]
+            saved = nc.variables[name]
+            error = 0.0
+            for block in blocks(var.shape, 16, block_bytes, file_chunks(var)):
+                original = np.asarray(var[block].values, dtype=np.float64)
+                written = np.ma.filled(np.ma.asarray(saved[block]).astype(np.float64), np.nan)
+                both = np.isfinite(original) & np.isfinite(written)
+                if both.any():
+                    error = max(error, float(np.abs(written[both] - original[both]).max()))
+            report[name] = {
+                'dtype': str(saved.dtype),
+                'raw_bytes': int(var.size * var.dtype.itemsize),
+                'packed_bytes': int(var.size * saved.dtype.itemsize),
+                'stored_bytes': stored_sizes.get(name),
+                'max_error': error,
+            }
+    return report
@@ -0,0 +1,88 @@
+"""Recherche de la maille la plus proche d'un point cliqué sur une carte.
+
+Les axes 1-D (coordonnées de dimension) sont indexés par recherche
+dichotomique ; les grilles curvilignes (latitude et longitude 2-D) par un
+KD-tree, avec scipy s'il est installé, sinon par une recherche exhaustive
+vectorisée. Les index sont construits une fois par grille puis réutilisés
+pour chaque clic.
+"""
+import numpy as np
+
+# Noms reconnus pour les coordonnées géographiques 2-D
+LATITUDE_NAMES = ('lat', 'latitude', 'nav_lat')
+LONGITUDE_NAMES = ('lon', 'longitude', 'nav_lon')
+
+
+class AxisIndex:
+    """Indice le plus proche sur un axe 1-D monotone"""
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self.descending = values.size > 1 and values[0] > values[-1]
+        self.values = values[::-1] if self.descending else values
+        self.monotonic = bool(np.all(np.diff(self.values) >= 0))
+
+    def nearest(self, value):
+        if not self.monotonic:
+            number = int(np.nanargmin(np.abs(self.values - value)))
+        else:
+            position = int(np.searchsorted(self.values, value))
+            if position == 0:
+                number = 0
+            elif position == len(self.values):
+                number = len(self.values) - 1
+            else:
+                before, after = self.values[position - 1], self.values[position]
+                number = position - 1 if value - before <= after - value else position
+        return len(self.values) - 1 - number if self.descending else number
+
+
+class GridIndex:
+    """Maille la plus proche sur une grille curviligne (latitude/longitude 2-D)"""
+
+    def __init__(self, lat, lon):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        self.shape = lat.shape
+        self.points = self._cartesian(lat.ravel(), lon.ravel())
+        valid = np.isfinite(self.points).all(axis=1)
+        self.positions = np.flatnonzero(valid)
+        self.points = self.points[valid]
+        try:
+            from scipy.spatial import cKDTree
+            self.tree = cKDTree(self.points)
+        except ImportError:
+            self.tree = None
+
+    @staticmethod
+    def _cartesian(lat, lon):
+        """Points sur la sphère unité : distances correctes près des pôles et de l'antiméridien"""
+        lat, lon = np.radians(lat), np.radians(lon)
+        return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+    def nearest(self, lat, lon):
+        """Indices (ligne, colonne) de la maille la plus proche"""
+        point = self._cartesian(np.array([lat]), np.array([lon]))[0]
+        if self.tree is not None:
+            _, number = self.tree.query(point)
+        else:
+            number = int(np.argmin(((self.points - point) ** 2).sum(axis=1)))
+        return np.unravel_index(self.positions[number], self.shape)
+
+
+def geographic_coordinates(dataset, dims):
+    """Latitude et longitude 2-D définies sur les dimensions ``dims`` de la carte, sinon None"""
+    def find(names, standard_name, units):
+        for name, var in dataset.variables.items():
+            if tuple(var.dims) != tuple(dims):
+                continue
+            if (name.lower() in names or var.attrs.get('standard_name') == standard_name
+                    or var.attrs.get('units') == units):
+                return dataset[name]
+        return None
+
+    lat = find(LATITUDE_NAMES, 'latitude', 'degrees_north')
+    lon = find(LONGITUDE_NAMES, 'longitude', 'degrees_east')
+    if lat is None or lon is None:
+        return None
+    return lat, lon
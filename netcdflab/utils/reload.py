@@ -0,0 +1,111 @@
+"""Rechargement d'un fichier modifié par un autre programme.
+
+Le fichier est rouvert en accès différé (lecture de l'en-tête et des
+coordonnées de dimension seulement) et son en-tête est comparé au dataset
+chargé : attributs globaux, variables ajoutées ou supprimées, variables dont
+les dimensions ou le type ont changé et variables dont les attributs ont
+changé. Les valeurs affichées (petites variables et coordonnées de
+dimension) sont comparées à leurs empreintes relevées à l'affichage
+(``value_digests``) ; les autres valeurs ne sont relues qu'au moment où
+elles sont utilisées.
+"""
+import hashlib
+
+import numpy as np
+
+from netcdflab.utils import netcdf_io
+
+
+def _same_value(a, b):
+    try:
+        return bool(np.array_equal(np.asarray(a), np.asarray(b)))
+    except (TypeError, ValueError):
+        return a == b
+
+
+def _same_attrs(a, b):
+    return a.keys() == b.keys() and all(_same_value(a[key], b[key]) for key in a)
+
+
+# Au-delà, les valeurs d'une variable ne sont pas affichées (sauf coordonnées de dimension)
+MAX_DISPLAYED_SIZE = 100
+
+
+def displayed(dataset, name):
+    """Les valeurs de la variable sont-elles affichées dans l'arbre ?"""
+    return dataset.variables[name].size < MAX_DISPLAYED_SIZE or name in dataset.dims
+
+
+def digest(values):
+    """Empreinte de valeurs (tableau numpy)"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'O':
+        payload = repr(values.tolist()).encode('utf-8')
+    else:
+        payload = np.ascontiguousarray(values).view(np.uint8)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def value_digests(dataset):
+    """Empreintes des valeurs affichées de chaque variable"""
+    return {name: digest(var.values) for name, var in dataset.variables.items()
+            if displayed(dataset, name)}
+
+
+def compare_headers(old, new, digests=None):
+    """Différences d'en-tête entre deux datasets.
+
+    ``digests`` (voir ``value_digests``) donne les empreintes des valeurs
+    affichées de l'ancien dataset : les variables dont les valeurs ont
+    changé sont listées dans ``data_changed``. Les variables non comparées
+    sont listées dans ``unchecked`` : leurs valeurs sont relues dans le
+    nouveau fichier, mais ce qui en a été calculé peut être périmé.
+    """
+    digests = digests or {}
+    diff = {
+        'attrs': not _same_attrs(old.attrs, new.attrs),
+        'added': sorted(set(new.variables) - set(old.variables)),
+        'removed': sorted(set(old.variables) - set(new.variables)),
+        'changed': [],  # dimensions, taille ou type différents
+        'attrs_changed': [],
+        'data_changed': [],
+        'unchecked': [],
+    }
+    for name in set(old.variables) & set(new.variables):
+        a, b = old.variables[name], new.variables[name]
+        if a.dims != b.dims or a.shape != b.shape or a.dtype != b.dtype:
+            diff['changed'].append(name)
+            continue
+        if not _same_attrs(a.attrs, b.attrs):
+            diff['attrs_changed'].append(name)
+        if name in digests:
+            if digest(b.values) != digests[name]:
+                diff['data_changed'].append(name)
+        else:
+            diff['unchecked'].append(name)
+    for key in ('changed', 'attrs_changed', 'data_changed', 'unchecked'):
+        diff[key].sort()
+    return diff
+
+
+def structure_changed(diff):
+    """Variables ajoutées, supprimées ou redimensionnées : l'arbre doit être reconstruit"""
+    return bool(diff['added'] or diff['removed'] or diff['changed'])
+
+
+def has_changes(diff):
+    return bool(diff['attrs'] or structure_changed(diff) or diff['attrs_changed']
+                or diff['data_changed'])
+
+
+def reload_dataset(dataset, filename, digests=None):
+    """Rouvrir ``filename`` ; retourne ``(nouveau dataset, différences)``.
+
+    L'ancien dataset est fermé : ses accès au fichier pointaient vers l'ancien contenu.
+    """
+    # Descripteurs ouverts sur l'ancien contenu du fichier
+    netcdf_io.release_file(filename)
+    fresh = netcdf_io.load_dataset(filename)
+    diff = compare_headers(dataset, fresh, digests)
+    dataset.close()
+    return fresh, diff
@@ -0,0 +1,83 @@
+"""Coupes le long d'un segment tracé sur une carte.
+
+Le segment est échantillonné en ``samples`` points ; la position de chaque
+point est convertie en indices fractionnaires sur les deux axes de la
+carte, puis les valeurs sont interpolées (bilinéaire, vectorisée) à partir
+des quatre mailles voisines. Seules les mailles nécessaires sont lues :
+le rectangle qui contient le segment s'il est petit, sinon uniquement les
+colonnes voisines du segment, regroupées par chunk (``chunk_reader``).
+"""
+import numpy as np
+
+from netcdflab.utils import chunk_reader
+
+# Nombre de points d'une coupe
+DEFAULT_SAMPLES = 200
+# Au-delà, seules les mailles voisines du segment sont lues (et non le rectangle)
+MAX_BOX_BYTES = 64 * 2**20
+
+
+def fractional_index(values, positions):
+    """Indices fractionnaires de ``positions`` sur un axe monotone"""
+    values = np.asarray(values, dtype=float)
+    index = np.arange(len(values), dtype=float)
+    if len(values) > 1 and values[0] > values[-1]:
+        values, index = values[::-1], index[::-1]
+    return np.interp(positions, values, index)
+
+
+def sample_path(start, end, samples=DEFAULT_SAMPLES):
+    """Points régulièrement espacés du segment et distance depuis le début"""
+    t = np.linspace(0.0, 1.0, samples)
+    x = start[0] + t * (end[0] - start[0])
+    y = start[1] + t * (end[1] - start[1])
+    distance = t * np.hypot(end[0] - start[0], end[1] - start[1])
+    return x, y, distance
+
+
+def extract_section(var, y_dim, x_dim, fy, fx, indexers=None, max_box_bytes=MAX_BOX_BYTES):
+    """Valeurs de ``var`` aux indices fractionnaires ``(fy, fx)`` (interpolation bilinéaire).
+
+    ``indexers`` fixe d'autres dimensions (indices entiers). Le résultat a
+    les dimensions restantes de la variable, dans leur ordre, suivies de
+    l'axe des points de la coupe.
+    """
+    indexers = dict(indexers or {})
+    fy = np.clip(np.asarray(fy, dtype=float), 0, var.sizes[y_dim] - 1)
+    fx = np.clip(np.asarray(fx, dtype=float), 0, var.sizes[x_dim] - 1)
+    y0 = np.floor(fy).astype(int)
+    x0 = np.floor(fx).astype(int)
+    y1 = np.minimum(y0 + 1, var.sizes[y_dim] - 1)
+    x1 = np.minimum(x0 + 1, var.sizes[x_dim] - 1)
+    wy = fy - y0
+    wx = fx - x0
+
+    remaining = [dim for dim in var.dims if dim not in indexers and dim not in (y_dim, x_dim)]
+    other_size = int(np.prod([var.sizes[dim] for dim in remaining], dtype=np.int64))
+    row_low, row_high = int(y0.min()), int(y1.max()) + 1
+    col_low, col_high = int(x0.min()), int(x1.max()) + 1
+    box_bytes = (row_high - row_low) * (col_high - col_low) * other_size * var.dtype.itemsize
+
+    if box_bytes <= max_box_bytes:
+        # Un seul hyperslab : le rectangle qui contient le segment
+        box = chunk_reader.read(var, dict(indexers, **{y_dim: slice(row_low, row_high),
+                                                        x_dim: slice(col_low, col_high)}))
+        box_dims = [dim for dim in var.dims if dim not in indexers]
+        box = np.moveaxis(box, [box_dims.index(y_dim), box_dims.index(x_dim)], [-2, -1])
+
+        def cells(rows, columns):
+            return box[..., rows - row_low, columns - col_low]
+    else:
+        # Grand rectangle : lire les seules mailles voisines, groupées par chunk
+        unique = sorted(set(zip(y0, x0)) | set(zip(y0, x1)) | set(zip(y1, x0)) | set(zip(y1, x1)))
+        requests = [dict(indexers, **{y_dim: int(r), x_dim: int(c)}) for r, c in unique]
+        columns = chunk_reader.read_many(var, requests)
+        position = {cell: number for number, cell in enumerate(unique)}
+        stacked = np.stack([np.asarray(column) for column in columns], axis=-1)
+
+        def cells(rows, columns_):
+            return stacked[..., [position[(int(r), int(c))] for r, c in zip(rows, columns_)]]
+
+    values = ((1 - wy) * (1 - wx) * cells(y0, x0) + (1 - wy) * wx * cells(y0, x1)
+              + wy * (1 - wx) * cells(y1, x0) + wy * wx * cells(y1, x1))
+    return values
@@ -0,0 +1,72 @@
+"""Mesure du temps de démarrage de l'application (time-to-first-paint).
+
+Les jalons sont relatifs à l'import de ce module, qui doit être le premier
+import de ``netcdflab.main``. Le rapport de chaque lancement est ajouté à
+``startup_times.json`` dans le dossier de données de l'application pour
+suivre l'évolution d'une version à l'autre. Mettre la variable
+d'environnement ``NETCDFLAB_STARTUP_TIMING=1`` pour l'afficher en console.
+"""
+import json
+import os
+import time
+import platform
+from datetime import datetime
+
+_T0 = time.perf_counter()
+_marks = []
+# Entrée du lancement courant déjà écrite dans l'historique
+_saved_entry = None
+
+# Nombre maximal de lancements conservés dans l'historique
+MAX_ENTRIES = 200
+
+
+def mark(label):
+    """Enregistrer un jalon (secondes écoulées depuis le démarrage)"""
+    elapsed = time.perf_counter() - _T0
+    _marks.append((label, elapsed))
+    if os.getenv('NETCDFLAB_STARTUP_TIMING'):
+        print(f"[startup] {label}: {elapsed * 1000:.1f} ms")
+    return elapsed
+
+
+def get_marks():
+    """Retourner les jalons enregistrés sous forme de dictionnaire"""
+    return {label: elapsed for label, elapsed in _marks}
+
+
+def save_report(app_data_path, version=None):
+    """Ajouter les jalons du lancement courant à l'historique (l'entrée déjà
+    enregistrée pour ce lancement est remplacée)"""
+    global _saved_entry
+    if not app_data_path or not _marks:
+        return
+    
+    if version is None:
+        from netcdflab import __version__ as version
+    
+    entry = {
+        'version': version,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.system(),
+        'marks_ms': {label: round(elapsed * 1000, 2) for label, elapsed in _marks},
+    }
+    if _saved_entry is not None:
+        entry['date'] = _saved_entry['date']
+    
+    try:
+        report_file = os.path.join(app_data_path, 'startup_times.json')
+        history = []
+        if os.path.exists(report_file):
+            with open(report_file, 'r') as f:
+                history = json.load(f)
+        if _saved_entry in history:
+            history[history.index(_saved_entry)] = entry
+        else:
+            history.append(entry)
+        with open(report_file, 'w') as f:
+            json.dump(history[-MAX_ENTRIES:], f, indent=1)
+        _saved_entry = entry
+    except Exception as e:
+        print(f"Erreur lors de l'enregistrement des temps de démarrage: {e}")
@@ -0,0 +1,259 @@
+"""Statistiques d'une variable entière, calculées en une seule passe par blocs.
+
+Les blocs (alignés sur les chunks du fichier, de taille bornée) sont lus
+dans l'ordre par le thread appelant — les lectures HDF5 ne sont pas sûres
+entre plusieurs threads — puis résumés en parallèle dans un pool de
+threads : nombre de valeurs, valeurs manquantes, minimum, maximum, moyenne
+et somme des carrés des écarts (accumulateurs de Welford, fusionnés avec
+la formule de Chan) et histogramme.
+
+L'histogramme est défini sur une grille fixée par le premier bloc non vide
+(origine et largeur de classe) ; quand les valeurs débordent, les classes
+sont regroupées deux à deux. Deux histogrammes sur la même grille se
+fusionnent exactement, quel que soit l'ordre des blocs.
+"""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from netcdflab.utils import tracing
+from netcdflab.utils.chunk_reader import file_chunks
+from netcdflab.utils.chunks import blocks
+
+# Nombre maximal de classes de l'histogramme
+HISTOGRAM_BINS = 32
+# Taille maximale d'un bloc lu (estimée en float64)
+BLOCK_BYTES = 16 * 2**20
+# Threads qui résument les blocs
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def can_compute(var):
+    """Les statistiques ne sont calculées que pour les variables numériques"""
+    return var.dtype.kind in 'iuf'
+
+
+class Accumulator:
+    """Nombre, minimum, maximum, moyenne et somme des carrés des écarts (fusionnables)"""
+
+    def __init__(self):
+        self.count = 0
+        self.missing = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @classmethod
+    def from_values(cls, values, finite):
+        """Résumé d'un bloc (``finite`` : ses valeurs finies)"""
+        result = cls()
+        result.missing = values.size - finite.size
+        if finite.size:
+            result.count = finite.size
+            result.min = float(finite.min())
+            result.max = float(finite.max())
+            result.mean = float(finite.mean(dtype=np.float64))
+            deviations = np.subtract(finite, result.mean, dtype=np.float64)
+            result.m2 = float(np.dot(deviations, deviations))
+        return result
+
+    def merge(self, other):
+        """Ajouter les valeurs résumées par ``other`` (formule de Chan)"""
+        self.missing += other.missing
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        """Écart type (de la population)"""
+        return float(np.sqrt(self.m2 / self.count)) if self.count else None
+
+
+class Histogram:
+    """Histogramme sur la grille ``anchor + k × base × 2**level``"""
+
+    def __init__(self, anchor, base, max_bins=HISTOGRAM_BINS):
+        self.anchor = anchor
+        self.base = base
+        self.max_bins = max_bins
+        self.level = 0
+        self.first = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def width(self, level=None):
+        return self.base * 2.0 ** (self.level if level is None else level)
+
+    def _keys(self, low, high, level):
+        """Première et dernière classe de l'intervalle [low, high] au niveau ``level``"""
+        width = self.width(level)
+        return (int(np.floor((low - self.anchor) / width)),
+                int(np.floor((high - self.anchor) / width)))
+
+    def _span(self, level):
+        """Classes occupées (première, dernière) une fois regroupées au niveau ``level``"""
+        if not self.counts.size:
+            return None
+        shift = level - self.level
+        return self.first >> shift, (self.first + self.counts.size - 1) >> shift
+
+    def _fit(self, level, first, last):
+        """Plus petit niveau à partir duquel [first, last] tient dans ``max_bins`` classes"""
+        while last - first + 1 > self.max_bins:
+            level += 1
+            first >>= 1
+            last >>= 1
+        return level
+
+    def coarsen(self, level):
+        """Regrouper les classes jusqu'au niveau ``level``"""
+        if level <= self.level:
+            return
+        if self.counts.size:
+            keys = (self.first + np.arange(self.counts.size)) >> (level - self.level)
+            first = int(keys[0])
+            counts = np.zeros(int(keys[-1]) - first + 1, dtype=np.int64)
+            np.add.at(counts, keys - first, self.counts)
+            self.first, self.counts = first, counts
+        self.level = level
+
+    def _insert(self, first, counts):
+        """Ajouter des effectifs commençant à la classe ``first`` (même niveau)"""
+        if not self.counts.size:
+            self.first, self.counts = first, counts.astype(np.int64)
+            return
+        start = min(self.first, first)
+        stop = max(self.first + self.counts.size, first + counts.size)
+        merged = np.zeros(stop - start, dtype=np.int64)
+        merged[self.first - start:self.first - start + self.counts.size] += self.counts
+        merged[first - start:first - start + counts.size] += counts
+        self.first, self.counts = start, merged
+
+    def add(self, finite):
+        """Compter des valeurs finies"""
+        if not finite.size:
+            return
+        low, high = float(finite.min()), float(finite.max())
+        level = self.level
+        while True:
+            first, last = self._keys(low, high, level)
+            span = self._span(level)
+            if span is not None:
+                first, last = min(first, span[0]), max(last, span[1])
+            if last - first + 1 <= self.max_bins:
+                break
+            level = self._fit(level, first, last)
+        self.coarsen(level)
+        offsets = np.subtract(finite, self.anchor, dtype=np.float64)
+        keys = np.floor(offsets / self.width()).astype(np.int64)
+        keys_first = int(keys.min())
+        self._insert(keys_first, np.bincount(keys - keys_first))
+
+    def merge(self, other):
+        """Ajouter les effectifs d'un histogramme sur la même grille"""
+        if not other.counts.size:
+            return
+        level = max(self.level, other.level)
+        first, last = other._span(level)
+        span = self._span(level)
+        if span is not None:
+            first, last = min(first, span[0]), max(last, span[1])
+        level = self._fit(level, first, last)
+        self.coarsen(level)
+        other.coarsen(level)
+        self._insert(other.first, other.counts)
+
+    def edges(self):
+        """Limites des classes"""
+        keys = self.first + np.arange(self.counts.size + 1)
+        return self.anchor + keys * self.width()
+
+
+def grid_for(finite, bins=HISTOGRAM_BINS):
+    """Origine et largeur de classe de l'histogramme, d'après les premières valeurs"""
+    low, high = float(finite.min()), float(finite.max())
+    base = (high - low) / bins
+    if not base > 0:
+        base = max(abs(low), 1.0) * 2.0 ** -20
+    return low, base
+
+
+def summarize(values, grid):
+    """Accumulateur et histogramme d'un bloc"""
+    values = values.ravel()
+    finite = values
+    if values.dtype.kind == 'f':
+        mask = np.isfinite(values)
+        if not mask.all():
+            finite = values[mask]
+    histogram = None
+    if grid is not None:
+        histogram = Histogram(*grid)
+        histogram.add(finite)
+    return Accumulator.from_values(values, finite), histogram
+
+
+def compute(var, block_bytes=BLOCK_BYTES, workers=DEFAULT_WORKERS):
+    """Statistiques de la variable entière (valeurs décodées : facteurs d'échelle, valeurs manquantes).
+
+    Retourne ``{'count', 'missing', 'min', 'max', 'mean', 'std',
+    'histogram': {'edges', 'counts'}}`` (valeurs JSON ; min, max, mean et
+    std valent None si toutes les valeurs sont manquantes). Au plus
+    ``workers + 1`` blocs sont en mémoire.
+    """
+    variable = getattr(var, 'variable', var)
+    accumulator = Accumulator()
+    histogram = None
+    grid = None
+
+    def merge(result):
+        nonlocal histogram
+        block_accumulator, block_histogram = result
+        accumulator.merge(block_accumulator)
+        if block_histogram is not None:
+            if histogram is None:
+                histogram = block_histogram
+            else:
+                histogram.merge(block_histogram)
+
+    with tracing.span("statistics", variable=getattr(var, 'name', None), workers=workers) as span:
+        read_bytes = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pending = deque()
+            for block in blocks(variable.shape, 8, block_bytes, file_chunks(variable)):
+                values = np.asarray(variable[block].values)
+                read_bytes += values.nbytes
+                if grid is None:
+                    finite = values[np.isfinite(values)] if values.dtype.kind == 'f' else values
+                    if finite.size:
+                        grid = grid_for(finite)
+                pending.append(pool.submit(summarize, values, grid))
+                # Fusion dans l'ordre des blocs : résultat indépendant des threads
+                while len(pending) > workers:
+                    merge(pending.popleft().result())
+            while pending:
+                merge(pending.popleft().result())
+        span.set(bytes=read_bytes, count=accumulator.count)
+
+    found = accumulator.count > 0
+    return {
+        'count': accumulator.count,
+        'missing': accumulator.missing,
+        'min': accumulator.min if found else None,
+        'max': accumulator.max if found else None,
+        'mean': accumulator.mean if found else None,
+        'std': accumulator.std,
+        'histogram': {
+            'edges': histogram.edges().tolist() if histogram is not None else [],
+            'counts': histogram.counts.tolist() if histogram is not None else [],
+        },
+    }
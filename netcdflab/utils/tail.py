@@ -0,0 +1,61 @@
+"""Suivi des fichiers NetCDF en cours d'écriture (mode direct).
+
+Une simulation qui ajoute des pas de temps le long d'une dimension
+illimitée fait grandir le fichier. ``extend_dataset`` met à jour un dataset
+ouvert sans le recharger : les variables encore sur disque sont remplacées
+par leur version différée la plus récente (aucune lecture), et seules les
+nouvelles valeurs des variables déjà en mémoire sont lues puis ajoutées,
+ce qui conserve les modifications locales.
+"""
+
+
+def unlimited_dimension(filename):
+    """Dimension illimitée d'un fichier et sa longueur, lues dans l'en-tête (None, 0 sinon)"""
+    import netCDF4
+
+    with netCDF4.Dataset(filename) as nc:
+        for name, dim in nc.dimensions.items():
+            if dim.isunlimited():
+                return name, len(dim)
+    return None, 0
+
+
+def extend_dataset(dataset, filename, dim):
+    """Ajouter au dataset les nouveaux enregistrements du fichier le long de ``dim``.
+
+    Retourne ``(dataset, start)`` où ``start`` est l'ancienne longueur de
+    ``dim`` ; le dataset est inchangé si le fichier n'a pas grandi.
+    """
+    import numpy as np
+    import xarray as xr
+
+    start = dataset.sizes[dim]
+    with xr.open_dataset(filename) as fresh:
+        if dim not in fresh.dims or fresh.sizes[dim] <= start:
+            return dataset, start
+
+        variables = {}
+        for name, var in dataset.variables.items():
+            if dim not in var.dims:
+                variables[name] = var
+                continue
+            if name not in fresh.variables or fresh.variables[name].dims != var.dims:
+                raise ValueError(f"La variable '{name}' ne correspond plus au fichier")
+            latest = fresh.variables[name]
+            if var._in_memory:
+                # Lire uniquement les nouveaux enregistrements
+                axis = var.dims.index(dim)
+                added = latest[{dim: slice(start, None)}].values
+                data = np.concatenate([var.values, added], axis=axis)
+                variables[name] = xr.Variable(var.dims, data, var.attrs, var.encoding)
+            else:
+                # Variable différée : accès à tout le fichier, attributs locaux conservés
+                lazy = latest.copy(deep=False)
+                lazy.attrs = dict(var.attrs)
+                lazy.encoding = dict(var.encoding)
+                variables[name] = lazy
+
+        coords = {name: variables.pop(name) for name in list(variables) if name in dataset.coords}
+        extended = xr.Dataset(variables, coords=coords, attrs=dataset.attrs)
+        extended.encoding = dict(dataset.encoding)
+    return extended, start
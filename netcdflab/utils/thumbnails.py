@@ -0,0 +1,150 @@
+"""Aperçus (vignettes) des variables 2-D et plus.
+
+La vignette d'une variable est sa première tranche (indice 0 des
+dimensions autres que les deux dernières), lue avec un pas pour ne charger
+qu'environ ``THUMBNAIL_SIZE`` points par axe, puis colorée avec la palette
+par défaut du panneau de visualisation. Les images PNG sont conservées sur
+disque, identifiées par le fichier (chemin, taille, date de modification)
+et la variable ; au-delà de ``max_bytes`` les vignettes utilisées le moins
+récemment sont supprimées.
+"""
+import os
+import hashlib
+
+import numpy as np
+
+from netcdflab.utils.metadata_cache import file_key
+
+# Nombre de points par axe des vignettes
+THUMBNAIL_SIZE = 64
+# Taille maximale du cache sur disque
+DEFAULT_MAX_BYTES = 50 * 2**20
+# Palette utilisée (identique à la palette par défaut des graphiques)
+COLORMAP = 'viridis'
+
+
+def can_preview(var):
+    """La variable peut être affichée comme une image"""
+    return var.ndim >= 2 and var.dtype.kind in 'iuf' and min(var.shape[-2:]) > 1
+
+
+def preview_variables(dataset):
+    """Variables pour lesquelles une vignette est générée (variables de données d'abord)"""
+    names = [name for name, var in dataset.variables.items() if can_preview(var)]
+    return sorted(names, key=lambda name: name in dataset.coords)
+
+
+def first_slice(var, size=THUMBNAIL_SIZE):
+    """Première tranche 2-D d'une variable, lue avec un pas (lecture partielle)"""
+    selection = {dim: 0 for dim in var.dims[:-2]}
+    for dim, length in zip(var.dims[-2:], var.shape[-2:]):
+        selection[dim] = slice(None, None, max(1, -(-length // size)))
+    return np.asarray(var.isel(selection).values, dtype=float)
+
+
+def render_thumbnail(data, colormap=COLORMAP):
+    """Image RGBA (uint8) d'un tableau 2-D ; la première ligne est en bas, comme les graphiques"""
+    from matplotlib import colormaps
+
+    finite = np.isfinite(data)
+    normalized = np.zeros_like(data)
+    if finite.any():
+        low, high = data[finite].min(), data[finite].max()
+        if high > low:
+            normalized[finite] = (data[finite] - low) / (high - low)
+    rgba = colormaps[colormap](normalized, bytes=True)
+    # Valeurs manquantes transparentes
+    rgba[~finite] = 0
+    return np.ascontiguousarray(np.flipud(rgba))
+
+
+class ThumbnailCache:
+    """Vignettes PNG sur disque avec éviction LRU selon la taille totale"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._total = None
+
+    def identity(self, filename):
+        """Identifiant du contenu d'un fichier (None si le fichier n'existe plus)"""
+        try:
+            size, mtime = file_key(filename)
+        except OSError:
+            return None
+        text = f"{os.path.abspath(filename)}|{size}|{mtime}"
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def path_for(self, identity, variable=None):
+        """Chemin de la vignette d'une variable (ou de l'aperçu du fichier si ``variable`` est None)"""
+        name = identity if variable is None else \
+            f"{identity}_{hashlib.sha1(variable.encode('utf-8')).hexdigest()[:16]}"
+        return os.path.join(self.directory, name + '.png')
+
+    def get(self, identity, variable=None):
+        """Chemin de la vignette si elle existe (marquée comme récemment utilisée)"""
+        if identity is None:
+            return None
+        path = self.path_for(identity, variable)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, identity, variable, image, preview=False):
+        """Enregistrer l'image RGBA d'une variable ; ``preview`` l'utilise aussi comme aperçu du fichier"""
+        from matplotlib.image import imsave
+
+        paths = [self.path_for(identity, variable)]
+        if preview:
+            paths.append(self.path_for(identity))
+        for path in paths:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            imsave(path, image, format='png')
+            self._add(os.path.getsize(path) - old_size)
+        self.evict()
+        return paths[0]
+
+    def _files(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.png'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def total_bytes(self):
+        if self._total is None:
+            self._total = sum(size for _, size, _ in self._files())
+        return self._total
+
+    def _add(self, size):
+        if self._total is not None:
+            self._total += size
+
+    def evict(self):
+        """Supprimer les vignettes les moins récemment utilisées au-delà de ``max_bytes``"""
+        if self.total_bytes() <= self.max_bytes:
+            return
+        entries = sorted(self._files())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total = total
+
+    def clear(self):
+        for _, _, path in self._files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._total = 0
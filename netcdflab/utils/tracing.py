@@ -0,0 +1,178 @@
+"""Traces de performance légères (chargement, décodage, arbre, extraction, rendu, sauvegarde).
+
+Les étapes coûteuses sont entourées d'un ``span`` mesuré avec
+``time.perf_counter`` et pouvant porter un nombre d'octets::
+
+    with tracing.span("load", file=filename) as s:
+        ...
+        s.set(bytes=dataset.nbytes)
+
+Les traces sont désactivées par défaut (``span`` ne coûte alors presque
+rien). Elles s'activent avec la variable d'environnement
+``NETCDFLAB_TRACE=1`` ou depuis le menu Affichage de l'application.
+``NETCDFLAB_TRACE_FILE=chemin.json`` exporte la trace à la fermeture, au
+format Chrome trace (chrome://tracing, Perfetto).
+"""
+import os
+import json
+import atexit
+import threading
+import time
+from collections import deque
+
+# Nombre maximal de spans conservés en mémoire
+MAX_EVENTS = 20000
+
+
+class _NullSpan:
+    """Span utilisé quand les traces sont désactivées"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Intervalle de temps mesuré"""
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def set(self, **args):
+        """Ajouter des informations (octets, nom de variable...)"""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer._add(self, end)
+        return False
+
+
+class Tracer:
+    """Collecteur des spans"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=MAX_EVENTS)
+        # Nombre de spans enregistrés depuis le démarrage, même une fois
+        # la file pleine (les plus anciens sont alors oubliés)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def span(self, name, category='netcdflab', **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def _add(self, span, end):
+        event = {
+            'name': span.name,
+            'cat': span.category,
+            'start': span.start - self.origin,
+            'duration': end - span.start,
+            'tid': threading.get_ident(),
+            'args': span.args,
+        }
+        with self._lock:
+            self.events.append(event)
+            self.count += 1
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+
+    def snapshot(self):
+        """Copie des spans enregistrés"""
+        with self._lock:
+            return list(self.events)
+
+    def snapshot_count(self):
+        """Copie des spans enregistrés et nombre total de spans à cet instant"""
+        with self._lock:
+            return list(self.events), self.count
+
+    def summary(self):
+        """Statistiques par nom de span : nombre, durée totale et max, octets"""
+        stats = {}
+        for event in self.snapshot():
+            entry = stats.setdefault(event['name'], {'count': 0, 'total': 0.0,
+                                                     'max': 0.0, 'bytes': 0})
+            entry['count'] += 1
+            entry['total'] += event['duration']
+            entry['max'] = max(entry['max'], event['duration'])
+            entry['bytes'] += event['args'].get('bytes', 0) or 0
+        return stats
+
+    def to_chrome_trace(self):
+        """Trace au format Chrome (événements complets 'X', temps en µs)"""
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {
+                    'name': event['name'],
+                    'cat': event['cat'],
+                    'ph': 'X',
+                    'ts': event['start'] * 1e6,
+                    'dur': event['duration'] * 1e6,
+                    'pid': pid,
+                    'tid': event['tid'],
+                    'args': {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                             for k, v in event['args'].items()},
+                }
+                for event in self.snapshot()
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+# Instance globale utilisée par l'application
+tracer = Tracer(enabled=bool(os.getenv('NETCDFLAB_TRACE') or os.getenv('NETCDFLAB_TRACE_FILE')))
+
+
+def span(name, category='netcdflab', **args):
+    """Mesurer un bloc ``with`` (sans effet si les traces sont désactivées)"""
+    return tracer.span(name, category, **args)
+
+
+def is_enabled():
+    return tracer.enabled
+
+
+def set_enabled(enabled):
+    tracer.enabled = bool(enabled)
+
+
+def _export_at_exit():
+    path = os.getenv('NETCDFLAB_TRACE_FILE')
+    if path and tracer.events:
+        try:
+            tracer.export_chrome_trace(path)
+        except OSError as e:
+            print(f"Erreur lors de l'export de la trace: {e}")
+
+
+atexit.register(_export_at_exit)
@@ -38,16 +38,112 @@ class Translator:
             "edit_menu": "Edition",
             "help_menu": "Aide",
             "language_menu": "Langue",
+            "view_menu": "Affichage",
             
             # Menu Fichier
             "open": "Ouvrir",
+            "open_aggregate": "Ouvrir en agrégat...",
+            "open_zarr": "Ouvrir un store Zarr...",
+            "aggregate_dimension": "Dimension d'agrégation :",
+            "follow_file": "Suivre les ajouts (mode direct)",
+            "follow_latest": "Afficher le dernier pas en mode direct",
+            "no_unlimited_dimension": "Le fichier n'a pas de dimension illimitée :\n{}",
+            "external_change": "Fichier modifié sur disque",
+            "external_change_conflict": "Le fichier a été modifié par un autre programme alors qu'il a des modifications non sauvegardées :\n{}\n\nRecharger le fichier et abandonner vos modifications ?",
+            "overwrite_external_change": "Le fichier a été modifié par un autre programme depuis son ouverture :\n{}\n\nÉcraser ces modifications ?",
+            "append_records": "Ajouter des enregistrements depuis un fichier...",
+            "append_save_first": "Sauvegardez d'abord les modifications du fichier :\n{}",
+            "append_error": "Impossible d'ajouter les enregistrements : {}",
+            "storage_chunks": "Chunks : {}",
+            "storage_contiguous": "contigu",
+            "storage_compression": "Compression : {} (taux {})",
+            "storage_reads": "Chunks lus : carte {}, série temporelle {}",
+            "rechunk": "Changer le découpage (chunks)...",
+            "rechunk_prompt": "Taille des chunks ({}) ; * pour un axe entier :",
+            "rechunk_error": "Impossible de changer le découpage : {}",
+            "point_series_title": "Série au point - {}",
+            "point_series_error": "Impossible d'extraire la série en ce point : {}",
+            "x_axis": "Axe X",
+            "y_axis": "Axe Y",
+            "section": "Coupe le long d'un segment",
+            "section_hint": "Cliquez le début puis la fin de la coupe",
+            "section_error": "Impossible de calculer la coupe : {}",
+            "distance": "Distance",
+            "panels": "Panneaux",
+            "panels_none": "(aucun)",
+            "compare_with": "Comparer avec",
+            "compare_none": "(aucun)",
+            "compare_difference": "Différence A − B",
+            "compare_ratio": "Rapport A / B",
+            "compare_percent": "Écart relatif (%)",
+            "compare_statistics": "Statistiques d'écart",
+            "compare_statistics_result": "{}\n\nValeurs comparées : {}\nBiais (moyenne de A − B) : {}\nRMSE : {}\nÉcart absolu maximal : {}",
+            "compare_no_values": "Aucune valeur comparable (toutes manquantes)",
+            "compare_error": "Comparaison impossible : {}",
+            "compute_statistics": "Calculer les statistiques",
+            "statistics": "Statistiques",
+            "statistics_count": "Valeurs : {} (manquantes : {})",
+            "statistics_min": "Minimum : {}",
+            "statistics_max": "Maximum : {}",
+            "statistics_mean": "Moyenne : {}",
+            "statistics_std": "Écart type : {}",
+            "statistics_histogram": "Histogramme : {} [{} ; {}]",
+            "statistics_error": "Erreur lors du calcul des statistiques : {}",
+            "diff_with": "Comparer avec un fichier...",
+            "diff_title": "Différences : {} / {}",
+            "diff_element": "Élément",
+            "diff_details": "Détails",
+            "diff_export": "Exporter le rapport...",
+            "diff_identical": "Les deux fichiers sont identiques",
+            "diff_summary": "Fichiers différents ({} variable(s) aux données modifiées)",
+            "diff_structure": "Structure",
+            "diff_attributes": "Attributs",
+            "diff_data": "Données",
+            "diff_regions": "{} / {} régions modifiées",
+            "diff_grid_mismatch": "Découpages différents, données non comparées",
+            "diff_show_region": "Double-cliquer pour afficher la différence",
+            "diff_error": "Erreur lors de la comparaison : {}",
+            "validate_file": "Valider (conventions CF et données)",
+            "validate_folder": "Valider un dossier...",
+            "validation": "Validation",
+            "validation_ok": "Aucun problème détecté dans {}",
+            "validation_failed": "Validation impossible : {}",
+            "validation_no_files": "Aucun fichier NetCDF dans {}",
+            "validation_progress": "Validation des fichiers...",
+            "validation_summary": "{} fichier(s) validé(s) : {} sans problème, {} avec avertissements, {} avec erreurs, {} illisible(s).\n\nEnregistrer le rapport JSON ?",
+            "export_table": "Exporter en tableau (CSV, Parquet)...",
+            "export_table_subset": "Sous-ensemble à exporter ({}), ex. « time=0:24, level=2 » ; vide pour tout :",
+            "export_table_dropna": "Ignorer les valeurs manquantes (NaN, _FillValue) ?",
+            "export_table_done": "{} exporté dans {} :\n{} lignes, {:.1f} Mo en {:.2f} s ({:,.0f} lignes/s)\n{} valeurs manquantes ignorées",
+            "export_table_error": "Erreur lors de l'export : {}",
+            "export_zarr": "Exporter en Zarr...",
+            "export_zarr_chunks": "Chunks par dimension ({}), ex. « time=1, lat=* » ; vide pour garder ceux du fichier :",
+            "export_zarr_compressor": "Compresseur :",
+            "export_zarr_same_store": "Le store de destination est le store ouvert.",
+            "export_zarr_done": "Store {} écrit :\n{} variables, {} chunks\n{:.1f} Mo -> {:.1f} Mo en {:.2f} s ({:.1f} Mo/s)",
+            "export_zarr_error": "Erreur lors de l'export Zarr : {}",
+            "zarr_missing": "L'export Zarr nécessite zarr 3 ou plus et numcodecs (pip install \"zarr>=3\" numcodecs).",
             "save": "Sauvegarder",
             "save_all": "Sauvegarder tout",
             "save_as": "Sauvegarder sous...",
+            "save_packed": "Sauvegarder en compactant...",
+            "save_packed_mode": "Stockage des variables flottantes :",
+            "pack_int16": "Entiers int16 (scale_factor, add_offset)",
+            "pack_uint8": "Entiers uint8 (scale_factor, add_offset)",
+            "quantize_significant": "Quantification BitGroom (chiffres significatifs)",
+            "quantize_lsd": "Quantification least_significant_digit (décimales)",
+            "save_packed_variables": "Variables (séparées par des virgules) :",
+            "save_packed_digits": "Nombre de chiffres conservés :",
+            "save_packed_none": "Aucune variable flottante à compacter.",
+            "save_packed_line": "{} : {}, {:.2f} Mo -> {:.2f} Mo (÷{:.1f}), erreur max {:.3g}",
+            "save_packed_line_error": "{} : {}, erreur max {:.3g}",
+            "save_packed_done": "{} sauvegardé : {:.1f} Mo -> {:.1f} Mo\n\n{}",
+            "save_packed_error": "Erreur lors de la sauvegarde compactée : {}",
             "recent_files": "Fichiers récents",
             "no_recent_files": "(Aucun fichier récent)",
             "clear_history": "Effacer l'historique",
             "export_macro": "Exporter Macro",
+            "no_recorded_operations": "Aucune modification enregistrée à exporter.",
             "close": "Fermer",
             "close_all": "Fermer tout",
             "quit": "Quitter",
@@ -80,6 +176,7 @@ class Translator:
             "customize": "Personnaliser",
             "toggle_grid": "Afficher/Masquer la grille",
             "auto_scale": "Ajuster l'échelle",
+            "no_file_loaded": "Ouvrez un fichier NetCDF pour afficher ses données",
             
             # Export
             "export_image": "Exporter l'image",
@@ -90,6 +187,23 @@ class Translator:
             "export_success": "Image exportée avec succès !",
             "export_error": "Erreur lors de l'export : {}",
             
+            # Traces de performance
+            "trace_panel": "Traces de performance",
+            "trace_summary": "Temps par étape",
+            "trace_recent": "Dernières opérations",
+            "trace_step": "Étape",
+            "trace_count": "Nombre",
+            "trace_bytes": "Octets",
+            "trace_details": "Détails",
+            "trace_clear": "Effacer",
+            "trace_export": "Exporter (Chrome trace)",
+            
+            # Mémoire
+            "memory_status": "Mémoire : {} / {}",
+            "memory_cache": "Cache",
+            "memory_budget": "Budget mémoire...",
+            "memory_budget_prompt": "Mémoire maximale utilisée par les fichiers ouverts (Mo) :",
+            
             # Messages
             "file_already_open": "Le fichier {} est déjà ouvert!",
             "error_loading_file": "Impossible de charger le fichier: {}",
@@ -128,16 +242,112 @@ class Translator:
             "edit_menu": "Edit",
             "help_menu": "Help",
             "language_menu": "Language",
+            "view_menu": "View",
             
             # File menu
             "open": "Open",
+            "open_aggregate": "Open as Aggregate...",
+            "open_zarr": "Open Zarr Store...",
+            "aggregate_dimension": "Aggregation dimension:",
+            "follow_file": "Follow Appended Records (Live Mode)",
+            "follow_latest": "Show Latest Step in Live Mode",
+            "no_unlimited_dimension": "The file has no unlimited dimension:\n{}",
+            "external_change": "File Changed on Disk",
+            "external_change_conflict": "The file was modified by another program while it has unsaved changes:\n{}\n\nReload the file and discard your changes?",
+            "overwrite_external_change": "The file was modified by another program since it was opened:\n{}\n\nOverwrite those changes?",
+            "append_records": "Append Records from File...",
+            "append_save_first": "Save the changes to the file first:\n{}",
+            "append_error": "Unable to append records: {}",
+            "storage_chunks": "Chunks: {}",
+            "storage_contiguous": "contiguous",
+            "storage_compression": "Compression: {} (ratio {})",
+            "storage_reads": "Chunks read: map {}, time series {}",
+            "rechunk": "Change Chunking...",
+            "rechunk_prompt": "Chunk sizes ({}); * for a whole axis:",
+            "rechunk_error": "Unable to change chunking: {}",
+            "point_series_title": "Point Series - {}",
+            "point_series_error": "Unable to extract the series at this point: {}",
+            "x_axis": "X Axis",
+            "y_axis": "Y Axis",
+            "section": "Cross-Section Along a Line",
+            "section_hint": "Click the start, then the end of the section",
+            "section_error": "Unable to compute the cross-section: {}",
+            "distance": "Distance",
+            "panels": "Panels",
+            "panels_none": "(none)",
+            "compare_with": "Compare with",
+            "compare_none": "(none)",
+            "compare_difference": "Difference A − B",
+            "compare_ratio": "Ratio A / B",
+            "compare_percent": "Relative difference (%)",
+            "compare_statistics": "Difference statistics",
+            "compare_statistics_result": "{}\n\nCompared values: {}\nBias (mean of A − B): {}\nRMSE: {}\nMaximum absolute difference: {}",
+            "compare_no_values": "No comparable values (all missing)",
+            "compare_error": "Cannot compare: {}",
+            "compute_statistics": "Compute statistics",
+            "statistics": "Statistics",
+            "statistics_count": "Values: {} (missing: {})",
+            "statistics_min": "Minimum: {}",
+            "statistics_max": "Maximum: {}",
+            "statistics_mean": "Mean: {}",
+            "statistics_std": "Standard deviation: {}",
+            "statistics_histogram": "Histogram: {} [{}, {}]",
+            "statistics_error": "Error while computing statistics: {}",
+            "diff_with": "Compare with file...",
+            "diff_title": "Differences: {} / {}",
+            "diff_element": "Element",
+            "diff_details": "Details",
+            "diff_export": "Export report...",
+            "diff_identical": "The two files are identical",
+            "diff_summary": "Files differ ({} variable(s) with changed data)",
+            "diff_structure": "Structure",
+            "diff_attributes": "Attributes",
+            "diff_data": "Data",
+            "diff_regions": "{} / {} regions changed",
+            "diff_grid_mismatch": "Different chunking, data not compared",
+            "diff_show_region": "Double-click to show the difference",
+            "diff_error": "Error while comparing: {}",
+            "validate_file": "Validate (CF conventions and data)",
+            "validate_folder": "Validate folder...",
+            "validation": "Validation",
+            "validation_ok": "No problem found in {}",
+            "validation_failed": "Cannot validate: {}",
+            "validation_no_files": "No NetCDF file in {}",
+            "validation_progress": "Validating files...",
+            "validation_summary": "{} file(s) validated: {} without problems, {} with warnings, {} with errors, {} unreadable.\n\nSave the JSON report?",
+            "export_table": "Export as table (CSV, Parquet)...",
+            "export_table_subset": "Subset to export ({}), e.g. \"time=0:24, level=2\"; empty for everything:",
+            "export_table_dropna": "Skip missing values (NaN, _FillValue)?",
+            "export_table_done": "{} exported to {}:\n{} rows, {:.1f} MB in {:.2f} s ({:,.0f} rows/s)\n{} missing values skipped",
+            "export_table_error": "Error while exporting: {}",
+            "export_zarr": "Export to Zarr...",
+            "export_zarr_chunks": "Chunks per dimension ({}), e.g. \"time=1, lat=*\"; empty to keep the file chunks:",
+            "export_zarr_compressor": "Compressor:",
+            "export_zarr_same_store": "The destination is the open store.",
+            "export_zarr_done": "Store {} written:\n{} variables, {} chunks\n{:.1f} MB -> {:.1f} MB in {:.2f} s ({:.1f} MB/s)",
+            "export_zarr_error": "Error while exporting to Zarr: {}",
+            "zarr_missing": "Zarr export needs zarr 3 or later and numcodecs (pip install \"zarr>=3\" numcodecs).",
             "save": "Save",
             "save_all": "Save All",
             "save_as": "Save as...",
+            "save_packed": "Save Packed...",
+            "save_packed_mode": "Storage of floating-point variables:",
+            "pack_int16": "int16 integers (scale_factor, add_offset)",
+            "pack_uint8": "uint8 integers (scale_factor, add_offset)",
+            "quantize_significant": "BitGroom quantization (significant digits)",
+            "quantize_lsd": "least_significant_digit quantization (decimals)",
+            "save_packed_variables": "Variables (comma separated):",
+            "save_packed_digits": "Number of digits kept:",
+            "save_packed_none": "No floating-point variable to pack.",
+            "save_packed_line": "{}: {}, {:.2f} MB -> {:.2f} MB (÷{:.1f}), max error {:.3g}",
+            "save_packed_line_error": "{}: {}, max error {:.3g}",
+            "save_packed_done": "{} saved: {:.1f} MB -> {:.1f} MB\n\n{}",
+            "save_packed_error": "Error while saving packed: {}",
             "recent_files": "Recent Files",
             "no_recent_files": "(No recent files)",
             "clear_history": "Clear History",
             "export_macro": "Export Macro",
+            "no_recorded_operations": "No recorded changes to export.",
             "close": "Close",
             "close_all": "Close All",
             "quit": "Quit",
@@ -170,6 +380,7 @@ class Translator:
             "customize": "Customize",
             "toggle_grid": "Toggle Grid",
             "auto_scale": "Auto Scale",
+            "no_file_loaded": "Open a NetCDF file to display its data",
             
             # Export
             "export_image": "Export Image",
@@ -180,6 +391,23 @@ class Translator:
             "export_success": "Image exported successfully!",
             "export_error": "Export error: {}",
             
+            # Performance traces
+            "trace_panel": "Performance Traces",
+            "trace_summary": "Time per step",
+            "trace_recent": "Recent operations",
+            "trace_step": "Step",
+            "trace_count": "Count",
+            "trace_bytes": "Bytes",
+            "trace_details": "Details",
+            "trace_clear": "Clear",
+            "trace_export": "Export (Chrome trace)",
+            
+            # Memory
+            "memory_status": "Memory: {} / {}",
+            "memory_cache": "Cache",
+            "memory_budget": "Memory Budget...",
+            "memory_budget_prompt": "Maximum memory used by open files (MB):",
+            
             # Messages
             "file_already_open": "File {} is already open!",
             "error_loading_file": "Unable to load file: {}",
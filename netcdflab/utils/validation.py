@@ -0,0 +1,545 @@
+"""Validation de fichiers NetCDF : conventions CF et contrôle des données.
+
+Deux familles de vérifications :
+
+- structure (en-tête seul) : attribut ``Conventions``, unités lisibles
+  (UDUNITS, avec ``cf_units`` s'il est installé, sinon un analyseur
+  simplifié), calendriers, ``axis``, ``standard_name``, références
+  (``coordinates``, ``bounds``, ``grid_mapping``...), cohérence entre
+  ``_FillValue``, ``missing_value`` et ``valid_range`` ;
+- données : chaque variable est lue une seule fois, par blocs alignés sur
+  ses chunks (mémoire bornée), et toutes les vérifications sont faites
+  sur chaque bloc de façon vectorisée : valeurs manquantes, NaN, infinis,
+  valeurs hors de ``valid_range``, monotonie des coordonnées et trous de
+  l'axe du temps (le pas et la dernière valeur sont reportés d'un bloc au
+  suivant).
+
+Les valeurs sont lues telles qu'elles sont stockées (sans ``scale_factor``
+ni masque) : ``valid_range`` et ``_FillValue`` s'expriment dans ces
+unités. Plusieurs fichiers sont validés en parallèle dans un pool de
+processus ; le rapport JSON liste les problèmes de chaque fichier.
+
+Utilisation en ligne de commande::
+
+    python -m netcdflab.utils.validation "data/**/*.nc" --workers 4 --report validation.json
+    python -m netcdflab.utils.validation file.nc --no-data
+
+Le code de sortie vaut 1 si au moins un fichier contient une erreur.
+"""
+import re
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from netcdflab.utils import tracing
+from netcdflab.utils.batch import find_files
+from netcdflab.utils.chunks import blocks
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Taille maximale d'un bloc lu
+BLOCK_BYTES = 16 * 2**20
+# Un pas de temps supérieur à GAP_FACTOR fois le pas habituel est un trou
+GAP_FACTOR = 1.5
+# Nombre de positions citées dans un message
+MAX_POSITIONS = 5
+
+CF_CALENDARS = ('standard', 'gregorian', 'proleptic_gregorian', 'noleap', '365_day',
+                'all_leap', '366_day', '360_day', 'julian', 'none')
+CF_AXES = ('X', 'Y', 'Z', 'T')
+# Modificateurs autorisés après un standard_name
+CF_MODIFIERS = ('detection_minimum', 'number_of_observations', 'standard_error', 'status_flag')
+# Attributs qui désignent d'autres variables
+REFERENCE_ATTRIBUTES = ('coordinates', 'bounds', 'ancillary_variables', 'grid_mapping',
+                        'climatology')
+
+# Analyseur d'unités simplifié (utilisé sans cf_units)
+UNIT_NAMES = {
+    'm', 'g', 's', 'K', 'A', 'mol', 'cd', 'rad', 'sr', 'Hz', 'N', 'Pa', 'J', 'W', 'C', 'V',
+    'F', 'ohm', 'S', 'Wb', 'T', 'H', 'lm', 'lx', 'Bq', 'Gy', 'Sv', 'kat', 'degC', 'degF',
+    'L', 'l', 'bar', 'atm', 'min', 'h', 'hr', 'd', 'day', 'days', 'hour', 'hours', 'minute',
+    'minutes', 'second', 'seconds', 'sec', 'week', 'weeks', 'month', 'months', 'year',
+    'years', 'yr', 'a', 'percent', '%', 'ppm', 'ppb', 'ppt', 'ppmv', 'ppbv', 'pptv', 'DU',
+    'dB', 'kt', 'knot', 'knots', 'meter', 'meters', 'metre', 'metres', 'gram', 'grams',
+    'kelvin', 'celsius', 'pascal', 'watt', 'watts', 'joule', 'newton', 'radian', 'radians',
+    'degree', 'degrees', 'degree_north', 'degrees_north', 'degree_N', 'degrees_N',
+    'degreeN', 'degreesN', 'degree_east', 'degrees_east', 'degree_E', 'degrees_E',
+    'degreeE', 'degreesE', 'mile', 'miles', 'ft', 'foot', 'feet', 'inch', 'count', 'counts',
+    'level', 'layer', 'sigma_level', 'psu', 'PSU', 'mho', 'Ohm', 'gal', 'cal', 'erg', 'dyn',
+    'torr', 'mmHg', 'ha', 'liter', 'litre', 'liters', 'litres', 'ton', 't', 'tonne',
+}
+UNIT_PREFIXES = ('yotta', 'zetta', 'exa', 'peta', 'tera', 'giga', 'mega', 'kilo', 'hecto',
+                 'deca', 'deka', 'deci', 'centi', 'milli', 'micro', 'nano', 'pico', 'femto',
+                 'atto', 'zepto', 'yocto', 'Y', 'Z', 'E', 'P', 'T', 'G', 'M', 'k', 'h', 'da',
+                 'd', 'c', 'm', 'u', 'µ', 'n', 'p', 'f', 'a', 'z', 'y')
+# Exposants en exposant Unicode acceptés par UDUNITS (m², s⁻¹)
+SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺", "0123456789-+")
+_UNIT_TOKEN = re.compile(r"^([A-Za-z_%µ]+?)(?:\^|\*\*)?([-+]?\d+)?$")
+_NUMBER = re.compile(r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+
+
+def issue(severity, code, message, variable=None):
+    """Un problème détecté (dictionnaire JSON)"""
+    return {'severity': severity, 'code': code, 'variable': variable, 'message': message}
+
+
+def _known_unit(name):
+    if name in UNIT_NAMES:
+        return True
+    return any(name.startswith(prefix) and name[len(prefix):] in UNIT_NAMES
+               for prefix in UNIT_PREFIXES)
+
+
+def parse_units(text, calendar=None):
+    """L'unité est-elle lisible (syntaxe UDUNITS) ?"""
+    text = str(text).strip()
+    if not text:
+        return False
+    if ' since ' in text:
+        # Unité de temps : le décodage de cftime fait foi
+        import cftime
+        try:
+            cftime.num2date(0, text, calendar=calendar or 'standard')
+        except Exception:
+            return False
+        return True
+    try:
+        import cf_units
+    except ImportError:
+        pass
+    else:
+        try:
+            cf_units.Unit(text)
+        except ValueError:
+            return False
+        return True
+    for token in re.split(r"\s+per\s+|[\s*/()·]+", text.translate(SUPERSCRIPTS)):
+        if not token or _NUMBER.match(token):
+            continue
+        for part in token.split('.'):
+            match = _UNIT_TOKEN.match(part)
+            if not match or not _known_unit(match.group(1)):
+                return False
+    return True
+
+
+def _groups(group):
+    """Groupes d'un fichier netCDF4, avec leur chemin"""
+    yield group.path, group
+    for child in group.groups.values():
+        yield from _groups(child)
+
+
+def _variable_path(group, name):
+    return group.path.rstrip('/') + '/' + name
+
+
+def _find_variable(group, name):
+    """Variable visible depuis un groupe (le groupe ou ses parents)"""
+    while group is not None:
+        if name in group.variables:
+            return group.variables[name]
+        group = group.parent
+    return None
+
+
+def _attribute(var, name):
+    return var.getncattr(name) if name in var.ncattrs() else None
+
+
+def valid_bounds(var):
+    """Bornes valides (stockées) d'une variable : (min, max), None si absentes"""
+    valid_range = _attribute(var, 'valid_range')
+    if valid_range is not None:
+        values = np.atleast_1d(valid_range)
+        if values.size == 2:
+            return values[0], values[1]
+    low, high = _attribute(var, 'valid_min'), _attribute(var, 'valid_max')
+    if low is None and high is None:
+        return None
+    return low, high
+
+
+def missing_values(var):
+    """Valeurs stockées signifiant « manquant » (_FillValue, missing_value, remplissage par défaut)"""
+    import netCDF4
+
+    values = []
+    for name in ('_FillValue', 'missing_value'):
+        value = _attribute(var, name)
+        if value is not None:
+            values.extend(np.atleast_1d(value).tolist())
+    # Sans _FillValue, la valeur de remplissage par défaut de netCDF s'applique
+    if _attribute(var, '_FillValue') is None and var.dtype.kind in 'iuf' and var.dtype.itemsize > 1:
+        default = netCDF4.default_fillvals.get(var.dtype.str[1:])
+        if default is not None:
+            values.append(default)
+    return values
+
+
+def is_time_coordinate(var):
+    units = str(_attribute(var, 'units') or '')
+    return (' since ' in units or _attribute(var, 'axis') == 'T'
+            or _attribute(var, 'standard_name') == 'time')
+
+
+def check_structure(nc):
+    """Vérifications de l'en-tête (conventions, unités, attributs, références)"""
+    issues = []
+    conventions = _attribute(nc, 'Conventions')
+    if conventions is None:
+        issues.append(issue(WARNING, 'conventions_missing', "Attribut global Conventions absent"))
+    elif 'CF-' not in str(conventions):
+        issues.append(issue(WARNING, 'conventions_not_cf',
+                            f"Conventions ne cite pas CF : {conventions}"))
+
+    for _, group in _groups(nc):
+        for name, var in group.variables.items():
+            path = _variable_path(group, name)
+            numeric = var.dtype.kind in 'iuf' if isinstance(var.dtype, np.dtype) else False
+            is_coordinate = var.dimensions == (name,)
+
+            units = _attribute(var, 'units')
+            calendar = _attribute(var, 'calendar')
+            if calendar is not None and str(calendar).lower() not in CF_CALENDARS:
+                issues.append(issue(ERROR, 'calendar_invalid', f"Calendrier inconnu : {calendar}", path))
+                calendar = None
+            if units is not None and not parse_units(units, calendar and str(calendar).lower()):
+                issues.append(issue(ERROR, 'units_invalid', f"Unité illisible : {units}", path))
+            elif units is None and is_coordinate and numeric:
+                issues.append(issue(WARNING, 'units_missing', "Coordonnée sans unité", path))
+
+            axis = _attribute(var, 'axis')
+            if axis is not None and axis not in CF_AXES:
+                issues.append(issue(ERROR, 'axis_invalid', f"Valeur de axis invalide : {axis}", path))
+
+            standard_name = _attribute(var, 'standard_name')
+            if standard_name is not None:
+                words = str(standard_name).split()
+                if (not words or not re.match(r"^[A-Za-z0-9_]+$", words[0])
+                        or len(words) > 2 or (len(words) == 2 and words[1] not in CF_MODIFIERS)):
+                    issues.append(issue(WARNING, 'standard_name_invalid',
+                                        f"standard_name mal formé : {standard_name}", path))
+
+            for attribute in REFERENCE_ATTRIBUTES:
+                value = _attribute(var, attribute)
+                if value is None:
+                    continue
+                names = str(value).split()
+                if attribute == 'grid_mapping':
+                    # Forme étendue « crs: lat lon » : seules les clés sont des variables
+                    names = [n[:-1] for n in names if n.endswith(':')] or names
+                missing = [n for n in names if _find_variable(group, n) is None]
+                if missing:
+                    issues.append(issue(ERROR, 'reference_missing',
+                                        f"{attribute} désigne des variables absentes : "
+                                        f"{', '.join(missing)}", path))
+            cell_measures = _attribute(var, 'cell_measures')
+            if cell_measures is not None:
+                names = re.findall(r"\w+:\s*(\w+)", str(cell_measures))
+                missing = [n for n in names if _find_variable(group, n) is None]
+                if missing:
+                    issues.append(issue(WARNING, 'reference_missing',
+                                        f"cell_measures désigne des variables absentes : "
+                                        f"{', '.join(missing)}", path))
+
+            if not numeric:
+                continue
+            fill = _attribute(var, '_FillValue')
+            missing_value = _attribute(var, 'missing_value')
+            if fill is not None and missing_value is not None:
+                same = np.array_equal(np.atleast_1d(missing_value)[:1], np.atleast_1d(fill),
+                                      equal_nan=var.dtype.kind == 'f')
+                if not same:
+                    issues.append(issue(WARNING, 'fill_inconsistent',
+                                        f"_FillValue ({fill}) différent de missing_value "
+                                        f"({missing_value})", path))
+            valid_range = _attribute(var, 'valid_range')
+            if valid_range is not None:
+                values = np.atleast_1d(valid_range)
+                if values.size != 2 or values[0] > values[1]:
+                    issues.append(issue(ERROR, 'valid_range_invalid',
+                                        f"valid_range invalide : {valid_range}", path))
+                elif _attribute(var, 'valid_min') is not None or _attribute(var, 'valid_max') is not None:
+                    issues.append(issue(WARNING, 'valid_range_conflict',
+                                        "valid_range et valid_min/valid_max définis ensemble", path))
+            bounds = valid_bounds(var)
+            if fill is not None and bounds is not None and np.isfinite(fill):
+                low, high = bounds
+                if (low is None or fill >= low) and (high is None or fill <= high):
+                    issues.append(issue(WARNING, 'fill_in_valid_range',
+                                        f"_FillValue ({fill}) dans l'intervalle valide", path))
+    return issues
+
+
+class DataCheck:
+    """Compteurs d'une variable mis à jour bloc par bloc"""
+
+    def __init__(self, var, path):
+        self.path = path
+        self.size = int(np.prod(var.shape, dtype=np.int64))
+        self.float = var.dtype.kind == 'f'
+        self.missing_values = missing_values(var)
+        self.fill_is_nan = self.float and any(np.isnan(v) for v in self.missing_values
+                                              if isinstance(v, float))
+        self.bounds = valid_bounds(var)
+        self.coordinate = var.dimensions == (var.name,)
+        self.time = self.coordinate and is_time_coordinate(var)
+        self.units = _attribute(var, 'units')
+        self.calendar = _attribute(var, 'calendar')
+        self.missing = 0
+        self.nan = 0
+        self.infinite = 0
+        self.out_of_range = 0
+        self.offset = 0
+        # Coordonnées : dernière valeur du bloc précédent, sens, premières ruptures
+        self.previous = None
+        self.direction = 0
+        self.not_monotonic = []
+        # Axe du temps : {pas: [nombre, positions]}
+        self.steps = {}
+
+    def add(self, values):
+        """Mettre à jour les compteurs avec un bloc (valeurs stockées)"""
+        values = np.asarray(values).ravel()
+        valid = np.ones(values.shape, dtype=bool)
+        for missing in self.missing_values:
+            if not (isinstance(missing, float) and np.isnan(missing)):
+                valid &= values != missing
+        self.missing += int(values.size - np.count_nonzero(valid))
+        if self.float:
+            nan = np.isnan(values)
+            count = int(np.count_nonzero(nan & valid))
+            if self.fill_is_nan:
+                self.missing += count
+            else:
+                self.nan += count
+            infinite = np.isinf(values)
+            self.infinite += int(np.count_nonzero(infinite))
+            valid &= ~nan & ~infinite
+        if self.bounds is not None:
+            low, high = self.bounds
+            outside = np.zeros(values.shape, dtype=bool)
+            if low is not None:
+                outside |= values < low
+            if high is not None:
+                outside |= values > high
+            self.out_of_range += int(np.count_nonzero(outside & valid))
+        if self.coordinate:
+            self._add_coordinate(values)
+        self.offset += values.size
+
+    def _add_coordinate(self, values):
+        """Monotonie et pas de l'axe, en continuant le bloc précédent"""
+        if not values.size or values.dtype.kind not in 'iuf':
+            return
+        series = values.astype(np.float64)
+        if self.previous is not None:
+            series = np.concatenate([[self.previous], series])
+            start = self.offset - 1
+        else:
+            start = self.offset
+        self.previous = float(series[-1])
+        steps = np.diff(series)
+        if not steps.size:
+            return
+        if not self.direction:
+            nonzero = steps[steps != 0]
+            self.direction = int(np.sign(nonzero[0])) if nonzero.size else 1
+        broken = np.flatnonzero(~(steps * self.direction > 0))
+        if broken.size and len(self.not_monotonic) < MAX_POSITIONS:
+            self.not_monotonic.extend((start + broken[:MAX_POSITIONS] + 1).tolist())
+        if self.time:
+            unique, first, counts = np.unique(steps, return_index=True, return_counts=True)
+            for step, position, count in zip(unique.tolist(), first.tolist(), counts.tolist()):
+                entry = self.steps.setdefault(step, [0, start + position])
+                entry[0] += count
+
+    def issues(self):
+        issues = []
+        path = self.path
+        if self.size and self.missing == self.size:
+            issues.append(issue(WARNING, 'all_missing', "Toutes les valeurs sont manquantes", path))
+        if self.coordinate and (self.missing or self.nan):
+            issues.append(issue(ERROR, 'coordinate_missing_values',
+                                f"Coordonnée avec {self.missing + self.nan} valeur(s) manquante(s)",
+                                path))
+        elif self.nan:
+            issues.append(issue(WARNING, 'nan_values',
+                                f"{self.nan} NaN alors que _FillValue n'est pas NaN", path))
+        if self.infinite:
+            issues.append(issue(WARNING, 'infinite_values', f"{self.infinite} valeur(s) infinie(s)",
+                                path))
+        if self.out_of_range:
+            low, high = self.bounds
+            issues.append(issue(WARNING, 'out_of_range',
+                                f"{self.out_of_range} valeur(s) hors de [{low}, {high}]", path))
+        if self.not_monotonic:
+            positions = ", ".join(str(p) for p in self.not_monotonic[:MAX_POSITIONS])
+            issues.append(issue(ERROR, 'coordinate_not_monotonic',
+                                f"Coordonnée non strictement monotone (indices {positions})", path))
+        elif self.steps:
+            issues.extend(self._time_gaps())
+        return issues
+
+    def _time_gaps(self):
+        """Trous de l'axe du temps : pas supérieurs à GAP_FACTOR fois le pas le plus fréquent"""
+        usual = max(self.steps.items(), key=lambda item: item[1][0])[0]
+        gaps = sorted((position, step) for step, (count, position) in self.steps.items()
+                      if abs(step) > GAP_FACTOR * abs(usual))
+        if not gaps:
+            return []
+        count = sum(self.steps[step][0] for _, step in gaps)
+        positions = ", ".join(str(position) for position, _ in gaps[:MAX_POSITIONS])
+        return [issue(WARNING, 'time_gaps',
+                      f"{count} trou(s) dans l'axe du temps (pas habituel {usual:g} "
+                      f"{str(self.units).split(' since ')[0]}, après les indices {positions})",
+                      self.path)]
+
+
+def check_data(nc, block_bytes=BLOCK_BYTES):
+    """Une passe par blocs sur les valeurs de chaque variable numérique"""
+    issues = []
+    read_bytes = 0
+    for _, group in _groups(nc):
+        for name, var in group.variables.items():
+            if not isinstance(var.dtype, np.dtype) or var.dtype.kind not in 'iuf' or 0 in var.shape:
+                continue
+            var.set_auto_maskandscale(False)
+            check = DataCheck(var, _variable_path(group, name))
+            chunking = var.chunking()
+            align = chunking if isinstance(chunking, list) else None
+            for block in blocks(var.shape, var.dtype.itemsize, block_bytes, align):
+                values = var[block] if block else var.getValue()
+                read_bytes += np.asarray(values).nbytes
+                check.add(values)
+            issues.extend(check.issues())
+    return issues, read_bytes
+
+
+def validate_file(filename, data=True, block_bytes=BLOCK_BYTES):
+    """Valider un fichier ; retourne un dictionnaire décrivant le résultat"""
+    import netCDF4
+
+    start = time.perf_counter()
+    result = {'file': filename, 'status': 'ok', 'error': None, 'issues': []}
+    with tracing.span("validate", file=filename, data=data) as span:
+        try:
+            with netCDF4.Dataset(filename) as nc:
+                issues = check_structure(nc)
+                if data:
+                    data_issues, read_bytes = check_data(nc, block_bytes)
+                    issues.extend(data_issues)
+                    span.set(bytes=read_bytes)
+            result['issues'] = issues
+            severities = {i['severity'] for i in issues}
+            if ERROR in severities:
+                result['status'] = ERROR
+            elif WARNING in severities:
+                result['status'] = WARNING
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def validate_files(files, workers=None, data=True, progress=None):
+    """Valider plusieurs fichiers dans un pool de processus.
+
+    ``progress(done, total, result)`` est appelé après chaque fichier.
+    Retourne la liste des résultats dans l'ordre des fichiers.
+    """
+    files = list(files)
+    if not files:
+        return []
+    results = {}
+    # 'spawn' : pas d'héritage de l'état Qt si le pool est lancé depuis l'application
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(validate_file, f, data): f for f in files}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker interrompu (mémoire, signal...)
+                result = {'file': filename, 'status': 'failed', 'issues': [],
+                          'error': f"{type(e).__name__}: {e}", 'seconds': None}
+            results[filename] = result
+            if progress:
+                progress(len(results), len(files), result)
+    return [results[f] for f in files]
+
+
+def summarize(results):
+    """Résumé d'une validation (rapport JSON)"""
+    def count(status):
+        return sum(1 for r in results if r['status'] == status)
+
+    return {
+        'total': len(results),
+        'ok': count('ok'),
+        'warnings': count(WARNING),
+        'errors': count(ERROR),
+        'failed': count('failed'),
+        'issues': sum(len(r['issues']) for r in results),
+        'seconds': sum(r['seconds'] or 0 for r in results),
+        'files': results,
+    }
+
+
+def _print_progress(done, total, result):
+    line = f"[{done}/{total}] {result['file']}: {result['status']}"
+    if result.get('error'):
+        line += f" - {result['error']}"
+    print(line, flush=True)
+    for item in result['issues']:
+        where = f"{item['variable']}: " if item['variable'] else ""
+        print(f"    {item['severity']:7} {where}{item['message']}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m netcdflab.utils.validation',
+        description="Vérifier les conventions CF et les données de fichiers NetCDF")
+    parser.add_argument('patterns', nargs='+', help="Fichiers ou motifs (ex: 'data/**/*.nc')")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus")
+    parser.add_argument('--no-data', action='store_true',
+                        help="Vérifier seulement l'en-tête (pas de lecture des valeurs)")
+    parser.add_argument('--report', help="Écrire le rapport JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    files = []
+    for pattern in args.patterns:
+        files.extend(f for f in find_files(pattern) if f not in files)
+    if not files:
+        print(f"Aucun fichier ne correspond à {' '.join(args.patterns)}")
+        return 1
+
+    if len(files) == 1:
+        results = [validate_file(files[0], data=not args.no_data)]
+        _print_progress(1, 1, results[0])
+    else:
+        results = validate_files(files, workers=args.workers, data=not args.no_data,
+                                 progress=_print_progress)
+    summary = summarize(results)
+
+    print(f"\n{summary['ok']}/{summary['total']} fichier(s) sans problème, "
+          f"{summary['warnings']} avec avertissements, {summary['errors']} avec erreurs, "
+          f"{summary['failed']} illisible(s)")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    return 0 if not (summary['errors'] or summary['failed']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Conversion d'un dataset en store Zarr local, avec écriture parallèle des chunks.
+
+Le store est écrit au format Zarr 2 avec l'attribut ``_ARRAY_DIMENSIONS``
+(convention xarray) et des métadonnées consolidées : il se relit avec
+``xarray.open_zarr``, avec NetCDF Lab (``netcdf_io.open_dataset``) ou avec
+netCDF-C (mode NCZarr). Les valeurs sont écrites comme par
+``netcdf_io.write_dataset`` : dates converties en nombres, valeurs
+décodées.
+
+Chaque variable est découpée en blocs formés de chunks Zarr entiers et de
+taille bornée. Les blocs sont lus par le thread appelant (les lectures
+HDF5 ne sont pas sûres entre threads) et écrits — compression comprise —
+dans un pool de threads ; au plus ``workers + 1`` blocs sont en mémoire.
+Zarr 3 et numcodecs (``pip install .[zarr]``) sont des dépendances
+optionnelles : l'écriture utilise l'API de zarr 3 (``create_array``).
+
+Utilisation en ligne de commande::
+
+    python -m netcdflab.utils.zarr_io data.nc data.zarr --chunks "time=1" --compressor zstd:3
+"""
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from netcdflab.utils import tracing
+from netcdflab.utils.chunk_reader import file_chunks
+from netcdflab.utils.chunks import blocks
+from netcdflab.utils.metadata_cache import to_json
+from netcdflab.utils.netcdf_io import DEFAULT_TIME_UNITS, _dates_to_numbers
+
+# Threads qui compressent et écrivent les blocs
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# Taille maximale d'un bloc lu puis écrit
+BLOCK_BYTES = 64 * 2**20
+# Taille visée des chunks Zarr quand la variable n'est pas découpée dans le fichier
+CHUNK_BYTES = 4 * 2**20
+# Compresseurs proposés (nom[:paramètres])
+COMPRESSORS = ('zstd:3', 'blosc:lz4:5', 'blosc:zstd:5', 'zlib:4', 'lz4', 'none')
+DEFAULT_COMPRESSOR = COMPRESSORS[0]
+
+
+def zarr_available():
+    """zarr (version 3 ou plus) et numcodecs sont-ils installés ?"""
+    try:
+        import zarr
+        import numcodecs  # noqa: F401
+    except ImportError:
+        return False
+    major = zarr.__version__.split('.')[0]
+    return major.isdigit() and int(major) >= 3
+
+
+def parse_compressor(text):
+    """Lire « zstd:3 », « blosc:lz4:5 », « zlib:4 », « lz4 » ou « none » (codec numcodecs)"""
+    import numcodecs
+
+    name, *params = [p.strip() for p in (text or 'none').lower().split(':')]
+    try:
+        if name in ('none', ''):
+            return None
+        if name == 'zstd':
+            return numcodecs.Zstd(level=int(params[0]) if params else 3)
+        if name in ('zlib', 'gzip'):
+            codec = numcodecs.Zlib if name == 'zlib' else numcodecs.GZip
+            return codec(level=int(params[0]) if params else 4)
+        if name == 'lz4':
+            return numcodecs.LZ4()
+        if name == 'blosc':
+            cname = params[0] if params else 'lz4'
+            clevel = int(params[1]) if len(params) > 1 else 5
+            return numcodecs.Blosc(cname=cname, clevel=clevel, shuffle=numcodecs.Blosc.SHUFFLE)
+    except ValueError:
+        pass
+    raise ValueError(f"Compresseur invalide : {text} (ex: {', '.join(COMPRESSORS)})")
+
+
+def parse_chunks(text):
+    """Lire des tailles de chunks par dimension « time=1, lat=100 » (``*`` : dimension entière)"""
+    sizes = {}
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        dim, sep, value = part.partition('=')
+        value = value.strip()
+        if not sep or not dim.strip():
+            raise ValueError(f"Chunk invalide : {part} (attendu : dimension=taille)")
+        sizes[dim.strip()] = None if value in ('*', '0') else int(value)
+        if sizes[dim.strip()] is not None and sizes[dim.strip()] < 1:
+            raise ValueError(f"Taille de chunk invalide : {part}")
+    return sizes
+
+
+def variable_chunks(var, sizes=None, chunk_bytes=CHUNK_BYTES):
+    """Chunks Zarr d'une variable : tailles données par dimension, sinon chunks du fichier
+    ou blocs d'environ ``chunk_bytes``"""
+    shape = tuple(var.shape)
+    if not shape:
+        return ()
+    default = file_chunks(var) or tuple(
+        s.stop - s.start for s in next(blocks(shape, var.dtype.itemsize, chunk_bytes)))
+    chunks = []
+    for dim, size, value in zip(var.dims, shape, default):
+        if sizes and dim in sizes:
+            value = sizes[dim] or size
+        chunks.append(max(1, min(value, size)))
+    return tuple(chunks)
+
+
+def _encoding(var):
+    """Type stocké, valeur de remplissage et attributs d'une variable"""
+    attrs = {name: to_json(value) for name, value in var.attrs.items() if name != '_FillValue'}
+    fill = var.encoding.get('_FillValue', var.attrs.get('_FillValue'))
+    dtype = var.dtype
+    if dtype.kind == 'M':
+        attrs['units'] = var.encoding.get('units', var.attrs.get('units', DEFAULT_TIME_UNITS))
+        if 'calendar' in var.encoding:
+            attrs['calendar'] = var.encoding['calendar']
+        return np.dtype('f8'), np.nan, attrs
+    if dtype.kind == 'O':
+        dtype = np.asarray(var.values).astype(str).dtype
+    if dtype.kind == 'f':
+        fill = np.nan if fill is None else fill
+    elif dtype.kind not in 'iu':
+        fill = None
+    return dtype, fill, attrs
+
+
+def _encode(values, var, dtype, fill, units):
+    """Valeurs d'un bloc telles qu'écrites dans le store"""
+    if var.dtype.kind == 'M':
+        return _dates_to_numbers(values, units)
+    if var.dtype.kind == 'O':
+        return values.astype(dtype)
+    if dtype.kind == 'f' and fill is not None and not np.isnan(fill):
+        # Valeurs manquantes décodées en NaN : revenir à la valeur de remplissage
+        values = np.where(np.isnan(values), fill, values)
+    return values
+
+
+def store_size(path):
+    """Taille totale des fichiers d'un store"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def write_zarr(dataset, store, chunks=None, compressor=DEFAULT_COMPRESSOR,
+               workers=DEFAULT_WORKERS, block_bytes=BLOCK_BYTES, progress=None):
+    """Écrire le dataset dans le store Zarr ``store`` (remplacé s'il existe).
+
+    ``chunks`` associe à des dimensions une taille de chunk (voir
+    ``parse_chunks``), ``compressor`` est un texte lu par
+    ``parse_compressor``. ``progress(variable, fait, total)`` est appelé
+    après chaque variable. Retourne ``{'variables', 'chunks', 'bytes',
+    'store_bytes', 'seconds', 'bytes_per_second'}``.
+    """
+    import zarr
+
+    codec = parse_compressor(compressor) if isinstance(compressor, str) else compressor
+    start = time.perf_counter()
+    written = 0
+    chunk_count = 0
+    with tracing.span("zarr_write", file=store, workers=workers) as span:
+        group = zarr.open_group(store, mode='w', zarr_format=2)
+        group.attrs.update({name: to_json(value) for name, value in dataset.attrs.items()})
+        names = list(dataset.variables)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for number, name in enumerate(names):
+                var = dataset.variables[name]
+                dtype, fill, attrs = _encoding(var)
+                attrs['_ARRAY_DIMENSIONS'] = list(var.dims)
+                var_chunks = variable_chunks(var, chunks)
+                array = group.create_array(name, shape=var.shape, dtype=dtype,
+                                           chunks=var_chunks, fill_value=fill,
+                                           compressors=codec, attributes=attrs)
+                chunk_count += int(np.prod([-(-n // c) for n, c in zip(var.shape, var_chunks)],
+                                           dtype=np.int64))
+                pending = deque()
+                itemsize = max(var.dtype.itemsize, dtype.itemsize)
+                for block in blocks(var.shape, itemsize, block_bytes, var_chunks):
+                    values = _encode(np.asarray(var[block].values), var, dtype, fill,
+                                     attrs.get('units'))
+                    written += values.nbytes
+                    pending.append(pool.submit(array.__setitem__, block, values))
+                    # Lecture du bloc suivant pendant la compression des précédents
+                    while len(pending) > workers:
+                        pending.popleft().result()
+                while pending:
+                    pending.popleft().result()
+                if progress:
+                    progress(name, number + 1, len(names))
+        zarr.consolidate_metadata(store, zarr_format=2)
+        seconds = time.perf_counter() - start
+        nbytes = store_size(store)
+        span.set(bytes=written, store_bytes=nbytes)
+
+    return {
+        'variables': len(names),
+        'chunks': chunk_count,
+        'bytes': written,
+        'store_bytes': nbytes,
+        'seconds': seconds,
+        'bytes_per_second': written / seconds if seconds else None,
+    }
+
+
+def format_summary(result):
+    """Résumé d'une conversion sur une ligne"""
+    text = (f"{result['variables']} variables, {result['chunks']} chunks : "
+            f"{result['bytes'] / 2**20:.1f} Mo -> {result['store_bytes'] / 2**20:.1f} Mo "
+            f"en {result['seconds']:.2f} s")
+    if result['bytes_per_second']:
+        text += f" ({result['bytes_per_second'] / 2**20:.1f} Mo/s)"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m netcdflab.utils.zarr_io',
+        description="Convertir un fichier NetCDF en store Zarr local")
+    parser.add_argument('input', help="Fichier NetCDF")
+    parser.add_argument('output', help="Store Zarr (répertoire, remplacé s'il existe)")
+    parser.add_argument('--chunks', default='',
+                        help="Chunks par dimension, ex: 'time=1, lat=100' (chunks du fichier par défaut)")
+    parser.add_argument('--compressor', default=DEFAULT_COMPRESSOR,
+                        help=f"Compresseur ({', '.join(COMPRESSORS)})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="Threads de compression et d'écriture")
+    parser.add_argument('--block-mb', type=float, default=BLOCK_BYTES / 2**20,
+                        help="Taille maximale d'un bloc lu (Mo)")
+    args = parser.parse_args(argv)
+
+    if not zarr_available():
+        print("La conversion Zarr nécessite zarr 3 et numcodecs (pip install 'zarr>=3' numcodecs)")
+        return 1
+    import xarray as xr
+
+    try:
+        chunks = parse_chunks(args.chunks)
+        with xr.open_dataset(args.input) as dataset:
+            result = write_zarr(dataset, args.output, chunks, args.compressor,
+                                args.workers, int(args.block_mb * 2**20))
+    except ValueError as e:
+        print(e)
+        return 1
+    print(format_summary(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,12 @@ setup(
         'matplotlib',
         'netCDF4',
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+        'storage': ['h5py'],
+        'zarr': ['zarr>=3', 'numcodecs'],
+        'all': ['pyarrow', 'h5py', 'zarr>=3', 'numcodecs'],
+    },
     description="A user-friendly GUI application for viewing and editing NetCDF files",
     project_name="NetCDF Lab",
     author="RV - dbwa",
@@ -0,0 +1,28 @@
+"""Tests de la vérification des grilles avant comparaison (``netcdflab.utils.compare``)"""
+import numpy as np
+import pytest
+import xarray as xr
+
+from netcdflab.utils import compare
+
+
+def _dataset(lat=np.linspace(-10, 10, 4), values=None, name='temp'):
+    values = np.zeros((3, lat.size)) if values is None else values
+    return xr.Dataset({name: (('time', 'lat'), values)},
+                      coords={'time': np.arange(3), 'lat': lat})
+
+
+def test_aligned_datasets():
+    compare.check_alignment(_dataset(), _dataset(values=np.ones((3, 4))), 'temp')
+
+
+@pytest.mark.parametrize('other, message', [
+    (_dataset(name='other'), "absente"),
+    (_dataset(lat=np.linspace(-10, 10, 5)), "Tailles différentes"),
+    (_dataset(lat=np.linspace(-20, 20, 4)), "Coordonnée lat différente"),
+    (_dataset(values=np.full((3, 4), 'a')), "non numérique"),
+    (xr.Dataset({'temp': (('lat', 'time'), np.zeros((4, 3)))}), "Dimensions différentes"),
+])
+def test_misaligned_datasets(other, message):
+    with pytest.raises(ValueError, match=message):
+        compare.check_alignment(_dataset(), other, 'temp')
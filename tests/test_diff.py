@@ -0,0 +1,74 @@
+"""Tests de la comparaison de fichiers par empreintes (``netcdflab.utils.diff``)"""
+import numpy as np
+import xarray as xr
+
+from netcdflab.utils import diff
+
+
+def _write(path, values):
+    dataset = xr.Dataset(
+        {'temp': (('time', 'lat'), values)},
+        coords={'time': np.arange(values.shape[0]), 'lat': np.linspace(-10, 10, values.shape[1])},
+    )
+    # xarray donne aux variables flottantes un _FillValue NaN
+    dataset.to_netcdf(path)
+    return path
+
+
+def test_file_identical_to_itself(tmp_path):
+    path = _write(tmp_path / 'a.nc', np.arange(12.0).reshape(3, 4))
+    result = diff.diff_files(str(path), str(path))
+    assert result['identical']
+    assert diff.main([str(path), str(path)]) == 0
+
+
+def test_changed_values_are_reported(tmp_path):
+    values = np.arange(12.0).reshape(3, 4)
+    a = _write(tmp_path / 'a.nc', values)
+    values[1, 2] = -1.0
+    b = _write(tmp_path / 'b.nc', values)
+    result = diff.diff_files(str(a), str(b))
+    assert not result['identical']
+    assert result['data']['/temp']['status'] == 'changed'
+
+
+def test_merge_regions_joins_runs_along_last_split_axis():
+    # Grille 2 × 3 : régions (0, 0), (0, 1), (0, 2) consécutives, puis (1, 1)
+    runs = diff._merge_regions([0, 1, 2, 4], [2, 3])
+    assert runs == [((0, 0), (0, 2)), ((1, 1), (1, 1))]
+    assert diff._merge_regions([0], []) == [((), ())]
+
+
+def _entry(hashes, shape, region):
+    return {'hashes': hashes, 'shape': shape, 'region': region}
+
+
+def test_compare_data_reports_changed_regions():
+    a = _entry(['a', 'b', 'c', 'd'], [4, 10], [1, 10])
+    b = _entry(['a', 'x', 'y', 'd'], [4, 10], [1, 10])
+    result = diff.compare_data(a, b)
+    assert result['status'] == 'changed'
+    assert result['regions_total'] == 4 and result['regions_changed'] == 2
+    assert result['regions'] == [[[1, 3], [0, 10]]]
+    assert not result['truncated']
+
+
+def test_compare_data_resized_and_mismatched_grids():
+    a = _entry(['a', 'b'], [2, 5], [1, 5])
+    b = _entry(['a', 'b', 'c'], [3, 5], [1, 5])
+    assert diff.compare_data(a, b)['status'] == 'resized'
+    assert diff.compare_data(a, _entry(['a'], [2, 5], [2, 5])) == {'status': 'grid_mismatch'}
+    assert diff.compare_data(a, _entry(None, [2, 5], [1, 5])) is None
+
+
+def test_compare_data_truncates_region_list(monkeypatch):
+    monkeypatch.setattr(diff, 'MAX_REGIONS', 2)
+    # Une région modifiée sur deux : aucune n'est fusionnée avec la suivante
+    a = _entry(list('abcdef'), [6], [1])
+    b = _entry(list('aXcXeX'), [6], [1])
+    result = diff.compare_data(a, b)
+    assert result['regions_changed'] == 3
+    assert len(result['regions']) == 2 and result['truncated']
+    b = _entry(list('aXXXXf'), [6], [1])
+    result = diff.compare_data(a, b)
+    assert result['regions'] == [[[1, 5]]] and not result['truncated']
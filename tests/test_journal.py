@@ -0,0 +1,32 @@
+"""Tests de la fusion des opérations du journal (``netcdflab.utils.journal``)"""
+from netcdflab.utils import journal
+
+
+def test_overwritten_attribute_is_dropped():
+    operations = [
+        {'op': 'set_attribute', 'variable': 'temp', 'name': 'units', 'value': 'K'},
+        {'op': 'set_attribute', 'variable': 'temp', 'name': 'title', 'value': 'T'},
+        {'op': 'set_attribute', 'variable': 'temp', 'name': 'units', 'value': 'degC'},
+    ]
+    assert journal.fuse_operations(operations) == operations[1:]
+
+
+def test_operations_on_deleted_variable_are_dropped():
+    operations = [
+        {'op': 'set_value', 'variable': 'temp', 'index': 1, 'value': 2.0},
+        {'op': 'set_attribute', 'variable': 'temp', 'name': 'units', 'value': 'K'},
+        {'op': 'set_attribute', 'variable': None, 'name': 'units', 'value': 'K'},
+        {'op': 'delete_variable', 'name': 'temp'},
+    ]
+    assert journal.fuse_operations(operations) == operations[2:]
+
+
+def test_barriers_are_not_crossed():
+    operations = [
+        {'op': 'set_value', 'variable': 'temp', 'index': 0, 'value': 1.0},
+        {'op': 'subset', 'isel': {'time': [0, 2]}},
+        {'op': 'set_value', 'variable': 'temp', 'index': 0, 'value': 3.0},
+        {'op': 'rename_variable', 'old': 'temp', 'new': 't'},
+        {'op': 'delete_variable', 'name': 'temp'},
+    ]
+    assert journal.fuse_operations(operations) == operations
@@ -0,0 +1,66 @@
+"""Tests de la lecture et de l'écriture des fichiers (``netcdflab.utils.netcdf_io``)"""
+import netCDF4
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from netcdflab.utils import netcdf_io
+
+
+def _records_file(path, count=3):
+    dataset = xr.Dataset(
+        {'temp': (('time', 'lat'), np.arange(count * 4, dtype='float32').reshape(count, 4)),
+         'height': (('lat',), np.arange(4.0))},
+        coords={'time': pd.date_range('2024-01-01', periods=count, freq='h'),
+                'lat': np.linspace(-10, 10, 4)},
+    )
+    dataset.to_netcdf(path, unlimited_dims=['time'])
+    return str(path)
+
+
+def test_append_records_from_dictionary(tmp_path):
+    filename = _records_file(tmp_path / 'records.nc')
+    values = np.array([[1.0, np.nan, 3.0, 4.0]])
+    result = netcdf_io.append_records(filename, {
+        'time': np.array(['2024-01-01T03'], dtype='datetime64[ns]'), 'temp': values})
+    assert result == ('time', 3, 1)
+    with xr.open_dataset(filename) as dataset:
+        assert dataset.sizes['time'] == 4
+        assert dataset['time'].values[-1] == np.datetime64('2024-01-01T03')
+        np.testing.assert_array_equal(dataset['temp'].values[-1], values[0])
+        np.testing.assert_array_equal(dataset['height'].values, np.arange(4.0))
+
+
+def test_append_records_while_dataset_is_open(tmp_path):
+    filename = _records_file(tmp_path / 'records.nc')
+    source = _records_file(tmp_path / 'source.nc', count=2)
+    dataset = netcdf_io.load_dataset(filename)
+    dataset['temp'].values  # lecture différée : xarray garde le fichier ouvert
+    assert netcdf_io.append_records(filename, source) == ('time', 3, 2)
+    with xr.open_dataset(filename) as appended:
+        assert appended.sizes['time'] == 5
+
+
+def test_append_records_checks_before_writing(tmp_path):
+    filename = _records_file(tmp_path / 'records.nc')
+    with pytest.raises(ValueError, match="absente"):
+        netcdf_io.append_records(filename, {'time': np.zeros(1, dtype='datetime64[ns]')})
+    with pytest.raises(ValueError, match="incompatible"):
+        netcdf_io.append_records(filename, {'time': np.zeros(1, dtype='datetime64[ns]'),
+                                            'temp': np.zeros((1, 5))})
+    with netCDF4.Dataset(filename) as dataset:
+        assert len(dataset.dimensions['time']) == 3
+
+
+def test_write_dataset_keeps_stored_encoding(tmp_path):
+    source = tmp_path / 'source.nc'
+    xr.Dataset({'temp': (('time', 'lat'), np.random.default_rng(0).random((6, 8)))}).to_netcdf(
+        source, encoding={'temp': {'zlib': True, 'complevel': 3, 'chunksizes': (1, 8)}})
+    output = str(tmp_path / 'output.nc')
+    dataset = netcdf_io.load_dataset(str(source))
+    netcdf_io.write_dataset(dataset, output)
+    with netCDF4.Dataset(output) as written:
+        variable = written['temp']
+        assert variable.chunking() == [1, 8]
+        assert variable.filters()['zlib'] and variable.filters()['complevel'] == 3
@@ -0,0 +1,67 @@
+"""Tests des accumulateurs et de l'histogramme fusionnables (``netcdflab.utils.statistics``)"""
+import numpy as np
+
+from netcdflab.utils import statistics
+
+
+def _accumulate(blocks):
+    accumulator = statistics.Accumulator()
+    for block in blocks:
+        finite = block[np.isfinite(block)]
+        accumulator.merge(statistics.Accumulator.from_values(block, finite))
+    return accumulator
+
+
+def test_merged_accumulator_matches_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1e6, 3.0, 10000)
+    values[::97] = np.nan
+    accumulator = _accumulate(np.array_split(values, 7))
+    finite = values[np.isfinite(values)]
+    assert accumulator.count == finite.size
+    assert accumulator.missing == values.size - finite.size
+    assert accumulator.min == finite.min() and accumulator.max == finite.max()
+    np.testing.assert_allclose(accumulator.mean, finite.mean())
+    np.testing.assert_allclose(accumulator.std, finite.std())
+
+
+def test_merge_with_empty_block():
+    accumulator = _accumulate([np.full(4, np.nan), np.array([1.0, 3.0]), np.zeros(0)])
+    assert accumulator.count == 2 and accumulator.missing == 4
+    assert accumulator.mean == 2.0 and accumulator.std == 1.0
+    assert statistics.Accumulator().std is None
+
+
+def test_histogram_rebins_when_values_overflow():
+    histogram = statistics.Histogram(0.0, 1.0, max_bins=8)
+    histogram.add(np.arange(8.0))
+    assert histogram.level == 0 and histogram.counts.tolist() == [1] * 8
+    histogram.add(np.array([20.0]))
+    # Classes regroupées par 4 : [0, 4), [4, 8), ..., [20, 24)
+    assert histogram.width() == 4.0
+    assert histogram.counts.sum() == 9
+    assert histogram.counts.size <= 8
+    np.testing.assert_array_equal(histogram.edges()[[0, -1]], [0.0, 24.0])
+
+
+def test_histogram_merge_does_not_depend_on_order():
+    rng = np.random.default_rng(1)
+    blocks = [rng.uniform(-5, 5, 100), rng.uniform(50, 60, 100), rng.uniform(0, 1, 100)]
+    grid = statistics.grid_for(blocks[0])
+    results = []
+    for order in ([0, 1, 2], [2, 1, 0]):
+        merged = None
+        for index in order:
+            _, histogram = statistics.summarize(blocks[index], grid)
+            if merged is None:
+                merged = histogram
+            else:
+                merged.merge(histogram)
+        results.append(merged)
+    assert results[0].level == results[1].level
+    assert results[0].first == results[1].first
+    np.testing.assert_array_equal(results[0].counts, results[1].counts)
+    assert results[0].counts.sum() == 300
+    edges = results[0].edges()
+    all_values = np.concatenate(blocks)
+    np.testing.assert_array_equal(np.histogram(all_values, edges)[0], results[0].counts)